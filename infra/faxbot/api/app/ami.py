@@ -73,13 +73,16 @@ class AMIClient:
         self.writer.write(raw.encode())
         await self.writer.drain()
 
-    async def originate_sendfax(self, job_id: str, dest: str, tiff_path: str):
+    async def originate_sendfax(self, job_id: str, dest: str, tiff_path: str, header: Optional[str] = None):
         # Originate to Local channel which enters faxout context
         variables = {
             "JOBID": job_id,
             "DEST": dest,
             "FAXFILE": tiff_path,
         }
+        if header:
+            # Overrides FAX_HEADER for this call (continuation of a partial send)
+            variables["FAXHEADER"] = header
         var_lines = ",".join(f"{k}={v}" for k, v in variables.items())
         await self._send_action({
             "Action": "Originate",
@@ -0,0 +1,116 @@
+"""Content-addressed store for outbound documents.
+
+Uploads are keyed by the SHA-256 of their bytes. The normalized PDF and any rendered
+TIFF live under ``{FAX_DATA_DIR}/cas/<aa>/<sha>.(pdf|tiff)`` and are shared by every
+job that uploaded the same content. ``fax_artifacts.refcount`` counts those jobs; the
+files are removed only when the last reference is released by retention cleanup.
+"""
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete, func, update  # type: ignore
+from sqlalchemy.exc import IntegrityError  # type: ignore
+
+from .config import settings
+from .db import SessionLocal, FaxArtifact
+
+
+def cas_dir() -> str:
+    return os.path.join(settings.fax_data_dir, "cas")
+
+
+def cas_path(sha256: str, ext: str) -> str:
+    return os.path.join(cas_dir(), sha256[:2], f"{sha256}.{ext}")
+
+
+def is_cas_path(path: Optional[str]) -> bool:
+    if not path:
+        return False
+    root = os.path.abspath(cas_dir()) + os.sep
+    return os.path.abspath(path).startswith(root)
+
+
+def retain(sha256: str, size_bytes: Optional[int] = None, refs: int = 1) -> FaxArtifact:
+    """Take ``refs`` references on ``sha256``, creating the artifact row on first use."""
+    now = datetime.utcnow()
+    for _ in range(3):
+        with SessionLocal() as db:
+            res = db.execute(
+                update(FaxArtifact)
+                .where(FaxArtifact.sha256 == sha256)
+                .values(refcount=FaxArtifact.refcount + refs, last_used_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            if res.rowcount == 0:
+                db.add(FaxArtifact(
+                    sha256=sha256,
+                    pdf_path=cas_path(sha256, "pdf"),
+                    size_bytes=size_bytes,
+                    refcount=refs,
+                    created_at=now,
+                    last_used_at=now,
+                ))
+            try:
+                db.commit()
+            except IntegrityError:
+                # Another request inserted the same content first; take a reference on its row
+                db.rollback()
+                continue
+            art = db.get(FaxArtifact, sha256)
+            if art is not None:
+                return art
+    raise RuntimeError(f"Could not reference artifact {sha256}")
+
+
+def record(sha256: str, **fields: Any) -> None:
+    """Persist derived artifact facts (tiff_path, pages) once they are produced."""
+    values = {k: v for k, v in fields.items() if v is not None}
+    if not values:
+        return
+    with SessionLocal() as db:
+        db.execute(
+            update(FaxArtifact)
+            .where(FaxArtifact.sha256 == sha256)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+
+def release(sha256: str, refs: int = 1) -> bool:
+    """Drop ``refs`` references. Deletes the row and its files when none remain; returns True then."""
+    with SessionLocal() as db:
+        db.execute(
+            update(FaxArtifact)
+            .where(FaxArtifact.sha256 == sha256, FaxArtifact.refcount > 0)
+            .values(refcount=FaxArtifact.refcount - refs)
+            .execution_options(synchronize_session=False)
+        )
+        art = db.get(FaxArtifact, sha256)
+        paths = [str(art.pdf_path or ""), str(art.tiff_path or "")] if art is not None else []
+        res = db.execute(
+            delete(FaxArtifact)
+            .where(FaxArtifact.sha256 == sha256, FaxArtifact.refcount <= 0)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+    if res.rowcount != 1:
+        return False
+    for p in paths:
+        if p and is_cas_path(p):
+            try:
+                os.remove(p)
+            except FileNotFoundError:
+                pass
+    return True
+
+
+def stats() -> Dict[str, Any]:
+    with SessionLocal() as db:
+        count, refs, size = db.query(
+            func.count(FaxArtifact.sha256),
+            func.coalesce(func.sum(FaxArtifact.refcount), 0),
+            func.coalesce(func.sum(FaxArtifact.size_bytes), 0),
+        ).one()
+    return {"artifacts": int(count or 0), "references": int(refs or 0), "size_bytes": int(size or 0)}
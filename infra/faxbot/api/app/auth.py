@@ -90,7 +90,7 @@ def parse_header_token(x_api_key: Optional[str]) -> Tuple[Optional[str], Optiona
 
 def verify_db_key(x_api_key: Optional[str]) -> Optional[Dict[str, Any]]:
     """Verify a DB-backed key. Returns info dict on success or None.
-    Info: { key_id, scopes: List[str], name, owner }
+    Info: { key_id, scopes: List[str], name, owner, priority }
     """
     key_id, secret = parse_header_token(x_api_key)
     if not key_id or not secret:
@@ -115,11 +115,13 @@ def verify_db_key(x_api_key: Optional[str]) -> Optional[Dict[str, Any]]:
         except Exception:
             db.rollback()
         scopes = [s.strip() for s in (rec.scopes or "").split(",") if s.strip()]
-        return {"key_id": rec.key_id, "scopes": scopes, "name": rec.name, "owner": rec.owner}
+        return {"key_id": rec.key_id, "scopes": scopes, "name": rec.name, "owner": rec.owner, "priority": rec.priority}
 
 
 def create_api_key(*, name: Optional[str], owner: Optional[str], scopes: Optional[List[str]],
-                   expires_at: Optional[datetime], note: Optional[str]) -> Dict[str, Any]:
+                   expires_at: Optional[datetime], note: Optional[str],
+                   priority: Optional[str] = None, dispatch_weight: Optional[int] = None,
+                   max_in_flight: Optional[int] = None) -> Dict[str, Any]:
     token, key_id, secret = generate_token()
     key_hash = hash_secret(secret)
     with SessionLocal() as db:
@@ -133,30 +135,55 @@ def create_api_key(*, name: Optional[str], owner: Optional[str], scopes: Optiona
             created_at=datetime.utcnow(),
             expires_at=expires_at,
             note=note,
+            priority=priority,
+            dispatch_weight=dispatch_weight,
+            max_in_flight=max_in_flight,
         )
         db.add(rec)
         db.commit()
     audit_event("api_key_created", key_id=key_id, owner=owner, scopes=scopes or [])
-    return {"token": token, "key_id": key_id, "name": name, "owner": owner, "scopes": scopes or [], "expires_at": expires_at}
+    return {"token": token, "key_id": key_id, "name": name, "owner": owner, "scopes": scopes or [], "expires_at": expires_at,
+            "priority": priority, "dispatch_weight": dispatch_weight, "max_in_flight": max_in_flight}
+
+
+def _key_meta(r: APIKey) -> Dict[str, Any]:
+    return {
+        "key_id": r.key_id,
+        "name": r.name,
+        "owner": r.owner,
+        "scopes": [s.strip() for s in (r.scopes or "").split(",") if s.strip()],
+        "created_at": r.created_at,
+        "last_used_at": r.last_used_at,
+        "expires_at": r.expires_at,
+        "revoked_at": r.revoked_at,
+        "note": r.note,
+        "priority": r.priority,
+        "dispatch_weight": r.dispatch_weight,
+        "max_in_flight": r.max_in_flight,
+    }
 
 
 def list_api_keys() -> List[Dict[str, Any]]:
     with SessionLocal() as db:
         rows = db.query(APIKey).all()  # type: ignore[attr-defined]
-        out: List[Dict[str, Any]] = []
-        for r in rows:
-            out.append({
-                "key_id": r.key_id,
-                "name": r.name,
-                "owner": r.owner,
-                "scopes": [s.strip() for s in (r.scopes or "").split(",") if s.strip()],
-                "created_at": r.created_at,
-                "last_used_at": r.last_used_at,
-                "expires_at": r.expires_at,
-                "revoked_at": r.revoked_at,
-                "note": r.note,
-            })
-        return out
+        return [_key_meta(r) for r in rows]
+
+
+def update_api_key(key_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
+    """Set dispatch settings (priority, dispatch_weight, max_in_flight) on a key."""
+    allowed = {"priority", "dispatch_weight", "max_in_flight"}
+    with SessionLocal() as db:
+        rec = db.query(APIKey).filter(APIKey.key_id == key_id).first()  # type: ignore[attr-defined]
+        if not rec:
+            return None
+        for name, value in fields.items():
+            if name in allowed:
+                setattr(rec, name, value)
+        db.add(rec)
+        db.commit()
+        meta = _key_meta(rec)
+    audit_event("api_key_updated", key_id=key_id, fields=sorted(f for f in fields if f in allowed))
+    return meta
 
 
 def revoke_api_key(key_id: str) -> bool:
@@ -1,6 +1,6 @@
 import os
 import json
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, Field
 
 
@@ -93,6 +93,7 @@ class Settings(BaseModel):
     signalwire_sms_from_e164: str = Field(default_factory=lambda: os.getenv("SIGNALWIRE_SMS_FROM_E164", ""))
     signalwire_status_callback_url: str = Field(default_factory=lambda: os.getenv("SIGNALWIRE_STATUS_CALLBACK_URL", os.getenv("SIGNALWIRE_CALLBACK_URL", "")))
     signalwire_webhook_signing_key: str = Field(default_factory=lambda: os.getenv("SIGNALWIRE_WEBHOOK_SIGNING_KEY", ""))
+    # Poll base interval for SignalWire jobs (0: use STATUS_POLL_SECONDS)
     signalwire_status_poll_seconds: int = Field(default_factory=lambda: int(os.getenv("SIGNALWIRE_STATUS_POLL_SECONDS", "0")))
 
     # Documo (mFax) — direct upload flow (preview)
@@ -114,10 +115,77 @@ class Settings(BaseModel):
     # Retention / cleanup
     artifact_ttl_days: int = Field(default_factory=lambda: int(os.getenv("ARTIFACT_TTL_DAYS", "0")))  # 0=disabled
     cleanup_interval_minutes: int = Field(default_factory=lambda: int(os.getenv("CLEANUP_INTERVAL_MINUTES", "1440")))
+    # Rendered TIFF cache (LRU by last use, shares the ARTIFACT_TTL_DAYS retention); 0 disables
+    tiff_cache_max_mb: int = Field(default_factory=lambda: int(os.getenv("TIFF_CACHE_MAX_MB", "1024")))
 
     # Rate limiting (per key) — disabled by default; implemented in Phase 2
     max_requests_per_minute: int = Field(default_factory=lambda: int(os.getenv("MAX_REQUESTS_PER_MINUTE", "0")))
 
+    # Outbound dispatch queue (DB-backed). Workers claim queued jobs under a lease;
+    # set DISPATCH_WORKERS=0 on API replicas that should only accept uploads.
+    dispatch_workers: int = Field(default_factory=lambda: int(os.getenv("DISPATCH_WORKERS", "4")))
+    dispatch_lease_seconds: int = Field(default_factory=lambda: int(os.getenv("DISPATCH_LEASE_SECONDS", "300")))
+    dispatch_poll_seconds: float = Field(default_factory=lambda: float(os.getenv("DISPATCH_POLL_SECONDS", "2")))
+    # Priority lanes (urgent | normal | bulk): "weighted" shares workers by DISPATCH_LANE_WEIGHTS,
+    # "strict" always drains higher lanes first
+    dispatch_lane_policy: str = Field(default_factory=lambda: os.getenv("DISPATCH_LANE_POLICY", "weighted").lower())
+    dispatch_lane_weights: str = Field(default_factory=lambda: os.getenv("DISPATCH_LANE_WEIGHTS", "urgent=8,normal=3,bulk=1"))
+    # Per-tenant fair queuing within a lane (deficit round-robin by API key); per-key
+    # dispatch_weight / max_in_flight on api_keys override these defaults (0 = no cap)
+    tenant_quantum_pages: int = Field(default_factory=lambda: int(os.getenv("TENANT_QUANTUM_PAGES", "10")))
+    tenant_default_weight: int = Field(default_factory=lambda: int(os.getenv("TENANT_DEFAULT_WEIGHT", "1")))
+    tenant_max_in_flight: int = Field(default_factory=lambda: int(os.getenv("TENANT_MAX_IN_FLIGHT", "0")))
+    # Document conversion (reportlab/Ghostscript) runs off the event loop; bounded concurrency and per-job timeout
+    conversion_workers: int = Field(default_factory=lambda: int(os.getenv("CONVERSION_WORKERS", str(min(4, os.cpu_count() or 1)))))
+    conversion_timeout_seconds: float = Field(default_factory=lambda: float(os.getenv("CONVERSION_TIMEOUT_SECONDS", "120")))
+    # Resumable uploads (/fax/uploads): total size cap and idle session lifetime
+    upload_max_size_mb: int = Field(default_factory=lambda: int(os.getenv("UPLOAD_MAX_SIZE_MB", "100")))
+    upload_session_ttl_hours: int = Field(default_factory=lambda: int(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24")))
+    # Failed dispatches: retryable errors are requeued with jittered exponential backoff
+    # (RETRY_BASE_SECONDS doubling up to RETRY_MAX_SECONDS) until RETRY_MAX_ATTEMPTS attempts
+    retry_max_attempts: int = Field(default_factory=lambda: int(os.getenv("RETRY_MAX_ATTEMPTS", "4")))
+    retry_base_seconds: float = Field(default_factory=lambda: float(os.getenv("RETRY_BASE_SECONDS", "30")))
+    retry_max_seconds: float = Field(default_factory=lambda: float(os.getenv("RETRY_MAX_SECONDS", "3600")))
+    # Scheduled sends (send_at): how far ahead a job may be scheduled
+    schedule_max_days: int = Field(default_factory=lambda: int(os.getenv("SCHEDULE_MAX_DAYS", "30")))
+    # POST /fax/batch: maximum jobs per request
+    batch_max_jobs: int = Field(default_factory=lambda: int(os.getenv("BATCH_MAX_JOBS", "1000")))
+    # Mail-merge broadcasts rendered concurrently per process (0: this process renders none)
+    merge_workers: int = Field(default_factory=lambda: int(os.getenv("MERGE_WORKERS", "1")))
+    # PDFs with at least this many pages are rasterized as parallel page ranges (0 disables)
+    conversion_parallel_min_pages: int = Field(default_factory=lambda: int(os.getenv("CONVERSION_PARALLEL_MIN_PAGES", "16")))
+    # Outbound failover: comma-separated cloud backends tried after the primary when it errors
+    # or is unhealthy (rolling success rate over ROUTING_WINDOW_SECONDS); empty disables failover.
+    outbound_fallbacks: str = Field(default_factory=lambda: os.getenv("FAX_OUTBOUND_FALLBACKS", "").lower())
+    routing_window_seconds: int = Field(default_factory=lambda: int(os.getenv("ROUTING_WINDOW_SECONDS", "300")))
+    routing_min_samples: int = Field(default_factory=lambda: int(os.getenv("ROUTING_MIN_SAMPLES", "5")))
+    routing_unhealthy_success_rate: float = Field(default_factory=lambda: float(os.getenv("ROUTING_UNHEALTHY_SUCCESS_RATE", "0.5")))
+    # Status polling of in-flight cloud jobs (lost callbacks): base and maximum interval,
+    # concurrent provider requests; STATUS_POLL_SECONDS=0 disables the poller
+    status_poll_seconds: int = Field(default_factory=lambda: int(os.getenv("STATUS_POLL_SECONDS", "60")))
+    status_poll_max_seconds: int = Field(default_factory=lambda: int(os.getenv("STATUS_POLL_MAX_SECONDS", "900")))
+    status_poll_concurrency: int = Field(default_factory=lambda: int(os.getenv("STATUS_POLL_CONCURRENCY", "8")))
+    # Bulk reconciliation sweeps against provider list APIs (0 disables the periodic sweep;
+    # POST /admin/reconcile still runs one); windows reach back at most RECONCILE_MAX_HOURS
+    reconcile_interval_seconds: int = Field(default_factory=lambda: int(os.getenv("RECONCILE_INTERVAL_SECONDS", "900")))
+    reconcile_max_hours: int = Field(default_factory=lambda: int(os.getenv("RECONCILE_MAX_HOURS", "72")))
+    # Write-behind sink for status callbacks: buffer window and jobs per batched flush
+    status_sink_window_ms: int = Field(default_factory=lambda: int(os.getenv("STATUS_SINK_WINDOW_MS", "5")))
+    status_sink_max_batch: int = Field(default_factory=lambda: int(os.getenv("STATUS_SINK_MAX_BATCH", "500")))
+    # Customer status webhooks: delivery attempts and backoff, concurrent POSTs per endpoint,
+    # request timeout, keep-alive pool size, delivered rows kept for inspection
+    webhook_max_attempts: int = Field(default_factory=lambda: int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "8")))
+    webhook_retry_base_seconds: int = Field(default_factory=lambda: int(os.getenv("WEBHOOK_RETRY_BASE_SECONDS", "10")))
+    webhook_retry_max_seconds: int = Field(default_factory=lambda: int(os.getenv("WEBHOOK_RETRY_MAX_SECONDS", "3600")))
+    webhook_endpoint_concurrency: int = Field(default_factory=lambda: int(os.getenv("WEBHOOK_ENDPOINT_CONCURRENCY", "4")))
+    webhook_timeout_seconds: float = Field(default_factory=lambda: float(os.getenv("WEBHOOK_TIMEOUT_SECONDS", "10")))
+    webhook_pool_size: int = Field(default_factory=lambda: int(os.getenv("WEBHOOK_POOL_SIZE", "50")))
+    webhook_retention_hours: int = Field(default_factory=lambda: int(os.getenv("WEBHOOK_RETENTION_HOURS", "72")))
+    # Destination-prefix routes (prefix → backend): a JSON file re-read when it changes, plus
+    # inline "+44=sinch,+1=sip" entries that override it. Unrouted numbers use the outbound backend.
+    fax_routes_file: str = Field(default_factory=lambda: os.getenv("FAX_ROUTES_FILE", ""))
+    fax_routes: str = Field(default_factory=lambda: os.getenv("FAX_ROUTES", ""))
+
     # Audit logging
     audit_log_enabled: bool = Field(default_factory=lambda: os.getenv("AUDIT_LOG_ENABLED", "false").lower() in {"1", "true", "yes"})
     audit_log_format: str = Field(default_factory=lambda: os.getenv("AUDIT_LOG_FORMAT", "json"))
@@ -273,11 +341,14 @@ def _scan_manifest_traits() -> Dict[str, Dict[str, Any]]:
         # Traits are optional in manifests; use if present
         traits = data.get("traits") if isinstance(data.get("traits"), dict) else None
         kind = data.get("kind") if isinstance(data.get("kind"), str) else None
+        limits = data.get("limits") if isinstance(data.get("limits"), dict) else None
         obj: Dict[str, Any] = {"id": pid}
         if kind:
             obj["kind"] = kind
         if traits:
             obj["traits"] = traits
+        if limits:
+            obj["limits"] = limits
         if obj:
             results[pid] = obj
     return results
@@ -328,6 +399,25 @@ def get_provider_traits(provider_id: Optional[str]) -> Dict[str, Any]:
     return get_provider_registry().get(provider_id, {})
 
 
+# Outbound throughput limits (`limits` block per provider); absent or 0 means unlimited
+PROVIDER_LIMIT_KEYS: set[str] = {"requests_per_second", "burst", "max_in_flight"}
+
+
+def get_provider_limits(provider_id: Optional[str]) -> Dict[str, Any]:
+    lim = get_provider_traits(provider_id).get("limits")
+    if not isinstance(lim, dict):
+        return {}
+    out: Dict[str, Any] = {}
+    for k in PROVIDER_LIMIT_KEYS:
+        try:
+            v = float(lim.get(k) or 0)
+        except (TypeError, ValueError):
+            continue
+        if v > 0:
+            out[k] = v if k == "requests_per_second" else int(v)
+    return out
+
+
 def valid_backends() -> set[str]:
     """Return provider ids known to the system.
     Falls back to a safe built-in set when the traits registry is unavailable.
@@ -354,6 +444,18 @@ def active_outbound() -> str:
     return ob if ob in valid_backends() else settings.fax_backend
 
 
+def outbound_candidates(primary: Optional[str] = None) -> List[str]:
+    """Primary outbound backend followed by configured fallbacks (deduplicated, known ids only)."""
+    first = (primary or active_outbound() or "").strip().lower()
+    out = [first] if first else []
+    known = valid_backends()
+    for b in (settings.outbound_fallbacks or "").split(","):
+        b = b.strip().lower()
+        if b and b in known and b not in out:
+            out.append(b)
+    return out
+
+
 def active_inbound() -> str:
     """Return the effective inbound backend, normalizing and validating.
     Falls back to legacy fax_backend when dual env is not set or invalid.
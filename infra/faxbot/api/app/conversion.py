@@ -1,20 +1,73 @@
 import subprocess
 import shutil
 from pathlib import Path
-from typing import Tuple, Optional
+from typing import List, Tuple, Optional
 from reportlab.lib.pagesizes import letter  # type: ignore
 from reportlab.pdfgen import canvas  # type: ignore
 import os
 
+from .pdfinfo import count_pdf_pages_file
+from .tiffio import count_tiff_pages
+
 
 def ensure_dir(path: str) -> None:
     Path(path).mkdir(parents=True, exist_ok=True)
 
 
+def conversion_stubbed(path: str) -> bool:
+    """Test/disabled mode: conversions write placeholders instead of running reportlab/Ghostscript."""
+    return os.getenv("FAX_DISABLED") == "true" or "test" in path.lower()
+
+
+# Fax-optimized TIFF profile: Group 4, fine resolution (204x196 DPI)
+FAX_TIFF_DEVICE = "tiffg4"
+FAX_TIFF_RESOLUTION = "204x196"
+
+
+def gs_tiff_cmd(
+    pdf_path: str,
+    tiff_path: str,
+    device: str = FAX_TIFF_DEVICE,
+    resolution: str = FAX_TIFF_RESOLUTION,
+    first_page: Optional[int] = None,
+    last_page: Optional[int] = None,
+) -> List[str]:
+    page_range = []
+    if first_page:
+        page_range.append(f"-dFirstPage={first_page}")
+    if last_page:
+        page_range.append(f"-dLastPage={last_page}")
+    return [
+        "gs",
+        "-dNOPAUSE",
+        "-dBATCH",
+        f"-sDEVICE={device}",
+        f"-r{resolution}",
+        *page_range,
+        f"-sOutputFile={tiff_path}",
+        pdf_path,
+    ]
+
+
+def gs_pdf_cmd(tiff_path: str, pdf_path: str) -> List[str]:
+    return [
+        "gs",
+        "-dNOPAUSE",
+        "-dBATCH",
+        "-sDEVICE=pdfwrite",
+        "-dCompatibilityLevel=1.4",
+        f"-sOutputFile={pdf_path}",
+        tiff_path,
+    ]
+
+
+def gs_pagecount_cmd(pdf_path: str) -> List[str]:
+    return ["gs", "-q", "-dNODISPLAY", "-c", f"({pdf_path}) (r) file runpdfbegin pdfpagecount = quit"]
+
+
 def txt_to_pdf(txt_path: str, pdf_path: str) -> None:
     # Quick test mode check
-    import os
-    if os.getenv("FAX_DISABLED") == "true" or "test" in txt_path.lower():
+    if conversion_stubbed(txt_path):
         # Test mode - create minimal PDF
         Path(pdf_path).write_bytes(b"%PDF-1.4\ntest\n%%EOF")
         return
@@ -38,13 +91,12 @@ def txt_to_pdf(txt_path: str, pdf_path: str) -> None:
     c.save()
 
 
-def pdf_to_tiff(pdf_path: str, tiff_path: str) -> Tuple[int, str]:
+def pdf_to_tiff(pdf_path: str, tiff_path: str, device: str = FAX_TIFF_DEVICE, resolution: str = FAX_TIFF_RESOLUTION) -> Tuple[int, str]:
     # Convert PDF to TIFF suitable for fax (204x196 or 204x98 DPI, Group 3/4)
     # Using Ghostscript to generate fax-optimized TIFF (g4)
     
     # Quick test mode check - if we're in tests, just create a dummy file
-    import os
-    if os.getenv("FAX_DISABLED") == "true" or "test" in pdf_path.lower():
+    if conversion_stubbed(pdf_path):
         # Test mode - create placeholder file
         Path(tiff_path).write_bytes(b"TIFF_PLACEHOLDER")
         return 1, tiff_path
@@ -55,26 +107,9 @@ def pdf_to_tiff(pdf_path: str, tiff_path: str) -> Tuple[int, str]:
         Path(tiff_path).write_bytes(b"")
         return 1, tiff_path
 
-    cmd = [
-        "gs",
-        "-dNOPAUSE",
-        "-dBATCH",
-        "-sDEVICE=tiffg4",
-        "-r204x196",
-        f"-sOutputFile={tiff_path}",
-        pdf_path,
-    ]
-    subprocess.run(cmd, check=True)
-    # Page count: use gs to count or fallback to 1
-    pages = 1
-    try:
-        out = subprocess.check_output([
-            "gs", "-q", "-dNODISPLAY", "-c",
-            f"({pdf_path}) (r) file runpdfbegin pdfpagecount = quit"
-        ])
-        pages = int(out.strip() or b"1")
-    except Exception:
-        pass
+    subprocess.run(gs_tiff_cmd(pdf_path, tiff_path, device, resolution), check=True)
+    # Page count from the output IFDs (or the PDF page tree); no second Ghostscript run
+    pages = count_tiff_pages(tiff_path) or count_pdf_pages_file(pdf_path) or 1
     return pages, tiff_path
 
 
@@ -82,44 +117,29 @@ def tiff_to_pdf(tiff_path: str, pdf_path: str) -> Tuple[int, str]:
     """Convert inbound TIFF to PDF for normalized storage.
     Returns (pages, pdf_path). Uses Ghostscript when available; stubs in test mode.
     """
-    if os.getenv("FAX_DISABLED") == "true" or "test" in tiff_path.lower():
+    if conversion_stubbed(tiff_path):
         Path(pdf_path).write_bytes(b"%PDF-1.4\ntest\n%%EOF")
         return 1, pdf_path
     if shutil.which("gs") is None:
         # No Ghostscript; create placeholder minimal PDF
         Path(pdf_path).write_bytes(b"%PDF-1.4\n% placeholder\n%%EOF")
         return 1, pdf_path
-    cmd = [
-        "gs",
-        "-dNOPAUSE",
-        "-dBATCH",
-        "-sDEVICE=pdfwrite",
-        "-dCompatibilityLevel=1.4",
-        f"-sOutputFile={pdf_path}",
-        tiff_path,
-    ]
-    subprocess.run(cmd, check=True)
-    pages = 1
-    try:
-        out = subprocess.check_output([
-            "gs", "-q", "-dNODISPLAY", "-c",
-            f"({pdf_path}) (r) file runpdfbegin pdfpagecount = quit"
-        ])
-        pages = int(out.strip() or b"1")
-    except Exception:
-        pass
+    subprocess.run(gs_pdf_cmd(tiff_path, pdf_path), check=True)
+    pages = count_tiff_pages(tiff_path) or count_pdf_pages_file(pdf_path) or 1
     return pages, pdf_path
 
 
 def count_pdf_pages(pdf_path: str) -> Optional[int]:
-    """Return the number of pages in a PDF using Ghostscript. Returns None if unknown."""
+    """Return the number of pages in a PDF. Returns None if unknown.
+    Reads the page tree directly; Ghostscript is only a fallback for files the parser rejects.
+    """
+    pages = count_pdf_pages_file(pdf_path)
+    if pages:
+        return pages
     if shutil.which("gs") is None:
         return None
     try:
-        out = subprocess.check_output([
-            "gs", "-q", "-dNODISPLAY", "-c",
-            f"({pdf_path}) (r) file runpdfbegin pdfpagecount = quit"
-        ])
+        out = subprocess.check_output(gs_pagecount_cmd(pdf_path))
         return int((out or b"1").strip() or b"1")
     except Exception:
         return None
@@ -0,0 +1,247 @@
+import asyncio
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .config import settings
+from . import conversion, textfax
+from .pdfinfo import count_pdf_pages_file
+from .tiffio import concat_tiffs, count_tiff_pages
+
+
+class ConversionError(RuntimeError):
+    pass
+
+
+class ConversionTimeout(ConversionError):
+    pass
+
+
+class ConversionService:
+    """Runs document conversions off the event loop.
+
+    Ghostscript runs as an asyncio subprocess, so a timeout or a cancelled request kills
+    it. reportlab work (TXT → PDF) runs on a bounded process pool; on timeout the caller
+    gets an error right away, but a task that already started finishes in its worker.
+    ``CONVERSION_WORKERS`` bounds both kinds together; callers beyond that wait and are
+    counted as ``queued``. PDFs of ``CONVERSION_PARALLEL_MIN_PAGES`` or more are rasterized
+    as page ranges, one Ghostscript per worker, and stitched back into one TIFF.
+    """
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_size = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots_size = 0
+        self.queued = 0
+        self.running = 0
+        self._stats: Dict[str, int] = {"completed": 0, "failed": 0, "timeouts": 0, "cancelled": 0, "split_documents": 0}
+        self._busy_seconds = 0.0
+
+    # ----- plumbing -----
+
+    def _workers(self) -> int:
+        return max(1, int(settings.conversion_workers))
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop or self._slots_size != self._workers():
+            self._slots = asyncio.Semaphore(self._workers())
+            self._slots_loop = loop
+            self._slots_size = self._workers()
+        return self._slots
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None or self._pool_size != self._workers():
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = ProcessPoolExecutor(max_workers=self._workers())
+            self._pool_size = self._workers()
+        return self._pool
+
+    def _timeout(self, timeout: Optional[float]) -> Optional[float]:
+        t = settings.conversion_timeout_seconds if timeout is None else timeout
+        return t if t and t > 0 else None
+
+    async def _run(self, op: str, coro_factory: Callable[[], Any], timeout: Optional[float]) -> Any:
+        slots = self._semaphore()
+        self.queued += 1
+        try:
+            await slots.acquire()
+        finally:
+            self.queued -= 1
+        self.running += 1
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(coro_factory(), timeout=self._timeout(timeout))
+            self._stats["completed"] += 1
+            return result
+        except asyncio.TimeoutError:
+            self._stats["timeouts"] += 1
+            raise ConversionTimeout(f"{op} timed out")
+        except asyncio.CancelledError:
+            self._stats["cancelled"] += 1
+            raise
+        except Exception:
+            self._stats["failed"] += 1
+            raise
+        finally:
+            self.running -= 1
+            self._busy_seconds += time.monotonic() - started
+            slots.release()
+
+    async def _in_pool(self, fn: Callable[..., Any], *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        fut = loop.run_in_executor(self._executor(), fn, *args)
+        try:
+            return await fut
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+
+    async def _gs(self, cmd: List[str]) -> bytes:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            out, err = await proc.communicate()
+        except BaseException:
+            # Timeout or cancellation: do not leave Ghostscript running
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            raise
+        if proc.returncode != 0:
+            msg = (err or b"").decode("utf-8", "ignore").strip()[-300:]
+            raise ConversionError(f"Ghostscript failed ({proc.returncode}): {msg}")
+        return out
+
+    async def _page_ranges(self, pdf_path: str) -> Tuple[int, List[Tuple[int, int]]]:
+        """The PDF's page count (0 when not counted) and contiguous 1-based page ranges,
+        one per worker, or [] for the single-process path."""
+        min_pages = settings.conversion_parallel_min_pages
+        workers = self._workers()
+        if min_pages <= 0 or workers < 2:
+            return 0, []
+        pages = await asyncio.to_thread(count_pdf_pages_file, pdf_path) or 0
+        if pages < max(2, min_pages):
+            return pages, []
+        n = min(workers, pages)
+        size, extra = divmod(pages, n)
+        ranges: List[Tuple[int, int]] = []
+        first = 1
+        for i in range(n):
+            last = first + size - 1 + (1 if i < extra else 0)
+            ranges.append((first, last))
+            first = last + 1
+        return pages, ranges
+
+    async def _pdf_to_tiff_split(
+        self,
+        pdf_path: str,
+        tiff_path: str,
+        ranges: List[Tuple[int, int]],
+        timeout: Optional[float],
+        device: str,
+        resolution: str,
+    ) -> int:
+        parts = [f"{tiff_path}.part{i}" for i in range(len(ranges))]
+        tasks = [
+            asyncio.ensure_future(self._run(
+                "pdf_to_tiff",
+                lambda part=part, r=r: self._gs(conversion.gs_tiff_cmd(pdf_path, part, device, resolution, r[0], r[1])),
+                timeout,
+            ))
+            for part, r in zip(parts, ranges)
+        ]
+        try:
+            await asyncio.gather(*tasks)
+            self._stats["split_documents"] += 1
+            return await asyncio.to_thread(concat_tiffs, parts, tiff_path)
+        finally:
+            # One range failed or the caller gave up: stop the rest (kills their Ghostscript)
+            for t in tasks:
+                if not t.done():
+                    t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for part in parts:
+                if os.path.exists(part):
+                    os.remove(part)
+
+    # ----- public API (async counterparts of conversion.py) -----
+
+    async def txt_to_pdf(self, txt_path: str, pdf_path: str, timeout: Optional[float] = None) -> None:
+        if conversion.conversion_stubbed(txt_path):
+            conversion.txt_to_pdf(txt_path, pdf_path)
+            return
+        await self._run("txt_to_pdf", lambda: self._in_pool(conversion.txt_to_pdf, txt_path, pdf_path), timeout)
+
+    async def txt_to_tiff(self, txt_path: str, tiff_path: str, timeout: Optional[float] = None) -> Tuple[int, str]:
+        """Rasterize text straight to a Group 4 TIFF (see textfax.py); no PDF or Ghostscript."""
+        if conversion.conversion_stubbed(txt_path):
+            return conversion.pdf_to_tiff(txt_path, tiff_path)
+        return await self._run("txt_to_tiff", lambda: self._in_pool(textfax.txt_to_tiff, txt_path, tiff_path), timeout)
+
+    async def pdf_to_tiff(
+        self,
+        pdf_path: str,
+        tiff_path: str,
+        timeout: Optional[float] = None,
+        device: str = conversion.FAX_TIFF_DEVICE,
+        resolution: str = conversion.FAX_TIFF_RESOLUTION,
+    ) -> Tuple[int, str]:
+        if conversion.conversion_stubbed(pdf_path) or shutil.which("gs") is None:
+            return conversion.pdf_to_tiff(pdf_path, tiff_path, device, resolution)
+
+        counted, ranges = await self._page_ranges(pdf_path)
+        if len(ranges) > 1:
+            pages = await self._pdf_to_tiff_split(pdf_path, tiff_path, ranges, timeout, device, resolution)
+            return pages, tiff_path
+
+        async def work() -> int:
+            await self._gs(conversion.gs_tiff_cmd(pdf_path, tiff_path, device, resolution))
+            return (
+                await asyncio.to_thread(count_tiff_pages, tiff_path)
+                or counted
+                or await asyncio.to_thread(count_pdf_pages_file, pdf_path)
+                or 1
+            )
+
+        pages = await self._run("pdf_to_tiff", work, timeout)
+        return pages, tiff_path
+
+    async def tiff_to_pdf(self, tiff_path: str, pdf_path: str, timeout: Optional[float] = None) -> Tuple[int, str]:
+        if conversion.conversion_stubbed(tiff_path) or shutil.which("gs") is None:
+            return conversion.tiff_to_pdf(tiff_path, pdf_path)
+
+        async def work() -> int:
+            await self._gs(conversion.gs_pdf_cmd(tiff_path, pdf_path))
+            return (
+                await asyncio.to_thread(count_tiff_pages, tiff_path)
+                or await asyncio.to_thread(count_pdf_pages_file, pdf_path)
+                or 1
+            )
+
+        pages = await self._run("tiff_to_pdf", work, timeout)
+        return pages, pdf_path
+
+    def stats(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = dict(self._stats)
+        out.update({
+            "workers": self._workers(),
+            "queued": self.queued,
+            "running": self.running,
+            "busy_seconds": round(self._busy_seconds, 3),
+        })
+        return out
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+conversion_service = ConversionService()
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, String, DateTime, Integer, Text, UniqueConstraint  # type: ignore
+from sqlalchemy import create_engine, event, Column, String, DateTime, Index, Integer, Text, UniqueConstraint  # type: ignore
 from sqlalchemy.orm import declarative_base, sessionmaker  # type: ignore
 from datetime import datetime
 from .config import settings
@@ -30,6 +30,80 @@ class FaxJob(Base):  # type: ignore
     pdf_url = Column(String(512), nullable=True)  # Public URL for PDF (for cloud backend)
     pdf_token = Column(String(128), nullable=True)  # Secure token for PDF fetch
     pdf_token_expires_at = Column(DateTime, nullable=True)
+    # Dispatch queue: a worker owns the job while its lease is live; dispatched_at marks hand-off to the provider
+    lease_owner = Column(String(64), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    dispatched_at = Column(DateTime, nullable=True)
+    content_sha256 = Column(String(64), index=True, nullable=True)  # shared artifact (fax_artifacts) used by this job
+    broadcast_id = Column(String(40), index=True, nullable=True)  # mail-merge broadcast (fax_broadcasts) that created it
+    send_at = Column(DateTime, index=True, nullable=True)  # scheduled send: not dispatched before this time (UTC)
+    priority = Column(String(16), index=True, nullable=True)  # dispatch lane (urgent | normal | bulk); set to normal on insert
+    key_id = Column(String(64), index=True, nullable=True)  # submitting API key (fair-queuing tenant); NULL without auth
+    attempts = Column(Integer, nullable=True)  # failed dispatch attempts so far (see retry.py)
+    attempt_log = Column(Text, nullable=True)  # JSON list of failed attempts: attempt, at, backend, error, retryable, pages
+    pages_sent = Column(Integer, nullable=True)  # pages delivered by interrupted SIP/FreeSWITCH attempts; retries resume after them
+    ready_at = Column(DateTime, nullable=True)  # when the job may be dispatched: send_at, else created_at (kept in step with send_at)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Dispatch: one tenant's oldest ready job in a lane (see JobDispatcher._tenant_head)
+    __table_args__ = (Index("ix_fax_jobs_tenant_head", "status", "key_id", "priority", "ready_at", "id"),)
+
+
+@event.listens_for(FaxJob, "before_insert")
+def _dispatch_columns(mapper, connection, target) -> None:  # type: ignore[no-untyped-def]
+    """Fill the columns the dispatch index orders by, so the head lookup needs no COALESCE."""
+    if target.priority is None:
+        target.priority = "normal"
+    if target.created_at is None:
+        target.created_at = datetime.utcnow()
+    if target.ready_at is None:
+        target.ready_at = target.send_at or target.created_at
+
+
+class FaxArtifact(Base):  # type: ignore
+    """Content-addressed outbound document shared by every job that uploaded the same bytes."""
+    __tablename__ = "fax_artifacts"
+    sha256 = Column(String(64), primary_key=True)
+    pdf_path = Column(String(512), nullable=True)
+    tiff_path = Column(String(512), nullable=True)
+    pages = Column(Integer, nullable=True)
+    size_bytes = Column(Integer, nullable=True)
+    refcount = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_used_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class FaxUpload(Base):  # type: ignore
+    """Resumable upload session; bytes accumulate in {FAX_DATA_DIR}/uploads/<id>.part until finalized."""
+    __tablename__ = "fax_uploads"
+    id = Column(String(40), primary_key=True, index=True)
+    key_id = Column(String(64), nullable=True)  # API key that opened the session (None when auth is off)
+    file_name = Column(String(255), nullable=False)
+    size_bytes = Column(Integer, nullable=True)  # declared total, when the client knows it
+    received_bytes = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, index=True, nullable=False)
+
+
+class FaxBroadcast(Base):  # type: ignore
+    """Mail-merge broadcast: a TXT template rendered once per recipient row into fax jobs."""
+    __tablename__ = "fax_broadcasts"
+    id = Column(String(40), primary_key=True, index=True)
+    key_id = Column(String(64), nullable=True)
+    status = Column(String(20), index=True, nullable=False, default="rendering")  # rendering | complete | failed
+    file_name = Column(String(255), nullable=False)  # template name, used as each job's file_name
+    to_field = Column(String(100), nullable=False, default="to")
+    template_path = Column(String(512), nullable=False)
+    data_path = Column(String(512), nullable=False)
+    data_format = Column(String(10), nullable=False)  # csv | json
+    cursor = Column(Integer, nullable=False, default=0)  # rows consumed (jobs created + rows rejected)
+    created_jobs = Column(Integer, nullable=False, default=0)
+    failed_rows = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)  # most recent row error
+    lease_owner = Column(String(64), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    priority = Column(String(16), nullable=True)  # dispatch lane for the broadcast's jobs
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
@@ -47,6 +121,37 @@ class APIKey(Base):  # type: ignore
     expires_at = Column(DateTime, nullable=True)
     revoked_at = Column(DateTime, nullable=True)
     note = Column(Text, nullable=True)
+    priority = Column(String(16), nullable=True)  # default dispatch lane for jobs sent with this key
+    dispatch_weight = Column(Integer, nullable=True)  # fair-queuing share (TENANT_DEFAULT_WEIGHT when NULL)
+    max_in_flight = Column(Integer, nullable=True)  # concurrent dispatches cap (TENANT_MAX_IN_FLIGHT when NULL; 0 = none)
+
+
+class WebhookSubscription(Base):  # type: ignore
+    """Customer endpoint that receives status changes of the jobs sent with one API key."""
+    __tablename__ = "webhook_subscriptions"
+    id = Column(String(40), primary_key=True, index=True)
+    key_id = Column(String(64), index=True, nullable=True)  # owning API key (None when auth is off)
+    url = Column(String(512), nullable=False)
+    secret = Column(String(128), nullable=False)  # HMAC-SHA256 signing key
+    events = Column(String(200), nullable=True)  # CSV of job statuses to send; empty = all
+    batch_size = Column(Integer, nullable=False, default=1)  # events per POST; 1 = one event object per request
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class WebhookDelivery(Base):  # type: ignore
+    """Outbox row: one event for one subscription, kept until delivered or out of attempts."""
+    __tablename__ = "webhook_deliveries"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    subscription_id = Column(String(40), index=True, nullable=False)
+    job_id = Column(String(40), nullable=False)
+    payload = Column(Text, nullable=False)  # event JSON
+    status = Column(String(16), index=True, nullable=False, default="pending")  # pending | delivered | failed
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, index=True, nullable=False)  # also the lease while a POST is in flight
+    claim = Column(String(32), index=True, nullable=True)  # delivery pass that holds the row
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    delivered_at = Column(DateTime, nullable=True)
 
 
 class InboundFax(Base):  # type: ignore
@@ -109,10 +214,61 @@ def _rebind_engine_if_needed() -> None:
         SessionLocal.configure(bind=engine)
 
 
+# Optional fax_jobs columns added after the initial schema: (name, sqlite type, generic type)
+_FAX_JOB_COLUMNS = [
+    ("lease_owner", "VARCHAR(64)", "VARCHAR(64)"),
+    ("lease_expires_at", "DATETIME", "TIMESTAMP"),
+    ("dispatched_at", "DATETIME", "TIMESTAMP"),
+    ("content_sha256", "VARCHAR(64)", "VARCHAR(64)"),
+    ("broadcast_id", "VARCHAR(40)", "VARCHAR(40)"),
+    ("send_at", "DATETIME", "TIMESTAMP"),
+    ("priority", "VARCHAR(16)", "VARCHAR(16)"),
+    ("key_id", "VARCHAR(64)", "VARCHAR(64)"),
+    ("attempts", "INTEGER", "INTEGER"),
+    ("attempt_log", "TEXT", "TEXT"),
+    ("pages_sent", "INTEGER", "INTEGER"),
+    ("ready_at", "DATETIME", "TIMESTAMP"),
+]
+
+# Optional columns on other tables, same shape
+_OPTIONAL_COLUMNS = {
+    "api_keys": [
+        ("priority", "VARCHAR(16)", "VARCHAR(16)"),
+        ("dispatch_weight", "INTEGER", "INTEGER"),
+        ("max_in_flight", "INTEGER", "INTEGER"),
+    ],
+    "fax_broadcasts": [
+        ("priority", "VARCHAR(16)", "VARCHAR(16)"),
+    ],
+}
+
+
 def init_db():
     _rebind_engine_if_needed()
     Base.metadata.create_all(engine)
     _ensure_optional_columns()
+    _ensure_indexes()
+
+
+def _ensure_indexes() -> None:
+    """create_all skips indexes of tables that already exist; add any that are missing.
+
+    Rows from before ``ready_at`` get it (and a lane) filled in first, so the index covers them.
+    """
+    try:
+        with engine.begin() as conn:
+            conn.exec_driver_sql("UPDATE fax_jobs SET ready_at = COALESCE(send_at, created_at) WHERE ready_at IS NULL")
+            conn.exec_driver_sql("UPDATE fax_jobs SET priority = 'normal' WHERE priority IS NULL")
+            # Superseded by ix_fax_jobs_tenant_head
+            conn.exec_driver_sql("DROP INDEX IF EXISTS ix_fax_jobs_dispatch_head")
+    except Exception:
+        pass
+    for index in FaxJob.__table__.indexes:
+        try:
+            index.create(engine, checkfirst=True)
+        except Exception:
+            # Best effort, like the column migration
+            pass
 
 
 def _ensure_optional_columns() -> None:
@@ -135,6 +291,18 @@ def _ensure_optional_columns() -> None:
                 if "outbound_backend" not in cols:
                     conn.exec_driver_sql("ALTER TABLE fax_jobs ADD COLUMN outbound_backend VARCHAR(20)")
                     conn.exec_driver_sql("UPDATE fax_jobs SET outbound_backend = backend WHERE outbound_backend IS NULL")
+                for name, sqlite_type, _ in _FAX_JOB_COLUMNS:
+                    if name not in cols:
+                        conn.exec_driver_sql(f"ALTER TABLE fax_jobs ADD COLUMN {name} {sqlite_type}")
+                        if name == "dispatched_at":
+                            # Rows created before the dispatch queue were already handed to BackgroundTasks
+                            conn.exec_driver_sql("UPDATE fax_jobs SET dispatched_at = updated_at WHERE dispatched_at IS NULL")
+
+                for table, columns in _OPTIONAL_COLUMNS.items():
+                    present = {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info('{table}')")}
+                    for name, sqlite_type, _ in columns:
+                        if name not in present:
+                            conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {name} {sqlite_type}")
 
                 inb_cols = set()
                 for row in conn.exec_driver_sql("PRAGMA table_info('inbound_faxes')"):
@@ -160,6 +328,27 @@ def _ensure_optional_columns() -> None:
                     conn.exec_driver_sql("UPDATE fax_jobs SET outbound_backend = backend WHERE outbound_backend IS NULL")
                 except Exception:
                     pass
+                existing = set()
+                try:
+                    for row in conn.exec_driver_sql("SELECT column_name FROM information_schema.columns WHERE table_name = 'fax_jobs'"):
+                        existing.add(row[0])
+                except Exception:
+                    pass
+                for name, _, generic_type in _FAX_JOB_COLUMNS:
+                    if name in existing:
+                        continue
+                    try:
+                        conn.exec_driver_sql(f"ALTER TABLE fax_jobs ADD COLUMN IF NOT EXISTS {name} {generic_type}")
+                        if name == "dispatched_at":
+                            conn.exec_driver_sql("UPDATE fax_jobs SET dispatched_at = updated_at WHERE dispatched_at IS NULL")
+                    except Exception:
+                        pass
+                for table, columns in _OPTIONAL_COLUMNS.items():
+                    for name, _, generic_type in columns:
+                        try:
+                            conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {name} {generic_type}")
+                        except Exception:
+                            pass
                 try:
                     conn.exec_driver_sql("ALTER TABLE inbound_faxes ADD COLUMN IF NOT EXISTS inbound_backend VARCHAR(20)")
                 except Exception:
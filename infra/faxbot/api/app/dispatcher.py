@@ -0,0 +1,391 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import and_, or_, select, update, func  # type: ignore
+
+from .config import settings
+from .db import SessionLocal, FaxJob
+from .audit import audit_event
+from .fairshare import tenant_scheduler, Head
+
+logger = logging.getLogger(__name__)
+
+DispatchHandler = Callable[[FaxJob], Awaitable[None]]
+
+# Priority lanes, highest first; jobs without a priority ride in the normal lane
+LANES = ("urgent", "normal", "bulk")
+DEFAULT_LANE = "normal"
+_DEFAULT_WEIGHTS = {"urgent": 8, "normal": 3, "bulk": 1}
+# Recent time-to-dispatch samples kept per lane for the wait percentiles
+WAIT_SAMPLES = 1000
+# How often the in-memory tenant lists are re-read, to pick up jobs queued by other processes
+TENANT_REFRESH_SECONDS = 2.0
+
+# Fair-queuing tenant: the submitting API key ("" without auth)
+_tenant = func.coalesce(FaxJob.key_id, "")
+
+
+def lane_weights() -> Dict[str, int]:
+    """DISPATCH_LANE_WEIGHTS (``urgent=8,normal=3,bulk=1``); unknown or bad entries are ignored."""
+    weights = dict(_DEFAULT_WEIGHTS)
+    for part in settings.dispatch_lane_weights.split(","):
+        name, _, value = part.partition("=")
+        name = name.strip().lower()
+        if name in weights:
+            try:
+                weights[name] = max(1, int(value))
+            except ValueError:
+                pass
+    return weights
+
+
+def _percentile(samples: Iterable[float], q: float) -> Optional[float]:
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+
+class JobDispatcher:
+    """
+    Durable outbound dispatch queue backed by the fax_jobs table.
+
+    A job is ready when it is ``queued``, has not been handed to a provider yet
+    (``dispatched_at`` is NULL), is not scheduled for later (``send_at``) and carries
+    no live lease. Workers claim a job with a
+    conditional UPDATE that sets ``lease_owner``/``lease_expires_at``; only one claimant
+    can win, so several API or worker processes may share the same database. If a
+    process dies mid-dispatch, its lease expires and the job becomes claimable again.
+
+    Ready jobs are split into priority lanes. Under the ``strict`` policy the highest
+    lane with work is always served first; under ``weighted`` (default) the lanes with
+    work share claims by smooth weighted round-robin, so bulk traffic still moves while
+    urgent jobs take most of the slots. Inside a lane, API keys are served by deficit
+    round-robin (see fairshare.py) so one tenant's backlog does not delay the others.
+    """
+
+    def __init__(self):
+        self.instance_id = f"{socket.gethostname()[:32]}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._handler: Optional[DispatchHandler] = None
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._active = 0
+        self._stats: Dict[str, int] = {"claimed": 0, "completed": 0, "errors": 0, "recovered": 0}
+        self._credit: Dict[str, int] = {lane: 0 for lane in LANES}
+        self._lane_claims: Dict[str, int] = {lane: 0 for lane in LANES}
+        self._waits: Dict[str, Deque[float]] = {lane: deque(maxlen=WAIT_SAMPLES) for lane in LANES}
+        # key_id values with (possibly) ready jobs, per lane; None is the unauthenticated tenant
+        self._tenants: Dict[str, Set[Optional[str]]] = {lane: set() for lane in LANES}
+        self._tenants_read = 0.0
+
+    # ----- queue primitives (synchronous DB access, like the rest of the API) -----
+
+    @staticmethod
+    def _ready(now: datetime):
+        return and_(
+            FaxJob.status == "queued",
+            FaxJob.dispatched_at.is_(None),
+            FaxJob.ready_at <= now,
+            or_(FaxJob.lease_expires_at.is_(None), FaxJob.lease_expires_at < now),
+        )
+
+    def track(self, lane: Optional[str], key_id: Optional[str]) -> None:
+        """Note that ``key_id`` has work in ``lane`` (call when enqueueing a job)."""
+        self._tenants.get(lane or DEFAULT_LANE, self._tenants[DEFAULT_LANE]).add(key_id)
+
+    def _refresh_tenants(self, db: Any, now: datetime) -> None:
+        """Re-read which tenants have ready work in each lane, replacing the in-memory lists."""
+        tenants: Dict[str, Set[Optional[str]]] = {lane: set() for lane in LANES}
+        for lane, key_id in db.execute(select(FaxJob.priority, FaxJob.key_id).where(self._ready(now)).distinct()):
+            tenants.get(lane, tenants[DEFAULT_LANE]).add(key_id)
+        self._tenants = tenants
+        self._tenants_read = time.monotonic()
+
+    def _lane_order(self, ready: Iterable[str]) -> List[str]:
+        """Order in which to try the lanes that currently have ready jobs."""
+        present = set(ready)
+        lanes = [lane for lane in LANES if lane in present]
+        if settings.dispatch_lane_policy == "strict" or len(lanes) < 2:
+            return lanes
+        # Smooth weighted round-robin (as in nginx): every lane with work earns its weight,
+        # the richest is served and pays back the total
+        weights = lane_weights()
+        for lane in lanes:
+            self._credit[lane] += weights[lane]
+        first = max(lanes, key=lambda lane: self._credit[lane])
+        self._credit[first] -= sum(weights[lane] for lane in lanes)
+        return [first] + [lane for lane in lanes if lane != first]
+
+    def _tenant_head(self, db: Any, lane: str, key_id: Optional[str], now: datetime) -> Optional[Head]:
+        """``key_id``'s longest-waiting ready job in ``lane`` with its cost in pages, if any.
+
+        Equality on status, key_id and priority plus the ``ready_at`` range walk
+        ix_fax_jobs_tenant_head in order, so this reads one index entry, not the backlog.
+        """
+        owner = FaxJob.key_id.is_(None) if key_id is None else FaxJob.key_id == key_id
+        row = db.execute(
+            select(FaxJob.id, FaxJob.pages)
+            .where(self._ready(now), owner, FaxJob.priority == lane)
+            .order_by(FaxJob.ready_at, FaxJob.id)
+            .limit(1)
+        ).first()
+        return (row[0], max(1, int(row[1] or 1))) if row is not None else None
+
+    def _lane_heads(self, db: Any, lane: str, now: datetime) -> Dict[str, Head]:
+        """Each tracked tenant's head in ``lane``, keyed by fair-queuing tenant; tenants with
+        nothing ready are forgotten until they enqueue again or the next refresh."""
+        heads: Dict[str, Head] = {}
+        for key_id in list(self._tenants[lane]):
+            head = self._tenant_head(db, lane, key_id, now)
+            if head is None:
+                self._tenants[lane].discard(key_id)
+            else:
+                heads[key_id or ""] = head
+        return heads
+
+    @staticmethod
+    def _in_flight(db: Any, now: datetime) -> Dict[str, int]:
+        rows = db.execute(
+            select(_tenant, func.count(FaxJob.id))
+            .where(FaxJob.dispatched_at.is_(None), FaxJob.lease_expires_at >= now)
+            .group_by(_tenant)
+        ).all()
+        return {tenant: int(count) for tenant, count in rows}
+
+    def claim_next(self, worker_id: str, batch: int = 5) -> Optional[FaxJob]:
+        """Claim the next job for ``worker_id``: lane by priority policy, tenant by deficit
+        round-robin, then that tenant's longest-waiting job. Returns None when nothing is ready.
+
+        Scheduled jobs wait from their ``send_at``, not from when they were submitted.
+        """
+        now = datetime.utcnow()
+        lease_until = now + timedelta(seconds=max(1, settings.dispatch_lease_seconds))
+        with SessionLocal() as db:
+            stale = time.monotonic() - self._tenants_read >= TENANT_REFRESH_SECONDS
+            if stale:
+                self._refresh_tenants(db, now)
+            job = self._claim(db, worker_id, batch, now, lease_until)
+            if job is None and not stale:
+                # Nothing ready among the known tenants; another process may have queued work
+                self._refresh_tenants(db, now)
+                job = self._claim(db, worker_id, batch, now, lease_until)
+            return job
+
+    def _claim(
+        self, db: Any, worker_id: str, batch: int, now: datetime, lease_until: datetime
+    ) -> Optional[FaxJob]:
+        for lane in self._lane_order(lane for lane in LANES if self._tenants[lane]):
+            heads = self._lane_heads(db, lane, now)
+            # A lost race (another process claimed the head) re-reads only that tenant's head
+            for _ in range(batch):
+                if not heads:
+                    break
+                capped = any(cap > 0 for _, cap in tenant_scheduler.limits(heads).values())
+                choice = tenant_scheduler.pick(lane, heads, self._in_flight(db, now) if capped else {})
+                if choice is None:
+                    break
+                tenant, (job_id, cost) = choice
+                res = db.execute(
+                    update(FaxJob)
+                    .where(FaxJob.id == job_id, self._ready(now))
+                    .values(lease_owner=worker_id, lease_expires_at=lease_until)
+                    .execution_options(synchronize_session=False)
+                )
+                db.commit()
+                if res.rowcount == 1:
+                    tenant_scheduler.charge(lane, tenant, cost)
+                    job = db.get(FaxJob, job_id)
+                    self._stats["claimed"] += 1
+                    self._lane_claims[lane] += 1
+                    j: Any = job
+                    self._waits[lane].append(max(0.0, (now - j.ready_at).total_seconds()))
+                    return job
+                head = self._tenant_head(db, lane, tenant or None, now)
+                if head is None:
+                    heads.pop(tenant, None)
+                else:
+                    heads[tenant] = head
+        return None
+
+    def release(self, job_id: str, worker_id: str) -> None:
+        """Drop the lease and mark the job as handed off, whatever the dispatch outcome."""
+        now = datetime.utcnow()
+        with SessionLocal() as db:
+            db.execute(
+                update(FaxJob)
+                .where(FaxJob.id == job_id, FaxJob.lease_owner == worker_id)
+                .values(lease_owner=None, lease_expires_at=None, dispatched_at=func.coalesce(FaxJob.dispatched_at, now))
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+
+    def unlease(self, job_id: str, worker_id: str) -> None:
+        """Give a claimed job back to the queue without marking it dispatched."""
+        with SessionLocal() as db:
+            db.execute(
+                update(FaxJob)
+                .where(FaxJob.id == job_id, FaxJob.lease_owner == worker_id)
+                .values(lease_owner=None, lease_expires_at=None)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+
+    def recover(self) -> int:
+        """Startup recovery: clear stale leases and report jobs waiting for dispatch.
+
+        Jobs that were queued (or leased by a process that is gone) when the API last
+        stopped are picked up again by the worker pool.
+        """
+        now = datetime.utcnow()
+        with SessionLocal() as db:
+            db.execute(
+                update(FaxJob)
+                .where(FaxJob.dispatched_at.is_(None), FaxJob.lease_expires_at < now)
+                .values(lease_owner=None, lease_expires_at=None)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            pending = db.query(FaxJob).filter(FaxJob.status == "queued", FaxJob.dispatched_at.is_(None)).count()
+        if pending:
+            self._stats["recovered"] += pending
+            audit_event("dispatch_recovered", jobs=pending, instance=self.instance_id)
+        return pending
+
+    def queue_depth(self) -> Dict[str, int]:
+        now = datetime.utcnow()
+        with SessionLocal() as db:
+            ready = db.query(FaxJob).filter(self._ready(now)).count()
+            leased = db.query(FaxJob).filter(
+                FaxJob.dispatched_at.is_(None), FaxJob.lease_expires_at >= now
+            ).count()
+            scheduled = db.query(FaxJob).filter(
+                FaxJob.status == "queued", FaxJob.dispatched_at.is_(None), FaxJob.send_at > now
+            ).count()
+        return {"ready": ready, "leased": leased, "scheduled": scheduled}
+
+    def lane_depth(self) -> Dict[str, Dict[str, Any]]:
+        """Per lane: ready jobs and how long the oldest of them has been waiting."""
+        now = datetime.utcnow()
+        out: Dict[str, Dict[str, Any]] = {lane: {"ready": 0, "oldest_wait_seconds": None} for lane in LANES}
+        with SessionLocal() as db:
+            rows = db.execute(
+                select(FaxJob.priority, func.count(FaxJob.id), func.min(FaxJob.ready_at))
+                .where(self._ready(now)).group_by(FaxJob.priority)
+            ).all()
+        for lane, count, oldest in rows:
+            if lane in out:
+                out[lane] = {"ready": int(count), "oldest_wait_seconds": round(max(0.0, (now - oldest).total_seconds()), 3)}
+        return out
+
+    def tenant_depth(self, limit: int = 50) -> Dict[str, Dict[str, int]]:
+        """Ready and in-flight jobs for the tenants with the deepest backlog."""
+        now = datetime.utcnow()
+        with SessionLocal() as db:
+            rows = db.execute(
+                select(_tenant, func.count(FaxJob.id)).where(self._ready(now))
+                .group_by(_tenant).order_by(func.count(FaxJob.id).desc()).limit(limit)
+            ).all()
+            in_flight = self._in_flight(db, now)
+        limits = tenant_scheduler.limits([t for t, _ in rows])
+        return {
+            (tenant or "(none)"): {
+                "ready": int(count),
+                "in_flight": in_flight.get(tenant, 0),
+                "weight": limits[tenant][0],
+                "max_in_flight": limits[tenant][1],
+            }
+            for tenant, count in rows
+        }
+
+    # ----- worker pool -----
+
+    def notify(self) -> None:
+        """Wake idle workers after a job was enqueued (call from the event loop)."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self, handler: DispatchHandler, workers: Optional[int] = None) -> None:
+        count = settings.dispatch_workers if workers is None else workers
+        if self._tasks or count <= 0:
+            return
+        self._handler = handler
+        self._wakeup = asyncio.Event()
+        for i in range(count):
+            worker_id = f"{self.instance_id}/{i}"
+            self._tasks.append(asyncio.create_task(self._worker(worker_id)))
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for t in tasks:
+            t.cancel()
+        for t in tasks:
+            try:
+                await t
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._wakeup = None
+
+    def stats(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = dict(self._stats)
+        out.update({"instance": self.instance_id, "workers": len(self._tasks), "active": self._active})
+        weights = lane_weights()
+        out["lane_policy"] = settings.dispatch_lane_policy
+        out["lanes"] = {
+            lane: {
+                "weight": weights[lane],
+                "claimed": self._lane_claims[lane],
+                "wait_p50_seconds": _percentile(self._waits[lane], 0.5),
+                "wait_p99_seconds": _percentile(self._waits[lane], 0.99),
+            }
+            for lane in LANES
+        }
+        out["tenants"] = tenant_scheduler.stats()
+        return out
+
+    async def _idle_wait(self) -> None:
+        assert self._wakeup is not None
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.05, settings.dispatch_poll_seconds))
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _worker(self, worker_id: str) -> None:
+        while True:
+            try:
+                job = self.claim_next(worker_id)
+            except Exception as e:
+                logger.error(f"Dispatch claim failed: {e}")
+                job = None
+            if job is None:
+                await self._idle_wait()
+                continue
+            job_id = str(job.id)
+            self._active += 1
+            try:
+                assert self._handler is not None
+                await self._handler(job)
+                self._stats["completed"] += 1
+            except asyncio.CancelledError:
+                # Shutting down mid-dispatch: hand the job back instead of marking it dispatched
+                self.unlease(job_id, worker_id)
+                raise
+            except Exception as e:
+                self._stats["errors"] += 1
+                logger.error(f"Dispatch handler error for job {job_id}: {e}")
+            finally:
+                self._active -= 1
+            try:
+                self.release(job_id, worker_id)
+            except Exception as e:
+                logger.error(f"Dispatch release failed for job {job_id}: {e}")
+
+
+job_dispatcher = JobDispatcher()
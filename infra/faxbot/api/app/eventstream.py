@@ -0,0 +1,148 @@
+"""Live job status streams for dashboards: ``GET /fax/events`` (SSE) and ``/fax/events/ws``.
+
+Streams are fed from jobevents.py. Each published change is fanned out in memory to the
+connected subscribers whose API key sent the job (keys with ``keys:manage`` see every
+job), so a hundred open dashboards cost no more database work than one. The last
+``REPLAY_EVENTS`` events are kept for resumption: a client that reconnects with
+``Last-Event-ID`` receives what it missed. Event ids are ``<epoch>-<seq>`` with an epoch
+per process start; an id from another epoch, or older than the replay buffer, gets a
+``reset`` event telling the client to reload state with ``GET /fax/{id}``. A subscriber
+that falls ``QUEUE_SIZE`` events behind is disconnected and resumes the same way.
+"""
+import asyncio
+import json
+import logging
+import uuid
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Sequence, Set, Tuple
+
+from .jobevents import job_events
+
+logger = logging.getLogger(__name__)
+
+# Events kept for Last-Event-ID resumption
+REPLAY_EVENTS = 10000
+# Events a subscriber may fall behind before it is dropped
+QUEUE_SIZE = 1000
+# Seconds of silence before a keep-alive is sent
+KEEPALIVE_SECONDS = 15.0
+
+
+class Subscriber:
+    def __init__(self, key_id: Optional[str], see_all: bool, job_ids: Optional[Sequence[str]] = None):
+        self.key_id = key_id
+        self.see_all = see_all
+        self.job_ids = set(job_ids) if job_ids else None
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.overflowed = False
+
+    def wants(self, event: Dict[str, Any]) -> bool:
+        if self.job_ids is not None and event["job_id"] not in self.job_ids:
+            return False
+        return self.see_all or event.get("key_id") == self.key_id
+
+
+class EventStream:
+    def __init__(self):
+        self.epoch = uuid.uuid4().hex[:8]
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=REPLAY_EVENTS)
+        self._subs: Set[Subscriber] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stats: Dict[str, int] = {"events": 0, "resumed": 0, "resets": 0, "dropped": 0}
+
+    def event_id(self, event: Dict[str, Any]) -> str:
+        return f"{self.epoch}-{event['id']}"
+
+    def public(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """Event as sent to clients: stream id, no API key."""
+        out = {k: v for k, v in event.items() if k != "key_id"}
+        out["id"] = self.event_id(event)
+        return out
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        job_events.subscribe(self._on_events)
+
+    def stop(self) -> None:
+        job_events.unsubscribe(self._on_events)
+        self._loop = None
+
+    def _on_events(self, events: List[Dict[str, Any]]) -> None:
+        # Publishers may run in worker threads; subscribers live on the event loop
+        loop = self._loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self._fanout, events)
+            except RuntimeError:
+                pass
+
+    def _fanout(self, events: List[Dict[str, Any]]) -> None:
+        for event in events:
+            self._recent.append(event)
+            self._stats["events"] += 1
+            for sub in list(self._subs):
+                if not sub.wants(event):
+                    continue
+                try:
+                    sub.queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    sub.overflowed = True
+                    self._subs.discard(sub)
+                    self._stats["dropped"] += 1
+
+    def subscribe(self, key_id: Optional[str], see_all: bool, job_ids: Optional[Sequence[str]] = None,
+                  last_event_id: Optional[str] = None) -> Tuple[Subscriber, List[Dict[str, Any]], bool]:
+        """Register a subscriber. Returns (subscriber, events to replay, reset needed)."""
+        sub = Subscriber(key_id, see_all, job_ids)
+        replay: List[Dict[str, Any]] = []
+        reset = False
+        if last_event_id:
+            epoch, _, seq = last_event_id.strip().partition("-")
+            if epoch != self.epoch or not seq.isdigit():
+                reset = True
+            else:
+                after = int(seq)
+                if self._recent and after < self._recent[0]["id"] - 1:
+                    reset = True
+                replay = [e for e in self._recent if e["id"] > after and sub.wants(e)]
+            self._stats["resets" if reset else "resumed"] += 1
+        self._subs.add(sub)
+        return sub, replay, reset
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        self._subs.discard(sub)
+
+    async def follow(self, sub: Subscriber) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Yield the subscriber's events; None after KEEPALIVE_SECONDS of silence. Ends on overflow."""
+        while True:
+            try:
+                event = await asyncio.wait_for(sub.queue.get(), timeout=KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            yield event
+            if sub.overflowed and sub.queue.empty():
+                return
+
+    def sse(self, event: Dict[str, Any]) -> str:
+        return f"id: {self.event_id(event)}\nevent: {event['type']}\ndata: {json.dumps(self.public(event))}\n\n"
+
+    async def sse_stream(self, sub: Subscriber, replay: List[Dict[str, Any]], reset: bool) -> AsyncIterator[str]:
+        try:
+            yield "retry: 3000\n\n"
+            if reset:
+                yield f"event: reset\ndata: {json.dumps({'type': 'reset'})}\n\n"
+            for event in replay:
+                yield self.sse(event)
+            async for event in self.follow(sub):
+                yield self.sse(event) if event is not None else ": keep-alive\n\n"
+        finally:
+            self.unsubscribe(sub)
+
+    def stats(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = dict(self._stats)
+        out.update({"epoch": self.epoch, "subscribers": len(self._subs), "buffered": len(self._recent)})
+        return out
+
+
+event_stream = EventStream()
@@ -0,0 +1,108 @@
+"""Per-tenant fair queuing for outbound dispatch (deficit round-robin).
+
+Within a priority lane, tenants (the API ``key_id`` that submitted a job; jobs sent
+without a key share the ``""`` tenant) take turns. Each turn a tenant earns a quantum
+of ``weight * TENANT_QUANTUM_PAGES`` and sends head-of-line jobs while its deficit
+covers their page count, so a tenant with 20k queued jobs gets its share of the
+workers, not all of them, and large documents count for more than one-pagers. A tenant
+whose queue empties leaves the round and forfeits its credit. Tenants at their
+``max_in_flight`` (jobs leased and not yet handed to a provider, across all processes)
+are skipped until a slot frees.
+
+Weights and in-flight caps come from the ``api_keys`` row (``dispatch_weight``,
+``max_in_flight``), falling back to ``TENANT_DEFAULT_WEIGHT`` and
+``TENANT_MAX_IN_FLIGHT``. Round state is per process, like the lane credits.
+"""
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .config import settings
+from .db import SessionLocal, APIKey
+
+# Seconds a key's weight/cap is cached before re-reading api_keys
+SETTINGS_TTL = 10.0
+
+# (job id, cost in pages) of a tenant's oldest ready job
+Head = Tuple[str, int]
+
+
+class TenantScheduler:
+    def __init__(self):
+        self._rings: Dict[str, List[str]] = {}
+        self._deficits: Dict[str, Dict[str, float]] = {}
+        self._credited: Dict[str, Optional[str]] = {}
+        self._limits: Dict[str, Tuple[float, int, int]] = {}
+        self._claims: Dict[str, int] = {}
+
+    def limits(self, tenants: Iterable[str]) -> Dict[str, Tuple[int, int]]:
+        """tenant → (weight, max in-flight; 0 = unlimited)."""
+        now = time.monotonic()
+        stale = [t for t in tenants if t not in self._limits or self._limits[t][0] < now]
+        if stale:
+            rows: Dict[str, Any] = {}
+            keyed = [t for t in stale if t]
+            if keyed:
+                with SessionLocal() as db:
+                    for rec in db.query(APIKey).filter(APIKey.key_id.in_(keyed)).all():
+                        rows[str(rec.key_id)] = rec
+            for t in stale:
+                rec = rows.get(t)
+                weight = getattr(rec, "dispatch_weight", None) or settings.tenant_default_weight
+                cap = getattr(rec, "max_in_flight", None)
+                if cap is None:
+                    cap = settings.tenant_max_in_flight
+                self._limits[t] = (now + SETTINGS_TTL, max(1, int(weight)), max(0, int(cap)))
+        return {t: self._limits[t][1:] for t in tenants}
+
+    def forget(self, key_id: str) -> None:
+        """Drop cached settings for a key (after an admin change)."""
+        self._limits.pop(key_id, None)
+
+    def pick(self, lane: str, heads: Dict[str, Head], in_flight: Dict[str, int]) -> Optional[Tuple[str, Head]]:
+        """Choose the tenant whose head-of-line job is served next in ``lane``.
+
+        ``heads`` holds every tenant with ready work in the lane. Returns None when all of
+        them are at their in-flight cap.
+        """
+        ring = self._rings.setdefault(lane, [])
+        deficit = self._deficits.setdefault(lane, {})
+        for t in [t for t in ring if t not in heads]:
+            ring.remove(t)
+            deficit.pop(t, None)
+            if self._credited.get(lane) == t:
+                self._credited[lane] = None
+        for t in sorted(heads):
+            if t not in deficit:
+                ring.append(t)
+                deficit[t] = 0.0
+        limits = self.limits(heads)
+        eligible = {t for t in heads if limits[t][1] <= 0 or in_flight.get(t, 0) < limits[t][1]}
+        if not eligible:
+            return None
+        quantum = max(1, settings.tenant_quantum_pages)
+        # Terminates: each pass over the ring credits every eligible tenant a positive quantum
+        while True:
+            t = ring[0]
+            if t in eligible:
+                if self._credited.get(lane) != t:
+                    deficit[t] += limits[t][0] * quantum
+                    self._credited[lane] = t
+                if deficit[t] >= heads[t][1]:
+                    return t, heads[t]
+            ring.append(ring.pop(0))
+            self._credited[lane] = None
+
+    def charge(self, lane: str, tenant: str, cost: int) -> None:
+        """Debit a claimed job; the tenant keeps its turn while credit remains."""
+        deficit = self._deficits.setdefault(lane, {})
+        deficit[tenant] = deficit.get(tenant, 0.0) - cost
+        self._claims[tenant] = self._claims.get(tenant, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "quantum_pages": settings.tenant_quantum_pages,
+            "claims": dict(sorted(self._claims.items(), key=lambda kv: -kv[1])[:50]),
+        }
+
+
+tenant_scheduler = TenantScheduler()
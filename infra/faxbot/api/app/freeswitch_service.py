@@ -11,8 +11,9 @@ def fs_cli_available() -> bool:
     return shutil.which("fs_cli") is not None
 
 
-def originate_txfax(to_number: str, tiff_path: str, job_id: str) -> str:
+def originate_txfax(to_number: str, tiff_path: str, job_id: str, header: Optional[str] = None) -> str:
     """Originate a fax call via FreeSWITCH &txfax using fs_cli.
+    ``header`` sets the transmitted fax header for this call.
     Returns fs_cli output (may include UUID). Raises on failure.
     """
     if not fs_cli_available():
@@ -22,6 +23,8 @@ def originate_txfax(to_number: str, tiff_path: str, job_id: str) -> str:
         f"origination_caller_id_number={settings.fs_caller_id_number}",
         f"faxbot_job_id={job_id}",
     ]
+    if header:
+        vars_list.append(f"fax_header='{header}'")
     if settings.fs_t38_enable:
         vars_list += ["fax_enable_t38_request=true", "fax_enable_t38=true"]
     var_str = ",".join(vars_list)
@@ -0,0 +1,182 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, Optional
+
+from .config import get_provider_limits
+
+# When the current task was first granted a slot since time_request(); None until then
+_request_started: ContextVar[Optional[float]] = ContextVar("governor_request_started", default=None)
+
+
+class _ProviderLane:
+    """Token bucket (requests/sec with burst) plus an in-flight cap for one provider.
+
+    Callers that are over either limit wait in FIFO order instead of hitting the
+    provider; ``waiting`` is the resulting per-provider queue depth.
+    """
+
+    def __init__(self, limits: Dict[str, Any]):
+        self.limits: Dict[str, Any] = {}
+        self.in_flight = 0
+        self.waiting = 0
+        self.granted = 0
+        self.throttled = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots: Optional[asyncio.Condition] = None
+        self._token_lock: Optional[asyncio.Lock] = None
+        self._tokens = 0.0
+        self._stamp = time.monotonic()
+        self._blocked_until = 0.0
+        self.configure(limits)
+
+    def configure(self, limits: Dict[str, Any]) -> None:
+        if limits == self.limits:
+            return
+        self.limits = dict(limits)
+        self._tokens = float(self.burst)
+        self._stamp = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        return float(self.limits.get("requests_per_second") or 0)
+
+    @property
+    def burst(self) -> int:
+        return max(1, int(self.limits.get("burst") or max(1, int(self.rate))))
+
+    @property
+    def max_in_flight(self) -> int:
+        return int(self.limits.get("max_in_flight") or 0)
+
+    def _bind(self) -> None:
+        # asyncio primitives belong to one loop; rebuild them if the loop changed (tests, reloads)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._slots = asyncio.Condition()
+            self._token_lock = asyncio.Lock()
+            self.in_flight = 0
+            self.waiting = 0
+
+    def _slot_free(self) -> bool:
+        return self.max_in_flight <= 0 or self.in_flight < self.max_in_flight
+
+    async def acquire(self) -> None:
+        self._bind()
+        assert self._slots is not None and self._token_lock is not None
+        self.waiting += 1
+        try:
+            async with self._slots:
+                await self._slots.wait_for(self._slot_free)
+                self.in_flight += 1
+            try:
+                async with self._token_lock:
+                    await self._take_token()
+            except BaseException:
+                await self.release()
+                raise
+        finally:
+            self.waiting -= 1
+        self.granted += 1
+
+    async def _take_token(self) -> None:
+        while True:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                await asyncio.sleep(self._blocked_until - now)
+                continue
+            if self.rate <= 0:
+                return
+            self._tokens = min(float(self.burst), self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return
+            await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+    async def release(self) -> None:
+        if self._slots is None:
+            return
+        async with self._slots:
+            self.in_flight = max(0, self.in_flight - 1)
+            self._slots.notify()
+
+    def backoff(self, seconds: float) -> None:
+        """Provider said slow down (HTTP 429): pause new grants and drain the bucket."""
+        self.throttled += 1
+        self._tokens = 0.0
+        self._blocked_until = max(self._blocked_until, time.monotonic() + max(0.0, seconds))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "requests_per_second": self.rate,
+            "burst": self.burst,
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "granted": self.granted,
+            "throttled": self.throttled,
+        }
+
+
+class ProviderGovernor:
+    """Per-provider outbound throughput governor.
+
+    Limits come from the ``limits`` block of each provider in ``provider_traits.json``
+    (or a plugin manifest) and are looked up on every acquire, so changes apply whenever
+    the traits registry is refreshed. Providers without limits pass straight through but
+    are still counted.
+    """
+
+    def __init__(self):
+        self._lanes: Dict[str, _ProviderLane] = {}
+
+    def _lane(self, provider: str) -> _ProviderLane:
+        pid = (provider or "").lower()
+        limits = get_provider_limits(pid)
+        lane = self._lanes.get(pid)
+        if lane is None:
+            lane = self._lanes[pid] = _ProviderLane(limits)
+        else:
+            lane.configure(limits)
+        return lane
+
+    @asynccontextmanager
+    async def slot(self, provider: str) -> AsyncIterator[None]:
+        """Hold one provider request slot for the duration of an outbound API call."""
+        lane = self._lane(provider)
+        await lane.acquire()
+        if _request_started.get() is None:
+            _request_started.set(time.monotonic())
+        try:
+            yield
+        finally:
+            await lane.release()
+
+    @staticmethod
+    def time_request() -> None:
+        """Start timing the current task's next provider request (see request_started)."""
+        _request_started.set(None)
+
+    @staticmethod
+    def request_started() -> Optional[float]:
+        """Monotonic time the request was let through, excluding time queued for a slot."""
+        return _request_started.get()
+
+    def backoff(self, provider: str, retry_after: Optional[str] = None, default: float = 1.0) -> None:
+        try:
+            seconds = float(retry_after) if retry_after else default
+        except ValueError:
+            seconds = default
+        self._lane(provider).backoff(min(seconds, 60.0))
+
+    def queue_depth(self) -> Dict[str, int]:
+        return {pid: lane.waiting for pid, lane in self._lanes.items()}
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {pid: lane.snapshot() for pid, lane in self._lanes.items()}
+
+
+provider_governor = ProviderGovernor()
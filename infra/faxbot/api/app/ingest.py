@@ -0,0 +1,108 @@
+"""Upload ingestion: stream a request body to disk without blocking the event loop.
+
+Chunks are coalesced into ``WRITE_BUFFER`` sized writes; each write and its SHA-256
+update run on a worker thread (hashlib releases the GIL for large buffers), so the
+loop only shuffles bytes between the socket and the buffer. The first ``SNIFF_BYTES``
+are kept for type detection. Callers then rename the file into its artifact location.
+"""
+import asyncio
+import hashlib
+import os
+from typing import Any, AsyncIterator, Optional, Tuple
+
+SNIFF_BYTES = 64 * 1024
+WRITE_BUFFER = 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+def _write(out: Any, hasher: Any, data: bytes) -> None:
+    out.write(data)
+    if hasher is not None:
+        hasher.update(data)
+
+
+async def _pump(chunks: AsyncIterator[bytes], out: Any, hasher: Any, max_bytes: int) -> Tuple[int, bytes]:
+    total = 0
+    head = b""
+    buf = bytearray()
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        total += len(chunk)
+        if total > max_bytes:
+            raise UploadTooLarge(total)
+        if len(head) < SNIFF_BYTES:
+            head += chunk[:SNIFF_BYTES - len(head)]
+        buf += chunk
+        if len(buf) >= WRITE_BUFFER:
+            data, buf = bytes(buf), bytearray()
+            await asyncio.to_thread(_write, out, hasher, data)
+    if buf:
+        await asyncio.to_thread(_write, out, hasher, bytes(buf))
+    return total, head
+
+
+async def receive(chunks: AsyncIterator[bytes], dest_path: str, max_bytes: int) -> Tuple[int, str, bytes]:
+    """Write ``chunks`` to ``dest_path``. Returns (size, sha256 hex, leading bytes).
+
+    Raises UploadTooLarge past ``max_bytes``; on any error the partial file is removed.
+    """
+    hasher = hashlib.sha256()
+    out = await asyncio.to_thread(open, dest_path, "wb")
+    try:
+        total, head = await _pump(chunks, out, hasher, max_bytes)
+        await asyncio.to_thread(out.close)
+    except BaseException:
+        out.close()
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        raise
+    return total, hasher.hexdigest(), head
+
+
+def _open_at(path: str, offset: Optional[int]) -> Any:
+    if offset is None:
+        return open(path, "ab")
+    out = open(path, "r+b")
+    out.seek(offset)
+    return out
+
+
+async def append(chunks: AsyncIterator[bytes], path: str, max_bytes: int, hasher: Any = None,
+                 offset: Optional[int] = None) -> int:
+    """Append ``chunks`` to ``path``, at ``offset`` if given (updating ``hasher`` if given).
+
+    Returns bytes written. The caller owns recovery: on error the file may hold a partial chunk.
+    """
+    out = await asyncio.to_thread(_open_at, path, offset)
+    try:
+        total, _ = await _pump(chunks, out, hasher, max_bytes)
+    finally:
+        out.close()
+    return total
+
+
+async def upload_chunks(file: Any, size: int = WRITE_BUFFER) -> AsyncIterator[bytes]:
+    """Iterate a Starlette ``UploadFile`` (spooled reads already run in a threadpool)."""
+    while True:
+        chunk = await file.read(size)
+        if not chunk:
+            break
+        yield chunk
+
+
+def sniff(head: bytes) -> Optional[str]:
+    """'pdf' for a PDF header, 'txt' for UTF-8 text, else None."""
+    if head.startswith(b"%PDF"):
+        return "pdf"
+    try:
+        head.decode("utf-8")
+        return "txt"
+    except UnicodeDecodeError as e:
+        # The sniff window may end inside a multi-byte character
+        if e.reason == "unexpected end of data" and len(head) >= SNIFF_BYTES:
+            return "txt"
+        return None
@@ -0,0 +1,79 @@
+"""In-process fan-out of job status changes.
+
+The writers that change a job's status (transitions in jobstate.py, the callback sink,
+the poller and reconciliation) publish each change here after it is committed, tagged
+with the job's API key. Listeners receive every published batch in the publishing
+thread, which may be a worker thread, so they must only hand it off (append to a
+buffer, wake a task). Repeated reports of the status a job already has are dropped.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List
+
+logger = logging.getLogger(__name__)
+
+# Jobs whose last published status is remembered to drop repeats
+RECENT_JOBS = 10000
+
+Listener = Callable[[List[Dict[str, Any]]], None]
+
+
+class JobEvents:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._last: "OrderedDict[str, str]" = OrderedDict()
+        self._listeners: List[Listener] = []
+
+    @property
+    def active(self) -> bool:
+        """Whether anyone listens; writers skip the extra work of building events otherwise."""
+        return bool(self._listeners)
+
+    def subscribe(self, listener: Listener) -> None:
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Listener) -> None:
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def publish(self, changes: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Publish ``{job_id, key_id, status, pages?, error?}`` changes. Returns the events sent."""
+        at = datetime.utcnow().isoformat()
+        events: List[Dict[str, Any]] = []
+        with self._lock:
+            for change in changes:
+                job_id, status = str(change["job_id"]), str(change.get("status") or "")
+                if not status or self._last.get(job_id) == status:
+                    continue
+                self._last[job_id] = status
+                self._last.move_to_end(job_id)
+                if len(self._last) > RECENT_JOBS:
+                    self._last.popitem(last=False)
+                self._seq += 1
+                events.append({
+                    "id": self._seq,
+                    "type": "job.status",
+                    "job_id": job_id,
+                    "key_id": change.get("key_id"),
+                    "status": status,
+                    "pages": change.get("pages"),
+                    "error": change.get("error"),
+                    "at": at,
+                })
+            listeners = list(self._listeners)
+        if events:
+            for listener in listeners:
+                try:
+                    listener(events)
+                except Exception as e:
+                    logger.error(f"Job event listener failed: {e}")
+        return events
+
+
+job_events = JobEvents()
@@ -0,0 +1,110 @@
+"""Job state machine: which statuses may replace which, applied as single-statement updates.
+
+A job is ``queued`` until a worker hands it to a backend, ``in_progress`` while the
+provider or line works on it, and ends ``SUCCESS``, ``FAILED`` (reported by the
+provider) or ``failed`` (retries exhausted). A retry moves it back to ``queued``. A
+late SUCCESS may still correct a failure, but nothing reopens a delivered fax.
+
+Every change is one conditional ``UPDATE fax_jobs ... WHERE id = :id AND status IN
+(...)`` with ``RETURNING`` where the database supports it, instead of a session that
+loads the row, edits it and commits. Two writers racing on a job (a send finishing
+while its callback arrives) therefore cannot undo each other's status. Each change is
+published to jobevents.py once committed.
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+from sqlalchemy import case, select, update  # type: ignore
+
+from .db import SessionLocal, FaxJob
+from .jobevents import job_events
+
+QUEUED, IN_PROGRESS = "queued", "in_progress"
+FINAL = ("SUCCESS", "FAILED", "failed", "disabled")
+ACTIVE = (QUEUED, IN_PROGRESS)
+
+# Target status → statuses it may replace
+SOURCES: Dict[str, Tuple[str, ...]] = {
+    QUEUED: ACTIVE,
+    IN_PROGRESS: ACTIVE,
+    "SUCCESS": ACTIVE + ("FAILED", "failed"),
+    "FAILED": ACTIVE,
+    "failed": ACTIVE,
+}
+
+
+def sources(to: str) -> Tuple[str, ...]:
+    """Statuses a job may be in to move to ``to``; unknown targets only follow active ones."""
+    return SOURCES.get(to, ACTIVE)
+
+
+def can(current: Optional[str], to: str) -> bool:
+    return str(current or "") in sources(to)
+
+
+def _execute(stmt: Any, columns: Sequence[Any], job_id: str) -> Optional[Tuple[Any, ...]]:
+    with SessionLocal() as db:
+        if db.get_bind().dialect.update_returning:
+            row = db.execute(stmt.returning(*columns)).first()
+        else:
+            # No RETURNING (e.g. SQLite before 3.35): re-read the row after a hit
+            row = None
+            if db.execute(stmt).rowcount == 1:
+                row = db.execute(select(*columns).where(FaxJob.__table__.c.id == job_id)).first()
+        db.commit()
+    return tuple(row) if row is not None else None
+
+
+def _publish(job_id: str, status: str, key_id: Optional[str], values: Dict[str, Any]) -> None:
+    job_events.publish([{"job_id": job_id, "key_id": key_id, "status": status,
+                         "pages": values.get("pages"), "error": values.get("error")}])
+
+
+def transition(job_id: str, to: str, where: Iterable[Any] = (), returning: Sequence[str] = ("status",),
+               **values: Any) -> Optional[Tuple[Any, ...]]:
+    """Move a job to ``to`` and write ``values``, only if its status may precede ``to``.
+
+    ``where`` adds conditions (e.g. an expected attempt count). Returns the ``returning``
+    columns of the updated row, or None when the job is missing or not in a source state.
+    """
+    table = FaxJob.__table__
+    values.setdefault("updated_at", datetime.utcnow())
+    stmt = (
+        update(table)
+        .where(table.c.id == job_id, table.c.status.in_(sources(to)), *where)
+        .values(status=to, **values)
+    )
+    row = _execute(stmt, [table.c[c] for c in returning] + [table.c.key_id], job_id)
+    if row is None:
+        return None
+    _publish(job_id, to, row[-1], values)
+    return row[:-1]
+
+
+def advance(job_id: str, to: str, **values: Any) -> Optional[str]:
+    """Write ``values`` and move the status to ``to`` where the state machine allows it.
+
+    For facts that hold whatever the status (a provider id, a PDF token), so a callback
+    that already finished the job keeps its status while the row still gets them.
+    Returns the job's status afterwards, or None when there is no such job.
+    """
+    table = FaxJob.__table__
+    values.setdefault("updated_at", datetime.utcnow())
+    stmt = (
+        update(table)
+        .where(table.c.id == job_id)
+        .values(status=case((table.c.status.in_(sources(to)), to), else_=table.c.status), **values)
+    )
+    row = _execute(stmt, [table.c.status, table.c.key_id], job_id)
+    if row is None:
+        return None
+    _publish(job_id, str(row[0]), row[1], values)
+    return str(row[0])
+
+
+def touch(job_id: str, **values: Any) -> bool:
+    """Write ``values`` without changing the status, while the job is still active."""
+    table = FaxJob.__table__
+    values.setdefault("updated_at", datetime.utcnow())
+    stmt = update(table).where(table.c.id == job_id, table.c.status.in_(ACTIVE)).values(**values)
+    return _execute(stmt, [table.c.id], job_id) is not None
@@ -0,0 +1,87 @@
+"""Batched writes of provider-reported job status.
+
+Pollers and reconciliation observe many jobs at once; their results are written here as
+a single executemany UPDATE in one transaction instead of a session, ``db.get`` and
+commit per job. Each update only applies while the row is still ``in_progress``, so an
+observation that raced a callback (or a retry that requeued the job) is dropped rather
+than overwriting newer state. Rows written are published to jobevents.py.
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import bindparam, func, select, update  # type: ignore
+
+from .db import SessionLocal, FaxJob
+from .jobevents import job_events
+
+# Provider outcomes that end a job; anything else leaves it in_progress
+TERMINAL = ("SUCCESS", "FAILED")
+
+
+def normalize(status: Optional[str]) -> str:
+    """Collapse a mapped provider status to SUCCESS, FAILED or in_progress."""
+    s = str(status or "")
+    return s if s in TERMINAL else "in_progress"
+
+
+def observed(job_id: str, res: Dict[str, Any], old_pages: Optional[int], old_error: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Update for a provider observation ``{status, pages?, error?}`` of an in-progress job,
+    or None when it changes nothing.
+    """
+    status = normalize(res.get("status"))
+    pages, error = res.get("pages"), res.get("error") or None
+    if status == "in_progress" and (pages is None or pages == old_pages):
+        return None
+    if status == "SUCCESS":
+        error = None
+    elif error is None:
+        error = old_error
+    return {"id": job_id, "status": status, "pages": pages, "error": error}
+
+
+def apply_updates(updates: Iterable[Dict[str, Any]]) -> int:
+    """Write ``{id, status, pages?, error?}`` observations. Returns rows changed.
+
+    ``pages`` of None keeps the stored count; ``error`` is written as given.
+    """
+    now = datetime.utcnow()
+    params: List[Dict[str, Any]] = [
+        {
+            "u_id": u["id"],
+            "u_status": normalize(u.get("status")),
+            "u_pages": u.get("pages"),
+            "u_error": u.get("error"),
+            "u_at": now,
+        }
+        for u in updates
+    ]
+    if not params:
+        return 0
+    stmt = (
+        update(FaxJob.__table__)
+        .where(FaxJob.__table__.c.id == bindparam("u_id"), FaxJob.__table__.c.status == "in_progress")
+        .values(
+            status=bindparam("u_status"),
+            pages=func.coalesce(bindparam("u_pages"), FaxJob.__table__.c.pages),
+            error=bindparam("u_error"),
+            updated_at=bindparam("u_at"),
+        )
+    )
+    with SessionLocal() as db:
+        res = db.execute(stmt, params)
+        db.commit()
+        if job_events.active:
+            # executemany has no RETURNING; the rows written carry this batch's timestamp
+            t = FaxJob.__table__
+            ids = [p["u_id"] for p in params]
+            changes = []
+            for i in range(0, len(ids), 500):
+                changes.extend(
+                    {"job_id": r[0], "key_id": r[1], "status": r[2], "pages": r[3], "error": r[4]}
+                    for r in db.execute(
+                        select(t.c.id, t.c.key_id, t.c.status, t.c.pages, t.c.error)
+                        .where(t.c.id.in_(ids[i:i + 500]), t.c.updated_at == now)
+                    ).all()
+                )
+            job_events.publish(changes)
+    return int(res.rowcount or 0)
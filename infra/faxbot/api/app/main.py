@@ -4,12 +4,12 @@ import re
 import uuid
 import asyncio
 import secrets
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import tempfile
-from typing import Optional, Any, List, Dict, cast
+from typing import Optional, Any, List, Dict, Sequence, Tuple, cast
 import subprocess
 import time
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, BackgroundTasks, Header, Depends, Query, Request, Response, WebSocket
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Header, Depends, Query, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.responses import FileResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from .config import (
@@ -20,11 +20,38 @@ from .config import (
     VALID_BACKENDS,
     providerHasTrait,
     providerTraitValue,
+    outbound_candidates,
+    get_provider_traits,
 )
-from .db import init_db, SessionLocal, FaxJob
-from .models import FaxJobOut
-from .conversion import ensure_dir, txt_to_pdf, pdf_to_tiff
+from .db import init_db, SessionLocal, FaxJob, FaxBroadcast
+from .models import FaxJobOut, FaxBatchOut, BroadcastOut, WebhookIn, WebhookOut
+from .conversion import ensure_dir
+from .pdfinfo import count_pdf_pages_bytes
+from .conversion_service import conversion_service, ConversionTimeout
+from .tiff_cache import tiff_cache
+from . import textfax
+from . import ingest
+from .uploads import uploads, UploadNotFound, UploadOffsetMismatch, UploadIncomplete
+from . import merge
+from .merge import broadcast_runner
+from .scheduler import send_scheduler
+from . import retry
+from . import resume
 from .ami import ami_client
+from .dispatcher import job_dispatcher, LANES
+from .fairshare import tenant_scheduler
+from .governor import provider_governor
+from .routing import backend_router
+from .routetable import route_table
+from .poller import status_poller
+from .reconcile import reconciler
+from . import jobstate
+from .jobstatus import normalize as normalize_status
+from .statussink import status_sink
+from . import webhooks
+from .webhooks import webhook_outbox
+from .eventstream import event_stream
+from . import artifacts
 from .phaxio_service import get_phaxio_service
 from .sinch_service import get_sinch_service
 from .signalwire_service import get_signalwire_service
@@ -37,7 +64,7 @@ import json
 from .audit import init_audit_logger, audit_event
 from .audit import query_recent_logs
 from .storage import get_storage, reset_storage
-from .auth import verify_db_key, create_api_key, list_api_keys, revoke_api_key, rotate_api_key
+from .auth import verify_db_key, create_api_key, list_api_keys, revoke_api_key, rotate_api_key, update_api_key
 from .plugins.http_provider import HttpManifest, HttpProviderRuntime
 from .signalwire_service import get_signalwire_service
 
@@ -47,7 +74,7 @@ try:
 except Exception:  # pragma: no cover - optional
     _read_cfg = None  # type: ignore
     _write_cfg = None  # type: ignore
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 app = FastAPI(
@@ -285,10 +312,55 @@ async def on_startup():
         use_syslog=settings.audit_log_syslog,
         syslog_address=(settings.audit_log_syslog_address or None),
     )
-    # Start AMI when required by traits (either direction)
-    if not settings.fax_disabled and providerHasTrait("any", "requires_ami"):
+    # Routes only to backends that can send; unusable ones are listed under routes.problems
+    route_table.set_usable(_route_usable)
+    # Start AMI when required by traits (either direction) or by a route (e.g. +1 over SIP)
+    if not settings.fax_disabled and (providerHasTrait("any", "requires_ami") or _routes_need_ami()):
         asyncio.create_task(ami_client.connect())
         ami_client.on_fax_result(_handle_fax_result)
+    # Outbound dispatch workers (jobs left queued by a previous run are picked up again)
+    if not settings.fax_disabled:
+        try:
+            job_dispatcher.recover()
+        except Exception as e:
+            print(f"[warn] Dispatch queue recovery failed: {e}")
+        job_dispatcher.start(_dispatch_job)
+        # Timers for scheduled sends (send_at) are rebuilt from the queue
+        try:
+            send_scheduler.recover()
+        except Exception as e:
+            print(f"[warn] Scheduled send recovery failed: {e}")
+        send_scheduler.start()
+        # Status polling for cloud jobs whose callback never arrived
+        status_poller.start(_provider_status, _pollable_backends)
+        # Periodic bulk sweeps over the providers' fax lists
+        reconciler.start(_provider_listers)
+    # Mail-merge broadcasts still rendering (including ones interrupted by a restart)
+    broadcast_runner.start(_merge_row_job)
+    # Customer status webhooks (outbox rows left by a previous run are delivered too)
+    webhook_outbox.start()
+    # Live status streams (/fax/events)
+    event_stream.start()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await broadcast_runner.stop()
+    await status_poller.stop()
+    await reconciler.stop()
+    await status_sink.drain()
+    await webhook_outbox.stop()
+    event_stream.stop()
+    await send_scheduler.stop()
+    await job_dispatcher.stop()
+    conversion_service.shutdown()
+
+
+def _int_or_none(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
 
 
 def _handle_fax_result(event):
@@ -296,22 +368,33 @@ def _handle_fax_result(event):
     status = event.get("Status") or event.get("status")
     error = event.get("Error") or event.get("error")
     pages = event.get("Pages") or event.get("pages")
-    with SessionLocal() as db:
-        job = db.get(FaxJob, job_id)
-        if job:
-            j = cast(Any, job)
-            j.status = status or j.status
-            j.error = error
-            if pages:
-                try:
-                    job.pages = int(pages)
-                except Exception:
-                    pass
-            j.updated_at = datetime.utcnow()
-            db.add(j)
-            db.commit()
-    if job_id and status:
-        audit_event("job_updated", job_id=job_id, status=status, provider="asterisk")
+    if job_id and str(status or "").upper() == "FAILED":
+        # Line failures (busy, no answer, dropped call) go back to the queue with backoff;
+        # pages already delivered are skipped on the retry
+        _dispatch_failed(
+            str(job_id), error or "Fax transmission failed", "sip",
+            final_status=str(status), pages=_int_or_none(pages),
+        )
+        return
+    if not job_id:
+        return
+    # Called from the AMI reader: written by the next status sink flush. The resume file
+    # and the audit record follow once the row is stored.
+    def written(fut: "asyncio.Future[Optional[str]]") -> None:
+        if fut.cancelled():
+            return
+        err = fut.exception()
+        if err is not None:
+            print(f"[warn] AMI result for job {job_id} was not stored: {err}")
+            return
+        if fut.result() is None:
+            print(f"[warn] AMI result for unknown job {job_id}")
+            return
+        resume.discard(str(job_id))
+        if status:
+            audit_event("job_updated", job_id=job_id, status=status, provider="asterisk")
+
+    status_sink.submit(str(job_id), status=status, pages=_int_or_none(pages), error=error).add_done_callback(written)
 
 
 @app.get("/health")
@@ -490,6 +573,15 @@ class CreateAPIKeyIn(BaseModel):
     scopes: Optional[List[str]] = None
     expires_at: Optional[datetime] = None
     note: Optional[str] = None
+    priority: Optional[str] = None  # default dispatch lane: urgent | normal | bulk
+    dispatch_weight: Optional[int] = Field(default=None, ge=1)  # fair-queuing share against other keys
+    max_in_flight: Optional[int] = Field(default=None, ge=0)  # concurrent dispatches; 0 = no cap
+
+
+class UpdateAPIKeyIn(BaseModel):
+    priority: Optional[str] = None
+    dispatch_weight: Optional[int] = Field(default=None, ge=1)
+    max_in_flight: Optional[int] = Field(default=None, ge=0)
 
 
 class CreateAPIKeyOut(BaseModel):
@@ -499,6 +591,9 @@ class CreateAPIKeyOut(BaseModel):
     owner: Optional[str] = None
     scopes: List[str] = []
     expires_at: Optional[datetime] = None
+    priority: Optional[str] = None
+    dispatch_weight: Optional[int] = None
+    max_in_flight: Optional[int] = None
 
 
 class APIKeyMeta(BaseModel):
@@ -511,6 +606,9 @@ class APIKeyMeta(BaseModel):
     expires_at: Optional[datetime] = None
     revoked_at: Optional[datetime] = None
     note: Optional[str] = None
+    priority: Optional[str] = None
+    dispatch_weight: Optional[int] = None
+    max_in_flight: Optional[int] = None
 
 
 @app.get("/admin/config", dependencies=[Depends(require_admin)])
@@ -1049,6 +1147,40 @@ async def get_health_status():
     }
 
 
+@app.get("/admin/dispatch-status", dependencies=[Depends(require_admin)])
+def admin_dispatch_status():
+    """Outbound dispatch queue: worker pool counters and queue depth."""
+    try:
+        depth: Dict[str, Any] = job_dispatcher.queue_depth()
+    except Exception as e:
+        depth = {"error": str(e)}
+    try:
+        lanes: Dict[str, Any] = job_dispatcher.lane_depth()
+        tenants: Dict[str, Any] = job_dispatcher.tenant_depth()
+    except Exception as e:
+        lanes = tenants = {"error": str(e)}
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "dispatcher": job_dispatcher.stats(),
+        "queue": depth,
+        "lanes": lanes,
+        "tenants": tenants,
+        "scheduler": send_scheduler.stats(),
+        "providers": provider_governor.stats(),
+        "routing": backend_router.snapshot(),
+        "routes": route_table.stats(),
+        "poller": status_poller.stats(),
+        "reconcile": reconciler.stats(),
+        "status_sink": status_sink.stats(),
+        "webhooks": webhook_outbox.stats(),
+        "streams": event_stream.stats(),
+        "conversion": conversion_service.stats(),
+        "tiff_cache": tiff_cache.stats(),
+        "uploads": uploads.stats(),
+        "broadcasts": broadcast_runner.stats(),
+    }
+
+
 @app.get("/admin/db-status", dependencies=[Depends(require_admin)])
 def admin_db_status():
     from sqlalchemy import text  # type: ignore
@@ -1086,6 +1218,11 @@ def admin_db_status():
                 counts["api_keys"] = db.query(APIKey).count()
             except Exception:
                 counts["api_keys"] = None
+            try:
+                from .db import FaxArtifact  # type: ignore
+                counts["fax_artifacts"] = db.query(FaxArtifact).count()
+            except Exception:  # pragma: no cover
+                counts["fax_artifacts"] = None
             try:
                 from .db import InboundFax  # type: ignore
                 counts["inbound_fax"] = db.query(InboundFax).count()
@@ -1768,15 +1905,32 @@ async def get_admin_job(job_id: str):
             "created_at": job.created_at,
             "updated_at": job.updated_at,
             "file_name": job.file_name,
+            "attempts": int(getattr(job, "attempts", None) or 0),
+            "pages_sent": getattr(job, "pages_sent", None),
+            "attempt_log": [
+                {**entry, "error": sanitize_error(entry.get("error"))} for entry in retry.attempt_log(job)
+            ],
         }
 
 
 @app.get("/admin/fax-jobs/{job_id}/pdf", dependencies=[Depends(require_admin)])
-def admin_get_job_pdf(job_id: str):
+async def admin_get_job_pdf(job_id: str):
     """Admin-only: download the outbound fax PDF for a job if present.
-    Works for all backends; the API generates/keeps a PDF per job prior to sending.
+    Works for all backends; the API keeps a PDF per job prior to sending, except text sent
+    as a directly rasterized TIFF, whose PDF is rendered from the TIFF on first request.
     """
-    pdf_path = os.path.join(settings.fax_data_dir, f"{job_id}.pdf")
+    with SessionLocal() as db:
+        job = db.get(FaxJob, job_id)
+    pdf_path = _job_pdf_path(job) if job else os.path.join(settings.fax_data_dir, f"{job_id}.pdf")
+    tiff_path = str(cast(Any, job).tiff_path or "") if job else ""
+    if not os.path.exists(pdf_path) and tiff_path and os.path.exists(tiff_path) and shutil.which("gs"):
+        tmp_pdf = f"{pdf_path}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            await conversion_service.tiff_to_pdf(tiff_path, tmp_pdf)
+            os.replace(tmp_pdf, pdf_path)
+        except Exception:
+            if os.path.exists(tmp_pdf):
+                os.remove(tmp_pdf)
     if not os.path.exists(pdf_path):
         raise HTTPException(404, detail="PDF file not found")
     audit_event("admin_pdf_download", job_id=job_id)
@@ -1792,6 +1946,17 @@ def admin_get_job_pdf(job_id: str):
     )
 
 
+@app.post("/admin/reconcile", dependencies=[Depends(require_admin)])
+async def admin_reconcile(backend: Optional[str] = Query(default=None)):
+    """Run a reconciliation sweep now (all list-capable backends, or one)."""
+    listers = _provider_listers()
+    if backend:
+        if backend not in listers:
+            raise HTTPException(400, detail=f"Reconciliation not supported for backend '{backend}'")
+        listers = {backend: listers[backend]}
+    return {"results": await reconciler.sweep_all(listers)}
+
+
 @app.post("/admin/fax-jobs/{job_id}/refresh", dependencies=[Depends(require_admin)])
 async def admin_refresh_job(job_id: str):
     """Refresh job status via provider when supported (manifest providers preview).
@@ -1804,35 +1969,14 @@ async def admin_refresh_job(job_id: str):
             raise HTTPException(404, detail="Job not found")
         backend = (job.backend or settings.fax_backend).lower()
     # Only handle manifest-backed backends for now
-    mpath = os.path.join(os.getcwd(), "config", "providers", backend, "manifest.json")
-    if not (settings.feature_v3_plugins and os.path.exists(mpath)):
+    if not _manifest_available(backend):
         raise HTTPException(400, detail="Refresh not supported for this backend")
     try:
-        with open(mpath, "r", encoding="utf-8") as f:
-            man = HttpManifest.from_dict(json.load(f))
-        p_settings: Dict[str, Any] = {}
-        try:
-            if _read_cfg is not None:
-                cfg = _read_cfg(settings.faxbot_config_path)
-                if getattr(cfg, "ok", False) and getattr(cfg, "data", None):
-                    ob = ((cfg.data.get("providers") or {}).get("outbound") or {})
-                    if (ob.get("plugin") or "").lower() == backend:
-                        p_settings = ob.get("settings") or {}
-        except Exception:
-            pass
-        rt = HttpProviderRuntime(man, {}, p_settings)
+        rt = _manifest_runtime(backend)
         res = await rt.get_status(job_id=job_id, provider_sid=(job.provider_sid or None))
-        status = str(res.get("status") or job.status)
+        status = normalize_status(res.get("status") or job.status)
         prov_sid = str(res.get("job_id") or job.provider_sid or "")
-        with SessionLocal() as db:
-            j = db.get(FaxJob, job_id)
-            if j:
-                j.status = status
-                if prov_sid:
-                    j.provider_sid = prov_sid
-                j.updated_at = datetime.utcnow()
-                db.add(j)
-                db.commit()
+        jobstate.advance(job_id, status, **({"provider_sid": prov_sid} if prov_sid else {}))
         with SessionLocal() as db:
             j2 = db.get(FaxJob, job_id)
             if j2:
@@ -2287,57 +2431,442 @@ def persist_settings(payload: PersistSettingsIn):
     return {"ok": True, "path": target}
 
 @app.post("/fax", response_model=FaxJobOut, status_code=202, dependencies=[Depends(require_fax_send)])
-async def send_fax(background: BackgroundTasks, to: str = Form(...), file: UploadFile = File(...)):
-    ob = active_outbound()
-    # Preserve legacy behavior in disabled/test mode to avoid cross-test env leakage
-    if settings.fax_disabled:
-        ob = settings.fax_backend
-    # Validate destination
+async def send_fax(
+    to: str = Form(...),
+    file: UploadFile = File(...),
+    send_at: Optional[str] = Form(default=None),
+    priority: Optional[str] = Form(default=None),
+    info = Depends(require_api_key),
+):
+    # Starlette has already spooled the multipart file; it is copied to disk once, off the loop
+    return await _submit_fax(
+        to, file.filename, ingest.upload_chunks(file), send_at, _job_priority(priority, info), _key_id(info)
+    )
+
+
+@app.post("/fax/raw", response_model=FaxJobOut, status_code=202, dependencies=[Depends(require_fax_send)])
+async def send_fax_raw(
+    request: Request,
+    to: str = Query(...),
+    filename: Optional[str] = Query(default=None),
+    send_at: Optional[str] = Query(default=None),
+    priority: Optional[str] = Query(default=None),
+    info = Depends(require_api_key),
+):
+    """Raw body upload (`application/pdf` or `text/plain`): no multipart parsing or spooling;
+    the body streams straight to its artifact file.
+    """
+    content_type = (request.headers.get("content-type") or "").split(";")[0].strip().lower()
+    if content_type not in ("application/pdf", "text/plain"):
+        raise HTTPException(415, detail="Raw uploads must be application/pdf or text/plain")
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > settings.max_file_size_mb * 1024 * 1024:
+        raise HTTPException(413, detail=f"File exceeds {settings.max_file_size_mb} MB limit")
+    default_name = "document.pdf" if content_type == "application/pdf" else "document.txt"
+    return await _submit_fax(
+        to, filename or default_name, request.stream(), send_at, _job_priority(priority, info), _key_id(info)
+    )
+
+
+def _validate_destination(to: str) -> None:
     if not PHONE_RE.match(to):
         raise HTTPException(400, detail="'to' must be E.164 or digits only")
+
+
+def _parse_send_at(value: Optional[str]) -> Optional[datetime]:
+    """``send_at`` (ISO 8601; naive times are UTC) → naive UTC, or None to send now."""
+    if value is None or not str(value).strip():
+        return None
+    try:
+        when = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(400, detail="'send_at' must be an ISO 8601 timestamp")
+    if when.tzinfo is not None:
+        when = when.astimezone(timezone.utc).replace(tzinfo=None)
+    now = datetime.utcnow()
+    if when > now + timedelta(days=settings.schedule_max_days):
+        raise HTTPException(400, detail=f"'send_at' is more than {settings.schedule_max_days} days ahead")
+    return when if when > now else None
+
+
+def _job_priority(requested: Optional[str], info: Optional[dict]) -> Optional[str]:
+    """Dispatch lane for a new job: the request's ``priority``, else the API key's default."""
+    value = (requested or "").strip().lower() or (info or {}).get("priority")
+    if not value:
+        return None
+    if value not in LANES:
+        raise HTTPException(400, detail=f"'priority' must be one of: {', '.join(LANES)}")
+    return value
+
+
+def _key_id(info: Optional[dict]) -> Optional[str]:
+    """Submitting API key, recorded on jobs as their fair-queuing tenant."""
+    return (info or {}).get("key_id")
+
+
+def _upload_name(filename: Optional[str]) -> str:
+    return os.path.basename(filename or "") or "upload"
+
+
+async def _submit_fax(
+    to: str, filename: Optional[str], chunks: Any, send_at: Optional[str] = None,
+    priority: Optional[str] = None, key_id: Optional[str] = None,
+):
+    _validate_destination(to)
+    due = _parse_send_at(send_at)
     # Stream upload to disk with magic sniff and size enforcement
     max_bytes = settings.max_file_size_mb * 1024 * 1024
     job_id = uuid.uuid4().hex
-    orig_path = os.path.join(settings.fax_data_dir, f"{job_id}-{file.filename}")
-    pdf_path = os.path.join(settings.fax_data_dir, f"{job_id}.pdf")
-    tiff_path = os.path.join(settings.fax_data_dir, f"{job_id}.tiff")
+    filename = _upload_name(filename)
+    orig_path = os.path.join(settings.fax_data_dir, f"{job_id}-{filename}")
 
-    total = 0
-    first_chunk = b""
-    CHUNK = 64 * 1024
+    # Hash while streaming so identical documents share one stored PDF/TIFF (see artifacts.py)
+    try:
+        total, sha256_hex, head = await ingest.receive(chunks, orig_path, max_bytes)
+    except ingest.UploadTooLarge:
+        raise HTTPException(413, detail=f"File exceeds {settings.max_file_size_mb} MB limit")
+    return await _create_fax_job(
+        job_id, to, filename, orig_path, total, sha256_hex, head, send_at=due, priority=priority, key_id=key_id
+    )
+
+
+@app.post("/fax/batch", response_model=FaxBatchOut, status_code=202, dependencies=[Depends(require_fax_send)])
+async def send_fax_batch(
+    to: List[str] = Form(...),
+    file: List[UploadFile] = File(...),
+    send_at: Optional[str] = Form(default=None),
+    priority: Optional[str] = Form(default=None),
+    info = Depends(require_api_key),
+):
+    """Many faxes in one request: one ``file`` per ``to`` (paired in order), or a single
+    ``file`` sent to every ``to``. Each distinct document is stored and converted once and
+    all job rows are inserted in one transaction.
+    """
+    recipients = [t.strip() for t in to]
+    if len(file) not in (1, len(recipients)):
+        raise HTTPException(400, detail="Send one file, or one file per 'to'")
+    if len(recipients) > settings.batch_max_jobs:
+        raise HTTPException(400, detail=f"Batch exceeds {settings.batch_max_jobs} jobs")
+    for t in recipients:
+        _validate_destination(t)
+    due = _parse_send_at(send_at)
+    lane = _job_priority(priority, info)
+    backends = [_outbound_backend(t) for t in recipients]
+    max_bytes = settings.max_file_size_mb * 1024 * 1024
+
+    # Ingest every part; identical content collapses to one document
+    received: List[Dict[str, Any]] = []
+    try:
+        for f in file:
+            job_id = uuid.uuid4().hex
+            name = _upload_name(f.filename)
+            orig_path = os.path.join(settings.fax_data_dir, f"{job_id}-{name}")
+            total, sha256_hex, head = await ingest.receive(ingest.upload_chunks(f), orig_path, max_bytes)
+            received.append({"job_id": job_id, "name": name, "orig_path": orig_path,
+                             "total": total, "sha": sha256_hex, "head": head})
+    except BaseException as e:
+        for r in received:
+            if os.path.exists(r["orig_path"]):
+                os.remove(r["orig_path"])
+        if isinstance(e, ingest.UploadTooLarge):
+            raise HTTPException(413, detail=f"File exceeds {settings.max_file_size_mb} MB limit")
+        raise
+    distinct: Dict[str, Dict[str, Any]] = {}
+    for r in received:
+        if r["sha"] in distinct:
+            os.remove(r["orig_path"])
+        else:
+            distinct[r["sha"]] = r
+    parts = [received[0 if len(received) == 1 else i] for i in range(len(recipients))]
+    # A document routed to several backends is prepared once for all of them
+    routed: Dict[str, List[str]] = {}
+    for p, ob in zip(parts, backends):
+        if ob not in routed.setdefault(p["sha"], []):
+            routed[p["sha"]].append(ob)
+
+    results = await asyncio.gather(
+        *[_prepare_document(r["job_id"], routed[sha], r["name"], r["orig_path"], r["total"], r["sha"], r["head"])
+          for sha, r in distinct.items()],
+        return_exceptions=True,
+    )
+    docs = dict(zip(distinct.keys(), results))
+    failed = [d for d in results if isinstance(d, BaseException)]
+    if failed:
+        for d in results:
+            if not isinstance(d, BaseException):
+                _release_document(d)
+        raise failed[0]
+
+    # Each prepared document holds one reference; take the rest for its other jobs
+    uses: Dict[str, int] = {}
+    for p in parts:
+        uses[p["sha"]] = uses.get(p["sha"], 0) + 1
+    taken: Dict[str, int] = {sha: 1 for sha in docs}
+    rows: List[FaxJob] = []
+    try:
+        for sha, n in uses.items():
+            doc_sha = docs[sha]["content_sha256"]
+            if n > 1 and doc_sha:
+                artifacts.retain(doc_sha, refs=n - 1)
+            taken[sha] = n
+        first_job = {r["sha"]: r["job_id"] for r in distinct.values()}
+        for t, p, ob in zip(recipients, parts, backends):
+            job_id = first_job.pop(p["sha"], None) or uuid.uuid4().hex
+            rows.append(_new_job_row(
+                job_id, t, p["name"], ob, docs[p["sha"]], send_at=due, priority=lane, key_id=_key_id(info)
+            ))
+        with SessionLocal() as db:
+            db.add_all(rows)
+            db.commit()
+    except BaseException:
+        for sha, n in taken.items():
+            _release_document(docs[sha], n)
+        raise
+    for job in rows:
+        audit_event("job_created", job_id=job.id, backend=job.backend)
+        _enqueued(job)
+    return FaxBatchOut(jobs=[_serialize_job(j) for j in rows])
+
+
+@app.post("/fax/merge", response_model=BroadcastOut, status_code=202, dependencies=[Depends(require_fax_send)])
+async def create_merge_broadcast(
+    template: UploadFile = File(...),
+    recipients: UploadFile = File(...),
+    to_field: str = Form("to"),
+    priority: Optional[str] = Form(default=None),
+    info = Depends(require_api_key),
+):
+    """Mail-merge: render a TXT template with ``{{field}}`` placeholders once per row of a
+    CSV or JSON (array or JSON Lines) dataset; each row becomes one job. Rendering runs in
+    the background; poll ``GET /fax/merge/{id}``.
+    """
+    lane = _job_priority(priority, info)
+    broadcast_id = uuid.uuid4().hex
+    bdir = broadcast_runner.broadcast_dir(broadcast_id)
+    ensure_dir(bdir)
+    max_bytes = settings.max_file_size_mb * 1024 * 1024
+    template_path = os.path.join(bdir, "template.txt")
+    data_path = os.path.join(bdir, "recipients")
     try:
-        with open(orig_path, "wb") as out:
-            # Read first chunk for magic sniff
-            first_chunk = await file.read(CHUNK)
-            total += len(first_chunk)
-            if total > max_bytes:
-                raise HTTPException(413, detail=f"File exceeds {settings.max_file_size_mb} MB limit")
-            out.write(first_chunk)
-            # Stream the rest
-            while True:
-                chunk = await file.read(CHUNK)
-                if not chunk:
-                    break
-                total += len(chunk)
-                if total > max_bytes:
-                    raise HTTPException(413, detail=f"File exceeds {settings.max_file_size_mb} MB limit")
-                out.write(chunk)
-    except HTTPException:
         try:
-            if os.path.exists(orig_path):
-                os.remove(orig_path)
-        finally:
-            raise
+            _, _, template_head = await ingest.receive(ingest.upload_chunks(template), template_path, max_bytes)
+            _, _, data_head = await ingest.receive(ingest.upload_chunks(recipients), data_path, max_bytes)
+        except ingest.UploadTooLarge:
+            raise HTTPException(413, detail=f"File exceeds {settings.max_file_size_mb} MB limit")
+        if ingest.sniff(template_head) != "txt":
+            raise HTTPException(415, detail="Template must be a UTF-8 text file")
+        with open(template_path, encoding="utf-8", errors="ignore") as f:
+            fields = merge.MergeTemplate(f.read()).fields
+        data_format = merge.detect_format(recipients.filename, data_head)
+        if data_format == "csv":
+            header = set(merge.csv_header(data_path))
+            missing = sorted(({to_field} | fields) - header)
+            if missing:
+                raise HTTPException(400, detail=f"Recipient CSV lacks columns: {', '.join(missing)}")
+        now = datetime.utcnow()
+        b = FaxBroadcast(
+            id=broadcast_id,
+            key_id=(info or {}).get("key_id"),
+            status="rendering",
+            file_name=_upload_name(template.filename),
+            to_field=to_field,
+            template_path=template_path,
+            data_path=data_path,
+            data_format=data_format,
+            priority=lane,
+            created_at=now,
+            updated_at=now,
+        )
+        with SessionLocal() as db:
+            db.add(b)
+            db.commit()
+    except BaseException:
+        shutil.rmtree(bdir, ignore_errors=True)
+        raise
+    audit_event("broadcast_created", job_id=broadcast_id)
+    broadcast_runner.notify()
+    return _serialize_broadcast(b)
+
+
+@app.get("/fax/merge/{broadcast_id}", response_model=BroadcastOut, dependencies=[Depends(require_fax_read)])
+def get_merge_broadcast(broadcast_id: str, info = Depends(require_api_key)):
+    with SessionLocal() as db:
+        b = db.get(FaxBroadcast, broadcast_id)
+    key_id = (info or {}).get("key_id")
+    if b is None or (b.key_id and b.key_id != key_id and not _has_scope(info, "keys:manage")):
+        raise HTTPException(404, detail="Broadcast not found")
+    return _serialize_broadcast(b)
+
+
+def _serialize_broadcast(b: FaxBroadcast) -> BroadcastOut:
+    x = cast(Any, b)
+    return BroadcastOut(
+        id=x.id,
+        status=x.status,
+        template=x.file_name,
+        rows_processed=int(x.cursor or 0),
+        jobs_created=int(x.created_jobs or 0),
+        rows_failed=int(x.failed_rows or 0),
+        error=x.error,
+        created_at=x.created_at,
+        updated_at=x.updated_at,
+    )
+
+
+def _write_bytes(path: str, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+async def _merge_row_job(b: FaxBroadcast, index: int, row: Dict[str, Any], text: str) -> None:
+    """Broadcast runner handler: one rendered letter → one queued job, cursor advanced atomically."""
+    x = cast(Any, b)
+    to = str(row.get(x.to_field) or "").strip()
+    _validate_destination(to)
+    ob = _outbound_backend(to)
+    job_id = uuid.uuid4().hex
+    filename = str(x.file_name)
+    orig_path = os.path.join(settings.fax_data_dir, f"{job_id}-{filename}")
+    data = text.encode("utf-8")
+    await asyncio.to_thread(_write_bytes, orig_path, data)
+    doc = await _prepare_document(
+        job_id, [ob], filename, orig_path, len(data), hashlib.sha256(data).hexdigest(), data[:ingest.SNIFF_BYTES]
+    )
+    try:
+        with SessionLocal() as db:
+            job = _new_job_row(job_id, to, filename, ob, doc, priority=x.priority, key_id=x.key_id)
+            cast(Any, job).broadcast_id = x.id
+            db.add(job)
+            broadcast_runner.advance(db, str(x.id), index, created=True)
+            db.commit()
+    except BaseException:
+        _release_document(doc)
+        raise
+    audit_event("job_created", job_id=job_id, backend=ob)
+    _enqueued(job)
+
+
+def _outbound_backend(to: str) -> str:
+    """Backend for a destination: its longest matching route, else the outbound backend."""
+    routed = route_table.backend_for(to)
+    if routed:
+        return routed
+    ob = active_outbound()
+    # Preserve legacy behavior in disabled/test mode to avoid cross-test env leakage
+    if settings.fax_disabled:
+        ob = settings.fax_backend
+    return ob
+
+
+def _requires_ami(backend: str) -> bool:
+    traits = get_provider_traits(backend).get("traits")
+    if traits is None:
+        return backend == "sip"
+    return bool(traits.get("requires_ami"))
+
+
+def _route_usable(backend: str) -> bool:
+    """True when a routed backend can send: the outbound backend, a configured AMI, or credentials."""
+    if backend == active_outbound() or backend == "freeswitch":
+        return True
+    if _requires_ami(backend):
+        return bool(settings.ami_username and settings.ami_password)
+    return _backend_available(backend)
+
+
+def _routes_need_ami() -> bool:
+    try:
+        return any(_requires_ami(b) for b in route_table.backends())
+    except Exception:
+        return False
+
+
+def _requires_tiff(ob: str) -> bool:
+    try:
+        return bool((get_provider_traits(ob).get("traits") or {}).get("requires_tiff"))
+    except Exception:
+        return ob in {"sip", "freeswitch"}
+
+
+async def _create_fax_job(
+    job_id: str, to: str, filename: str, orig_path: str, total: int, sha256_hex: str, head: bytes,
+    send_at: Optional[datetime] = None, priority: Optional[str] = None, key_id: Optional[str] = None,
+):
+    """Turn an uploaded file at ``orig_path`` into a queued job: sniff, store, convert, insert."""
+    ob = _outbound_backend(to)
+    doc = await _prepare_document(job_id, [ob], filename, orig_path, total, sha256_hex, head)
+    try:
+        # Create job in DB with backend info
+        with SessionLocal() as db:
+            job = _new_job_row(job_id, to, filename, ob, doc, send_at=send_at, priority=priority, key_id=key_id)
+            db.add(job)
+            db.commit()
+    except BaseException:
+        _release_document(doc)
+        raise
+    audit_event("job_created", job_id=job_id, backend=ob)
+    _enqueued(job)
+    return _serialize_job(job)
+
+
+def _enqueued(job: FaxJob) -> None:
+    """The job row is the queue entry; wake the dispatch workers now or when it falls due."""
+    if settings.fax_disabled:
+        return
+    j = cast(Any, job)
+    job_dispatcher.track(j.priority, j.key_id)
+    if j.send_at is not None:
+        send_scheduler.schedule(str(j.id), j.send_at)
+    else:
+        job_dispatcher.notify()
+
+
+def _new_job_row(
+    job_id: str, to: str, filename: str, ob: str, doc: Dict[str, Any],
+    send_at: Optional[datetime] = None, priority: Optional[str] = None, key_id: Optional[str] = None,
+) -> FaxJob:
+    now = datetime.utcnow()
+    return FaxJob(
+        id=job_id,
+        to_number=to,
+        file_name=filename,
+        tiff_path=doc["tiff_path"],
+        status="queued",
+        pages=doc["pages"],
+        backend=ob,
+        content_sha256=doc["content_sha256"],
+        send_at=send_at,
+        priority=priority,
+        key_id=key_id,
+        # Disabled mode never sends; keep the row out of the dispatch queue
+        dispatched_at=(now if settings.fax_disabled else None),
+        created_at=now,
+        updated_at=now,
+    )
+
+
+def _release_document(doc: Dict[str, Any], refs: int = 1) -> None:
+    if doc["content_sha256"]:
+        artifacts.release(doc["content_sha256"], refs)
+
+
+async def _prepare_document(
+    job_id: str, backends: Sequence[str], filename: str, orig_path: str, total: int, sha256_hex: str, head: bytes
+) -> Dict[str, Any]:
+    """Sniff, store and convert an upload for every backend in ``backends`` (one per
+    routed destination); consumes ``orig_path``.
+
+    Returns ``{content_sha256, tiff_path, pages}``. With content-addressed storage the
+    document holds one artifact reference, which the caller hands to a job row (or
+    releases with ``_release_document``).
+    """
+    pdf_path = os.path.join(settings.fax_data_dir, f"{job_id}.pdf")
+    tiff_path = os.path.join(settings.fax_data_dir, f"{job_id}.tiff")
 
     # Magic sniff: PDF if starts with %PDF, else treat as text if UTF-8 clean
-    is_pdf = first_chunk.startswith(b"%PDF")
-    is_text = False
-    if not is_pdf:
-        try:
-            first_chunk.decode("utf-8")
-            is_text = True
-        except Exception:
-            is_text = False
+    kind = ingest.sniff(head)
+    is_pdf = kind == "pdf"
+    is_text = kind == "txt"
     if not (is_pdf or is_text):
         # Unsupported type
         try:
@@ -2346,99 +2875,429 @@ async def send_fax(background: BackgroundTasks, to: str = Form(...), file: Uploa
             pass
         raise HTTPException(415, detail="Only PDF and TXT are allowed")
 
-    # Convert to PDF if needed
-    if is_text or (file.filename and file.filename.lower().endswith(".txt")):
-        if settings.fax_disabled:
-            # Test mode - skip conversion
-            with open(pdf_path, "wb") as f:
-                f.write(b"%PDF-1.4\ntest\n%%EOF")
+    # Content-addressed artifacts; disabled/test mode writes placeholders, so keep those per job
+    content_sha256: Optional[str] = None
+    cached_pages: Optional[int] = None
+    if not settings.fax_disabled:
+        content_sha256 = sha256_hex
+        artifact = artifacts.retain(content_sha256, total)
+        pdf_path = artifacts.cas_path(content_sha256, "pdf")
+        tiff_path = str(artifact.tiff_path or artifacts.cas_path(content_sha256, "tiff"))
+        cached_pages = cast(Any, artifact).pages
+        ensure_dir(os.path.dirname(pdf_path))
+
+    is_txt = is_text or filename.lower().endswith(".txt")
+    # Backend-specific file preparation (trait-driven)
+    use_manifest = any(_manifest_available(ob) for ob in backends)
+    tiff_backends = [ob for ob in backends if _requires_tiff(ob)]
+    requires_tiff = bool(tiff_backends)
+    # Text for TIFF-only backends is rasterized directly; no PDF is built (admin view renders one on demand)
+    text_fast_path = (
+        is_txt and requires_tiff and len(tiff_backends) == len(backends)
+        and not use_manifest and not settings.fax_disabled and textfax.available()
+    )
+
+    try:
+        # Convert to PDF if needed (skipped when the same content is already stored)
+        if not text_fast_path and not os.path.exists(pdf_path):
+            tmp_pdf = f"{pdf_path}.{job_id}.tmp"
+            if is_txt:
+                if settings.fax_disabled:
+                    # Test mode - skip conversion
+                    with open(tmp_pdf, "wb") as f:
+                        f.write(b"%PDF-1.4\ntest\n%%EOF")
+                else:
+                    await conversion_service.txt_to_pdf(orig_path, tmp_pdf)
+            else:
+                # PDF uploads are stored as-is: move, don't copy
+                os.replace(orig_path, tmp_pdf)
+            os.replace(tmp_pdf, pdf_path)
+
+        pages = None
+        if use_manifest:
+            pages = None
+        elif requires_tiff:
+            if settings.fax_disabled:
+                pages = 1
+                with open(tiff_path, "wb") as f:
+                    f.write(b"TIFF_PLACEHOLDER")
+            elif os.path.exists(tiff_path) and cached_pages:
+                pages = cached_pages
+            elif text_fast_path:
+                tmp_tiff = f"{tiff_path}.{job_id}.tmp"
+                pages, _ = await conversion_service.txt_to_tiff(orig_path, tmp_tiff)
+                os.replace(tmp_tiff, tiff_path)
+                if content_sha256:
+                    artifacts.record(content_sha256, tiff_path=tiff_path, pages=pages)
+            else:
+                # Same PDF content renders to the same TIFF: served from the render cache when possible
+                pages = await tiff_cache.render(pdf_path, tiff_path, sha256=(content_sha256 if is_pdf else None))
+                if content_sha256:
+                    artifacts.record(content_sha256, tiff_path=tiff_path, pages=pages)
         else:
-            txt_to_pdf(orig_path, pdf_path)
+            pages = None
+    except BaseException as e:
+        # Conversion failed, timed out, or the request was cancelled: undo partial work
+        for leftover in (f"{pdf_path}.{job_id}.tmp", f"{tiff_path}.{job_id}.tmp"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        if content_sha256:
+            artifacts.release(content_sha256)
+        if isinstance(e, ConversionTimeout):
+            raise HTTPException(504, detail="Document conversion timed out")
+        raise
+    finally:
+        # The upload itself is no longer needed once the PDF (or TIFF) exists
+        if os.path.exists(orig_path):
+            os.remove(orig_path)
+    return {"content_sha256": content_sha256, "tiff_path": tiff_path, "pages": pages}
+
+
+class CreateUploadIn(BaseModel):
+    file_name: Optional[str] = None
+    size: Optional[int] = None  # total bytes, if known; completion then requires exactly this many
+
+
+class UploadOut(BaseModel):
+    id: str
+    offset: int
+    size: Optional[int] = None
+    file_name: str
+    expires_at: datetime
+
+
+class CompleteUploadIn(BaseModel):
+    to: str
+    send_at: Optional[str] = None
+    priority: Optional[str] = None
+
+
+def _serialize_upload(up: Any) -> UploadOut:
+    return UploadOut(
+        id=str(up.id),
+        offset=int(up.received_bytes or 0),
+        size=up.size_bytes,
+        file_name=str(up.file_name),
+        expires_at=up.expires_at,
+    )
+
+
+def _upload_or_404(upload_id: str, info: Any) -> Any:
+    try:
+        return uploads.get(upload_id, (info or {}).get("key_id"))
+    except UploadNotFound:
+        raise HTTPException(404, detail="Upload not found")
+
+
+@app.post("/fax/uploads", response_model=UploadOut, status_code=201, dependencies=[Depends(require_fax_send)])
+def create_fax_upload(payload: CreateUploadIn, info = Depends(require_api_key)):
+    """Open a resumable upload session; PUT chunks to it, then complete it into a job."""
+    if payload.size is not None and payload.size > uploads.max_bytes():
+        raise HTTPException(413, detail=f"File exceeds {settings.upload_max_size_mb} MB limit")
+    up = uploads.create(_upload_name(payload.file_name), payload.size, (info or {}).get("key_id"))
+    return _serialize_upload(up)
+
+
+@app.get("/fax/uploads/{upload_id}", response_model=UploadOut, dependencies=[Depends(require_fax_send)])
+def get_fax_upload(upload_id: str, info = Depends(require_api_key)):
+    """Current offset: where an interrupted client resumes."""
+    return _serialize_upload(_upload_or_404(upload_id, info))
+
+
+@app.put("/fax/uploads/{upload_id}", response_model=UploadOut, dependencies=[Depends(require_fax_send)])
+async def put_fax_upload_chunk(upload_id: str, request: Request, offset: int = Query(..., ge=0), info = Depends(require_api_key)):
+    """Append the raw request body at ``offset``; 409 (with the expected offset) if it does not match."""
+    try:
+        up = await uploads.append(upload_id, (info or {}).get("key_id"), offset, request.stream())
+    except UploadNotFound:
+        raise HTTPException(404, detail="Upload not found")
+    except UploadOffsetMismatch as e:
+        raise HTTPException(409, detail=f"Offset mismatch; upload is at {e.offset}", headers={"Upload-Offset": str(e.offset)})
+    except ingest.UploadTooLarge:
+        raise HTTPException(413, detail="Chunk exceeds the declared size or UPLOAD_MAX_SIZE_MB")
+    return _serialize_upload(up)
+
+
+@app.delete("/fax/uploads/{upload_id}", dependencies=[Depends(require_fax_send)])
+def delete_fax_upload(upload_id: str, info = Depends(require_api_key)):
+    try:
+        uploads.abort(upload_id, (info or {}).get("key_id"))
+    except UploadNotFound:
+        raise HTTPException(404, detail="Upload not found")
+    return {"status": "deleted"}
+
+
+@app.post("/fax/uploads/{upload_id}/complete", response_model=FaxJobOut, status_code=202, dependencies=[Depends(require_fax_send)])
+async def complete_fax_upload(upload_id: str, payload: CompleteUploadIn, info = Depends(require_api_key)):
+    """Finalize the session into a fax job (same processing as ``POST /fax``)."""
+    _validate_destination(payload.to)
+    due = _parse_send_at(payload.send_at)
+    lane = _job_priority(payload.priority, info)
+    up = _upload_or_404(upload_id, info)
+    job_id = uuid.uuid4().hex
+    orig_path = os.path.join(settings.fax_data_dir, f"{job_id}-{up.file_name}")
+    try:
+        total, sha256_hex, head, filename = await uploads.take(upload_id, (info or {}).get("key_id"), orig_path)
+    except UploadNotFound:
+        raise HTTPException(404, detail="Upload not found")
+    except UploadIncomplete as e:
+        raise HTTPException(409, detail=f"Upload incomplete at offset {e.args[0]}")
+    return await _create_fax_job(
+        job_id, payload.to, filename, orig_path, total, sha256_hex, head,
+        send_at=due, priority=lane, key_id=_key_id(info),
+    )
+
+
+async def _dispatch_job(job: FaxJob) -> None:
+    """Dispatch worker entry point: send a claimed job through its backend."""
+    j = cast(Any, job)
+    job_id, to, ob = str(j.id), str(j.to_number), str(j.backend)
+    pdf_path = _job_pdf_path(job)
+    if ob == "freeswitch":
+        await _send_via_freeswitch(job_id, to, *await asyncio.to_thread(resume.prepare, job))
+    elif ob in _CLOUD_SENDERS or _manifest_available(ob):
+        await _send_with_failover(job_id, to, pdf_path, ob)
     else:
-        # Copy the PDF directly
-        shutil.copyfile(orig_path, pdf_path)
+        # Default to SIP/Asterisk; a retry after a dropped call sends only the pages left
+        await _originate_job(job_id, to, *await asyncio.to_thread(resume.prepare, job))
 
-    # Backend-specific file preparation (trait-driven)
-    pages = None
-    manifest_path = os.path.join(os.getcwd(), "config", "providers", ob, "manifest.json")
-    requires_tiff = False
+
+def _job_pdf_path(job: FaxJob) -> str:
+    """PDF for an outbound job: the shared content-addressed copy, or the legacy per-job file."""
+    sha = cast(Any, job).content_sha256
+    if sha:
+        return artifacts.cas_path(str(sha), "pdf")
+    return os.path.join(settings.fax_data_dir, f"{job.id}.pdf")
+
+
+def _manifest_available(pid: str) -> bool:
+    path = os.path.join(os.getcwd(), "config", "providers", pid, "manifest.json")
+    return bool(settings.feature_v3_plugins and os.path.exists(path))
+
+
+def _manifest_settings(pid: str) -> Dict[str, Any]:
+    """Config-store settings for manifest provider ``pid``, whether or not it is the outbound plugin.
+
+    The outbound plugin's settings live under ``providers.outbound``; every manifest plugin
+    configured through ``PUT /plugins/{id}/config`` also keeps its own copy under
+    ``providers.plugin_settings`` so failover candidates and routed providers have credentials.
+    """
+    pid = pid.lower()
     try:
-        from .config import providerHasTrait
-        requires_tiff = bool(providerHasTrait("outbound", "requires_tiff"))
+        if _read_cfg is not None:
+            cfg = _read_cfg(settings.faxbot_config_path)
+            if getattr(cfg, "ok", False) and getattr(cfg, "data", None):
+                providers = cfg.data.get("providers") or {}
+                ob = providers.get("outbound") or {}
+                if (ob.get("plugin") or "").lower() == pid:
+                    return ob.get("settings") or {}
+                return (providers.get("plugin_settings") or {}).get(pid) or {}
     except Exception:
-        requires_tiff = (ob in {"sip", "freeswitch"})
-    if settings.feature_v3_plugins and os.path.exists(manifest_path):
-        pages = None
-    elif requires_tiff:
-        if settings.fax_disabled:
-            pages = 1
-            with open(tiff_path, "wb") as f:
-                f.write(b"TIFF_PLACEHOLDER")
+        pass
+    return {}
+
+
+def _manifest_runtime(pid: str) -> HttpProviderRuntime:
+    """HTTP manifest runtime for ``pid`` with its settings from the config store, if any."""
+    mpath = os.path.join(os.getcwd(), "config", "providers", pid, "manifest.json")
+    with open(mpath, "r", encoding="utf-8") as f:
+        man = HttpManifest.from_dict(json.load(f))
+    return HttpProviderRuntime(man, {}, _manifest_settings(pid))
+
+
+def _pollable_backends() -> List[str]:
+    """Configured backends whose job status can be fetched by provider id."""
+    out = [b for b in ("phaxio", "sinch", "signalwire") if _backend_available(b)]
+    pdir = os.path.join(os.getcwd(), "config", "providers")
+    if settings.feature_v3_plugins and os.path.isdir(pdir):
+        for pid in sorted(os.listdir(pdir)):
+            try:
+                if pid not in out and "get_status" in _manifest_runtime(pid).m.actions:
+                    out.append(pid)
+            except Exception:
+                continue
+    return out
+
+
+def _provider_listers() -> Dict[str, Any]:
+    """list_faxes of each configured cloud backend that has a list API."""
+    out: Dict[str, Any] = {}
+    for backend, svc in (("phaxio", get_phaxio_service()), ("sinch", get_sinch_service()),
+                         ("signalwire", get_signalwire_service())):
+        if svc is not None and svc.is_configured():
+            out[backend] = svc.list_faxes
+    return out
+
+
+async def _provider_status(backend: str, provider_sid: str, job_id: str) -> Dict[str, Any]:
+    """Current ``{status, pages, error}`` of a sent job, fetched from its provider."""
+    async with provider_governor.slot(backend):
+        if backend == "phaxio":
+            svc = get_phaxio_service()
+            res = await svc.get_fax_status(provider_sid)  # type: ignore[union-attr]
+        elif backend == "sinch":
+            sinch = get_sinch_service()
+            res = sinch.map_status(await sinch.get_fax_status(provider_sid))  # type: ignore[union-attr]
+        elif backend == "signalwire":
+            res = await get_signalwire_service().get_fax_status(provider_sid)  # type: ignore[union-attr]
         else:
-            pages, _ = pdf_to_tiff(pdf_path, tiff_path)
+            res = await _manifest_runtime(backend).get_status(job_id=job_id, provider_sid=provider_sid)
+    return {
+        "status": res.get("status"),
+        "pages": _int_or_none(res.get("pages")),
+        "error": res.get("error_message") or res.get("error"),
+    }
+
+
+def _backend_available(backend: str) -> bool:
+    """True when a failover candidate has credentials configured."""
+    try:
+        if backend == "phaxio":
+            svc = get_phaxio_service()
+            return bool(svc and svc.is_configured())
+        if backend == "sinch":
+            return get_sinch_service() is not None
+        if backend == "signalwire":
+            return get_signalwire_service() is not None
+        return _manifest_available(backend)
+    except Exception:
+        return False
+
+
+async def _send_via_backend(backend: str, job_id: str, to: str, pdf_path: str) -> None:
+    sender = _CLOUD_SENDERS.get(backend)
+    if sender is not None:
+        await sender(job_id, to, pdf_path)
     else:
-        pages = None
+        await _send_via_manifest(job_id, to, pdf_path, pid=backend)
 
-    # Create job in DB with backend info
-    with SessionLocal() as db:
-        job = FaxJob(
-            id=job_id,
-            to_number=to,
-            file_name=file.filename,
-            tiff_path=tiff_path,
-            status="queued",
-            pages=pages,
-            backend=ob,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow(),
-        )
-        db.add(job)
-        db.commit()
-    audit_event("job_created", job_id=job_id, backend=ob)
 
-    # Kick off fax sending based on backend
-    if not settings.fax_disabled:
-        if ob == "phaxio":
-            background.add_task(_send_via_phaxio, job_id, to, pdf_path)
-        elif ob == "sinch":
-            background.add_task(_send_via_sinch, job_id, to, pdf_path)
-        elif ob == "signalwire":
-            background.add_task(_send_via_signalwire, job_id, to, pdf_path)
-        elif ob == "freeswitch":
-            background.add_task(_send_via_freeswitch, job_id, to, tiff_path)
-        elif settings.feature_v3_plugins and os.path.exists(manifest_path):
-            background.add_task(_send_via_manifest, job_id, to, pdf_path)
-        else:
-            # Default to SIP/Asterisk
-            background.add_task(_originate_job, job_id, to, tiff_path)
+def _dispatch_failed(
+    job_id: str, error: Any, backend: Optional[str] = None,
+    final_status: str = "failed", retryable: Optional[bool] = None, pages: Optional[int] = None,
+) -> None:
+    """Record a failed attempt; retryable failures are requeued with backoff (see retry.py)."""
+    retry_at = retry.record_failure(
+        job_id, error, backend, final_status=final_status, retryable=retryable, pages=pages,
+    )
+    if retry_at is None:
+        resume.discard(job_id)
+    elif not settings.fax_disabled:
+        send_scheduler.schedule(job_id, retry_at)
 
-    return _serialize_job(job)
+
+async def _send_with_failover(job_id: str, to: str, pdf_path: str, primary: str) -> None:
+    """Send through the best healthy cloud backend, falling over to the next one on retryable
+    errors (5xx, 429, network). A permanent rejection fails the job at once.
+
+    Candidates are the job's backend plus FAX_OUTBOUND_FALLBACKS that are configured,
+    ordered by backend_router. The job's backend column follows the provider in use so
+    callbacks and status refresh talk to the right API.
+    """
+    candidates = [primary] + [b for b in outbound_candidates(primary)[1:] if _backend_available(b)]
+    current = primary
+    errors: List[Exception] = []
+    tried: List[str] = []
+    for backend in backend_router.order(candidates):
+        if backend != current:
+            jobstate.touch(job_id, backend=backend)
+            audit_event("job_failover", job_id=job_id, from_backend=current, to_backend=backend)
+            current = backend
+        # Latency counts from when the governor lets the request out, not from the queue
+        provider_governor.time_request()
+        started = time.monotonic()
+        try:
+            await _send_via_backend(backend, job_id, to, pdf_path)
+        except Exception as e:
+            if not retry.is_retryable(e):
+                # The job itself was refused (bad number, rejected document): another
+                # provider would refuse it too, and the backend is not unhealthy
+                _dispatch_failed(job_id, e, current, retryable=False)
+                return
+            backend_router.record(backend, False, time.monotonic() - (provider_governor.request_started() or started))
+            errors.append(e)
+            tried.append(backend)
+            continue
+        backend_router.record(backend, True, time.monotonic() - (provider_governor.request_started() or started))
+        return
+    # Single-backend deployments keep the provider's own error
+    if len(errors) == 1:
+        _dispatch_failed(job_id, errors[0], current)
+    else:
+        _dispatch_failed(
+            job_id, "; ".join(f"{b}: {e}" for b, e in zip(tried, errors)), current,
+            retryable=any(retry.is_retryable(e) for e in errors),
+        )
 
 
-async def _originate_job(job_id: str, to: str, tiff_path: str):
+async def _originate_job(job_id: str, to: str, tiff_path: str, header: Optional[str] = None):
     try:
         audit_event("job_dispatch", job_id=job_id, method="sip")
-        await ami_client.originate_sendfax(job_id, to, tiff_path)
-        # Mark as started
-        with SessionLocal() as db:
-            job = db.get(FaxJob, job_id)
-            if job:
-                j = cast(Any, job)
-                j.status = "in_progress"
-                j.updated_at = datetime.utcnow()
-                db.add(j)
-                db.commit()
+        # Routes may send over SIP while the outbound backend is a cloud provider
+        ami_client.on_fax_result(_handle_fax_result)
+        await ami_client.originate_sendfax(job_id, to, tiff_path, header)
+        # Mark as started (unless the FaxResult already arrived)
+        jobstate.advance(job_id, jobstate.IN_PROGRESS)
     except Exception as e:
-        with SessionLocal() as db:
-            job = db.get(FaxJob, job_id)
-            if job:
-                j = cast(Any, job)
-                j.status = "failed"
-                j.error = str(e)
-                j.updated_at = datetime.utcnow()
-                db.add(j)
-                db.commit()
-        audit_event("job_failed", job_id=job_id, error=str(e))
+        _dispatch_failed(job_id, e, "sip")
+
+
+@app.get("/fax/events", dependencies=[Depends(require_fax_read)])
+async def fax_events(
+    request: Request,
+    job_id: Optional[List[str]] = Query(default=None),
+    last_event_id: Optional[str] = Query(default=None),
+    info = Depends(require_api_key),
+):
+    """Server-Sent Events stream of status changes for the caller's jobs (every job for admin keys).
+    Resume with the Last-Event-ID header (or ?last_event_id=); ?job_id= narrows the stream.
+    """
+    sub, replay, reset = event_stream.subscribe(
+        _key_id(info), _has_scope(info, "keys:manage"), job_id, request.headers.get("Last-Event-ID") or last_event_id,
+    )
+    return StreamingResponse(
+        event_stream.sse_stream(sub, replay, reset),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _stream_caller(token: Optional[str]) -> Tuple[bool, Optional[dict]]:
+    """(allowed, key info) for a WebSocket client, which may pass its key as ?api_key=."""
+    if settings.api_key and token == settings.api_key:
+        return True, {"key_id": "env", "scopes": ["*"]}
+    info = verify_db_key(token)
+    if info:
+        return _has_scope(info, "fax:read"), info
+    return not (settings.require_api_key or settings.api_key), None
+
+
+@app.websocket("/fax/events/ws")
+async def fax_events_websocket(websocket: WebSocket, api_key: Optional[str] = Header(None, alias="X-API-Key")):
+    """WebSocket variant of /fax/events: one JSON message per event, same scoping and resumption."""
+    allowed, info = _stream_caller(api_key or websocket.query_params.get("api_key"))
+    if not allowed:
+        await websocket.close(code=1008, reason="Unauthorized")
+        return
+    # Subscribed before accepting, so nothing published after the handshake is missed
+    sub, replay, reset = event_stream.subscribe(
+        _key_id(info), _has_scope(info, "keys:manage"), websocket.query_params.getlist("job_id"),
+        websocket.query_params.get("last_event_id"),
+    )
+    try:
+        await websocket.accept()
+        if reset:
+            await websocket.send_json({"type": "reset"})
+        for event in replay:
+            await websocket.send_json(event_stream.public(event))
+        async for event in event_stream.follow(sub):
+            await websocket.send_json(event_stream.public(event) if event is not None else {"type": "keepalive"})
+        # Fell too far behind: the client reconnects with its last event id
+        await websocket.close(code=1013, reason="Too far behind")
+    except WebSocketDisconnect:
+        pass
+    finally:
+        event_stream.unsubscribe(sub)
 
 
 @app.get("/fax/{job_id}", response_model=FaxJobOut, dependencies=[Depends(require_fax_read)])
@@ -2450,19 +3309,83 @@ def get_fax(job_id: str):
     return _serialize_job(job)
 
 
+def _serialize_webhook(sub: Dict[str, Any], with_secret: bool = False) -> WebhookOut:
+    return WebhookOut(
+        id=sub["id"],
+        url=sub["url"],
+        events=sub["events"],
+        batch_size=sub["batch_size"],
+        secret=sub["secret"] if with_secret else None,
+        created_at=sub["created_at"],
+    )
+
+
+@app.post("/webhooks", response_model=WebhookOut, dependencies=[Depends(require_fax_read)])
+def create_webhook(payload: WebhookIn, info = Depends(require_api_key)):
+    """Subscribe an endpoint to status changes of the caller's jobs. The secret is shown once."""
+    url = payload.url.strip()
+    problem = webhooks.check_url(url)
+    if problem:
+        raise HTTPException(400, detail=problem)
+    events = sorted({e.strip() for e in (payload.events or []) if e.strip()})
+    unknown = [e for e in events if e not in jobstate.SOURCES]
+    if unknown:
+        raise HTTPException(400, detail=f"Unknown events: {', '.join(unknown)}; use job statuses: {', '.join(jobstate.SOURCES)}")
+    sub = webhooks.create_subscription(_key_id(info), url, events, payload.batch_size, payload.secret)
+    audit_event("webhook_created", key_id=_key_id(info), webhook_id=sub["id"])
+    return _serialize_webhook(sub, with_secret=True)
+
+
+@app.get("/webhooks", response_model=List[WebhookOut], dependencies=[Depends(require_fax_read)])
+def list_webhooks(info = Depends(require_api_key)):
+    return [_serialize_webhook(s) for s in webhooks.list_subscriptions(_key_id(info))]
+
+
+@app.delete("/webhooks/{webhook_id}", dependencies=[Depends(require_fax_read)])
+def delete_webhook(webhook_id: str, info = Depends(require_api_key)):
+    if not webhooks.delete_subscription(webhook_id, _key_id(info)):
+        raise HTTPException(404, detail="Webhook not found")
+    audit_event("webhook_deleted", key_id=_key_id(info), webhook_id=webhook_id)
+    return {"ok": True}
+
+
 # Admin API key management
 @app.post("/admin/api-keys", response_model=CreateAPIKeyOut, dependencies=[Depends(require_admin)])
 def admin_create_api_key(payload: CreateAPIKeyIn):
+    priority = _key_priority(payload.priority)
     result = create_api_key(
         name=payload.name,
         owner=payload.owner,
         scopes=payload.scopes,
         expires_at=payload.expires_at,
         note=payload.note,
+        priority=priority,
+        dispatch_weight=payload.dispatch_weight,
+        max_in_flight=payload.max_in_flight,
     )
     return CreateAPIKeyOut(**result)  # type: ignore[arg-type]
 
 
+def _key_priority(value: Optional[str]) -> Optional[str]:
+    priority = (value or "").strip().lower() or None
+    if priority and priority not in LANES:
+        raise HTTPException(400, detail=f"'priority' must be one of: {', '.join(LANES)}")
+    return priority
+
+
+@app.patch("/admin/api-keys/{key_id}", response_model=APIKeyMeta, dependencies=[Depends(require_admin)])
+def admin_update_api_key(key_id: str, payload: UpdateAPIKeyIn):
+    """Change a key's dispatch settings (default lane, fair-queuing weight, in-flight cap)."""
+    fields = payload.model_dump(exclude_unset=True)
+    if "priority" in fields:
+        fields["priority"] = _key_priority(fields["priority"])
+    res = update_api_key(key_id, **fields)
+    if not res:
+        raise HTTPException(404, detail="Key not found")
+    tenant_scheduler.forget(key_id)
+    return APIKeyMeta(**res)
+
+
 @app.get("/admin/api-keys", response_model=List[APIKeyMeta], dependencies=[Depends(require_admin)])
 def admin_list_api_keys():
     rows = list_api_keys()
@@ -2515,12 +3438,18 @@ async def _cleanup_once():
         for job in jobs:
             try:
                 if job.updated_at and job.updated_at < cutoff and (job.status in final_statuses):
+                    # Shared artifacts: drop this job's reference; files go with the last one
+                    if job.content_sha256:
+                        artifacts.release(str(job.content_sha256))
+                        job.content_sha256 = None
+                        db.add(job)
+                        db.commit()
                     # Delete PDF
                     pdf_path = os.path.join(data_dir, f"{job.id}.pdf")
                     if os.path.exists(pdf_path):
                         os.remove(pdf_path)
-                    # Delete TIFF
-                    if job.tiff_path and os.path.exists(job.tiff_path):
+                    # Delete TIFF (never a shared content-addressed one)
+                    if job.tiff_path and os.path.exists(job.tiff_path) and not artifacts.is_cas_path(job.tiff_path):
                         try:
                             os.remove(job.tiff_path)
                         except FileNotFoundError:
@@ -2567,6 +3496,18 @@ async def _cleanup_once():
                 except Exception:
                     continue
 
+    # Abandoned resumable uploads
+    try:
+        uploads.expire()
+    except Exception:
+        pass
+
+    # Rendered TIFF cache shares the outbound artifact retention
+    try:
+        tiff_cache.evict_expired()
+    except Exception:
+        pass
+
 
 @app.get("/fax/{job_id}/pdf")
 async def get_fax_pdf(job_id: str, token: str = Query(...)):
@@ -2601,7 +3542,7 @@ async def get_fax_pdf(job_id: str, token: str = Query(...)):
             raise HTTPException(403, detail="Token expired")
 
         # Get the PDF path
-        pdf_path = os.path.join(settings.fax_data_dir, f"{job_id}.pdf")
+        pdf_path = _job_pdf_path(job)
         if not os.path.exists(pdf_path):
             raise HTTPException(404, detail="PDF file not found")
 
@@ -2654,260 +3595,118 @@ async def phaxio_callback(request: Request):
     # Process the callback
     status_info = await phaxio_service.handle_status_callback(callback_data)
     
-    # Update job status
-    with SessionLocal() as db:
-        job = db.get(FaxJob, job_id)
-        if job:
-            job.status = status_info['status']
-            if status_info.get('error_message'):
-                job.error = status_info['error_message']
-            if status_info.get('pages'):
-                job.pages = status_info['pages']
-            job.updated_at = datetime.utcnow()  # type: ignore[assignment]
-            db.add(job)  # type: ignore[arg-type]
-            db.commit()
+    # Update job status (batched with concurrent callbacks)
+    await status_sink.submit(
+        job_id, status=status_info['status'], pages=_int_or_none(status_info.get('pages')),
+        error=status_info.get('error_message'),
+    )
     audit_event("job_updated", job_id=job_id, status=status_info.get('status'), provider="phaxio")
     
     return {"status": "ok"}
 
 
 async def _send_via_phaxio(job_id: str, to: str, pdf_path: str):
-    """Send fax via Phaxio API."""
-    try:
-        phaxio_service = get_phaxio_service()
-        if not phaxio_service or not phaxio_service.is_configured():
-            raise Exception("Phaxio is not properly configured")
-        
-        # Generate a secure token for PDF access with expiry
-        pdf_token = secrets.token_urlsafe(32)
-        ttl = max(1, int(settings.pdf_token_ttl_minutes))
-        expires_at = datetime.utcnow() + timedelta(minutes=ttl)
+    """Send fax via Phaxio API. Raises on failure; the caller marks the job failed or fails over."""
+    phaxio_service = get_phaxio_service()
+    if not phaxio_service or not phaxio_service.is_configured():
+        raise Exception("Phaxio is not properly configured")
+    
+    # Generate a secure token for PDF access with expiry
+    pdf_token = secrets.token_urlsafe(32)
+    ttl = max(1, int(settings.pdf_token_ttl_minutes))
+    expires_at = datetime.utcnow() + timedelta(minutes=ttl)
 
-        # Create public URL for PDF (tokenized)
-        pdf_url = f"{settings.public_api_url}/fax/{job_id}/pdf?token={pdf_token}"
+    # Create public URL for PDF (tokenized)
+    pdf_url = f"{settings.public_api_url}/fax/{job_id}/pdf?token={pdf_token}"
 
-        # Update job with PDF URL/token and mark as in_progress
-        with SessionLocal() as db:
-            job = db.get(FaxJob, job_id)
-            if job:
-                j = cast(Any, job)
-                j.pdf_url = pdf_url
-                j.pdf_token = pdf_token
-                j.pdf_token_expires_at = expires_at
-                j.status = "in_progress"
-                j.updated_at = datetime.utcnow()
-                db.add(j)
-                db.commit()
-        
-        # Send via Phaxio
-        audit_event("job_dispatch", job_id=job_id, method="phaxio")
-        result = await phaxio_service.send_fax(to, pdf_url, job_id)
-        
-        # Update job with provider SID
-        with SessionLocal() as db:
-            job = db.get(FaxJob, job_id)
-            if job:
-                j = cast(Any, job)
-                j.provider_sid = result['provider_sid']
-                j.status = result['status']
-                j.updated_at = datetime.utcnow()
-                db.add(j)
-                db.commit()
-                
-    except Exception as e:
-        with SessionLocal() as db:
-            job = db.get(FaxJob, job_id)
-            if job:
-                j = cast(Any, job)
-                j.status = "failed"
-                j.error = str(e)
-                j.updated_at = datetime.utcnow()
-                db.add(j)
-                db.commit()
-        audit_event("job_failed", job_id=job_id, error=str(e))
+    # Update job with PDF URL/token and mark as in_progress
+    jobstate.advance(job_id, jobstate.IN_PROGRESS, pdf_url=pdf_url, pdf_token=pdf_token, pdf_token_expires_at=expires_at)
+
+    # Send via Phaxio
+    audit_event("job_dispatch", job_id=job_id, method="phaxio")
+    result = await phaxio_service.send_fax(to, pdf_url, job_id)
+    
+    # Update job with provider SID; an accepted fax is in progress until the provider reports back
+    jobstate.advance(job_id, normalize_status(result['status']), provider_sid=result['provider_sid'])
 
 
 async def _send_via_sinch(job_id: str, to: str, pdf_path: str):
-    """Send fax via Sinch Fax API v3 (Phaxio by Sinch)."""
-    try:
-        sinch = get_sinch_service()
-        if not sinch or not sinch.is_configured():
-            raise Exception("Sinch Fax is not properly configured")
-
-        audit_event("job_dispatch", job_id=job_id, method="sinch")
-
-        # Create fax by uploading the PDF directly (multipart/form-data)
-        resp = await sinch.send_fax_file(to, pdf_path)
-
-        fax_id = str(resp.get("id") or resp.get("data", {}).get("id") or "")
-        status = (resp.get("status") or resp.get("data", {}).get("status") or "in_progress").upper()
-        if status == "IN_PROGRESS":
-            internal_status = "in_progress"
-        elif status in {"SUCCESS", "COMPLETED", "COMPLETED_OK"}:
-            internal_status = "SUCCESS"
-        elif status in {"FAILED", "FAILURE", "ERROR"}:
-            internal_status = "FAILED"
-        else:
-            internal_status = "queued"
+    """Send fax via Sinch Fax API v3 (Phaxio by Sinch). Raises on failure."""
+    sinch = get_sinch_service()
+    if not sinch or not sinch.is_configured():
+        raise Exception("Sinch Fax is not properly configured")
 
-        with SessionLocal() as db:
-            job = db.get(FaxJob, job_id)
-            if job:
-                j = cast(Any, job)
-                j.provider_sid = fax_id
-                j.status = internal_status
-                j.updated_at = datetime.utcnow()
-                db.add(j)
-                db.commit()
-    except Exception as e:
-        with SessionLocal() as db:
-            job = db.get(FaxJob, job_id)
-            if job:
-                j = cast(Any, job)
-                j.status = "failed"
-                j.error = str(e)
-                j.updated_at = datetime.utcnow()
-                db.add(j)
-                db.commit()
-        audit_event("job_failed", job_id=job_id, error=str(e))
+    audit_event("job_dispatch", job_id=job_id, method="sinch")
+
+    # Create fax by uploading the PDF directly (multipart/form-data)
+    resp = await sinch.send_fax_file(to, pdf_path)
+
+    fax_id = str(resp.get("id") or resp.get("data", {}).get("id") or "")
+    status = (resp.get("status") or resp.get("data", {}).get("status") or "in_progress").upper()
+    internal_status = normalize_status(sinch.map_status_str(status))
+    jobstate.advance(job_id, internal_status, provider_sid=fax_id)
 
 
 async def _send_via_signalwire(job_id: str, to: str, pdf_path: str):
-    try:
-        svc = get_signalwire_service()
-        if not svc:
-            raise RuntimeError("SignalWire not configured")
-        # Tokenized PDF URL
-        pdf_token = secrets.token_urlsafe(32)
-        ttl = max(1, int(settings.pdf_token_ttl_minutes))
-        expires_at = datetime.utcnow() + timedelta(minutes=ttl)
-        media_url = f"{settings.public_api_url}/fax/{job_id}/pdf?token={pdf_token}"
+    """Send fax via SignalWire. Raises on failure."""
+    svc = get_signalwire_service()
+    if not svc:
+        raise RuntimeError("SignalWire not configured")
+    # Tokenized PDF URL
+    pdf_token = secrets.token_urlsafe(32)
+    ttl = max(1, int(settings.pdf_token_ttl_minutes))
+    expires_at = datetime.utcnow() + timedelta(minutes=ttl)
+    media_url = f"{settings.public_api_url}/fax/{job_id}/pdf?token={pdf_token}"
+    jobstate.advance(job_id, jobstate.IN_PROGRESS, pdf_url=media_url, pdf_token=pdf_token, pdf_token_expires_at=expires_at)
 
-        with SessionLocal() as db:
-            job = db.get(FaxJob, job_id)
-            if job:
-                job.pdf_url = media_url
-                job.pdf_token = pdf_token
-                job.pdf_token_expires_at = expires_at
-                job.status = "in_progress"
-                job.updated_at = datetime.utcnow()
-                db.add(job)
-                db.commit()
-
-        audit_event("job_dispatch", job_id=job_id, method="signalwire")
-        res = await svc.send_fax(to, media_url, job_id)
-        prov_sid = str(res.get("provider_sid") or "")
-        status = str(res.get("status") or "queued")
-        with SessionLocal() as db:
-            job = db.get(FaxJob, job_id)
-            if job:
-                job.provider_sid = prov_sid
-                job.status = status
-                job.updated_at = datetime.utcnow()
-                db.add(job)
-                db.commit()
-    except Exception as e:
-        with SessionLocal() as db:
-            job = db.get(FaxJob, job_id)
-            if job:
-                job.status = "failed"
-                job.error = str(e)
-                job.updated_at = datetime.utcnow()
-                db.add(job)
-                db.commit()
-        audit_event("job_failed", job_id=job_id, error=str(e))
+    audit_event("job_dispatch", job_id=job_id, method="signalwire")
+    res = await svc.send_fax(to, media_url, job_id)
+    prov_sid = str(res.get("provider_sid") or "")
+    jobstate.advance(job_id, normalize_status(res.get("status")), provider_sid=prov_sid)
 
 
-async def _send_via_freeswitch(job_id: str, to: str, tiff_path: str):
+async def _send_via_freeswitch(job_id: str, to: str, tiff_path: str, header: Optional[str] = None):
     try:
         audit_event("job_dispatch", job_id=job_id, method="freeswitch")
         if not fs_cli_available() and not settings.fax_disabled:
             raise RuntimeError("fs_cli not available on API host; install FreeSWITCH client or configure ESL integration")
         # Fire and forget
         if not settings.fax_disabled:
-            res = originate_txfax(to, tiff_path, job_id)
+            res = originate_txfax(to, tiff_path, job_id, header)
         else:
             res = "disabled"
-        with SessionLocal() as db:
-            job = db.get(FaxJob, job_id)
-            if job:
-                j = cast(Any, job)
-                j.status = "in_progress"
-                j.provider_sid = (res or "").strip()
-                j.updated_at = datetime.utcnow()
-                db.add(j)
-                db.commit()
+        jobstate.advance(job_id, jobstate.IN_PROGRESS, provider_sid=(res or "").strip())
     except Exception as e:
-        with SessionLocal() as db:
-            job = db.get(FaxJob, job_id)
-            if job:
-                j = cast(Any, job)
-                j.status = "failed"
-                j.error = str(e)
-                j.updated_at = datetime.utcnow()
-                db.add(j)
-                db.commit()
-        audit_event("job_failed", job_id=job_id, error=str(e))
-
-async def _send_via_manifest(job_id: str, to: str, pdf_path: str):
-    try:
-        pid = settings.fax_backend
-        mpath = os.path.join(os.getcwd(), "config", "providers", pid, "manifest.json")
-        with open(mpath, "r", encoding="utf-8") as f:
-            man = HttpManifest.from_dict(json.load(f))
+        _dispatch_failed(job_id, e, "freeswitch")
 
-        # Generate tokenized PDF URL with expiry
-        pdf_token = secrets.token_urlsafe(32)
-        ttl = max(1, int(settings.pdf_token_ttl_minutes))
-        expires_at = datetime.utcnow() + timedelta(minutes=ttl)
-        pdf_url = f"{settings.public_api_url}/fax/{job_id}/pdf?token={pdf_token}"
+async def _send_via_manifest(job_id: str, to: str, pdf_path: str, pid: Optional[str] = None):
+    """Send fax via an HTTP manifest provider (defaults to FAX_BACKEND). Raises on failure."""
+    pid = pid or settings.fax_backend
+    rt = _manifest_runtime(pid)
 
-        with SessionLocal() as db:
-            job = db.get(FaxJob, job_id)
-            if job:
-                job.pdf_url = pdf_url
-                job.pdf_token = pdf_token
-                job.pdf_token_expires_at = expires_at
-                job.status = "in_progress"
-                job.updated_at = datetime.utcnow()
-                db.add(job)
-                db.commit()
-
-        # Load provider settings from config store if present
-        p_settings: Dict[str, Any] = {}
-        try:
-            if _read_cfg is not None:
-                cfg = _read_cfg(settings.faxbot_config_path)
-                if getattr(cfg, "ok", False) and getattr(cfg, "data", None):
-                    ob = ((cfg.data.get("providers") or {}).get("outbound") or {})
-                    if (ob.get("plugin") or "").lower() == pid.lower():
-                        p_settings = ob.get("settings") or {}
-        except Exception:
-            pass
+    # Generate tokenized PDF URL with expiry
+    pdf_token = secrets.token_urlsafe(32)
+    ttl = max(1, int(settings.pdf_token_ttl_minutes))
+    expires_at = datetime.utcnow() + timedelta(minutes=ttl)
+    pdf_url = f"{settings.public_api_url}/fax/{job_id}/pdf?token={pdf_token}"
+    jobstate.advance(job_id, jobstate.IN_PROGRESS, pdf_url=pdf_url, pdf_token=pdf_token, pdf_token_expires_at=expires_at)
 
-        audit_event("job_dispatch", job_id=job_id, method=f"manifest:{pid}")
-        rt = HttpProviderRuntime(man, {}, p_settings)
+    audit_event("job_dispatch", job_id=job_id, method=f"manifest:{pid}")
+    async with provider_governor.slot(pid):
         res = await rt.send_fax(to=to, file_url=pdf_url)
-        prov_sid = str(res.get("job_id") or "")
-        status = str(res.get("status") or "queued")
-        with SessionLocal() as db:
-            job = db.get(FaxJob, job_id)
-            if job:
-                job.provider_sid = prov_sid
-                job.status = status
-                job.updated_at = datetime.utcnow()
-                db.add(job)
-                db.commit()
-    except Exception as e:
-        with SessionLocal() as db:
-            job = db.get(FaxJob, job_id)
-            if job:
-                job.status = "failed"
-                job.error = str(e)
-                job.updated_at = datetime.utcnow()
-                db.add(job)
-                db.commit()
-        audit_event("job_failed", job_id=job_id, error=str(e))
+    prov_sid = str(res.get("job_id") or "")
+    status = str(res.get("status") or "queued")
+    if status.upper() == "FAILED" and not prov_sid:
+        raise RuntimeError(str(res.get("error") or f"{pid} rejected the fax"))
+    jobstate.advance(job_id, normalize_status(status), provider_sid=prov_sid)
+
+
+# Cloud backends that send from the job PDF; any of them can stand in for another on failover
+_CLOUD_SENDERS = {
+    "phaxio": _send_via_phaxio,
+    "sinch": _send_via_sinch,
+    "signalwire": _send_via_signalwire,
+}
 
 
 def _serialize_job(job: FaxJob) -> FaxJobOut:
@@ -2920,6 +3719,9 @@ def _serialize_job(job: FaxJob) -> FaxJobOut:
         pages=j.pages,
         backend=j.backend,
         provider_sid=j.provider_sid,
+        send_at=j.send_at,
+        priority=j.priority or "normal",
+        attempts=int(j.attempts or 0),
         created_at=j.created_at,
         updated_at=j.updated_at,
     )
@@ -3228,7 +4030,7 @@ async def phaxio_inbound(request: Request):
         with open(local_pdf, "wb") as f:
             f.write(pdf_bytes)
         size_bytes = len(pdf_bytes)
-        pages_int = None
+        pages_int = await asyncio.to_thread(count_pdf_pages_bytes, pdf_bytes)
         sha256_hex = hashlib.sha256(pdf_bytes).hexdigest()
 
     storage = get_storage()
@@ -3351,7 +4153,7 @@ async def sinch_inbound(request: Request):
         with open(local_pdf, "wb") as f:
             f.write(pdf_bytes)
         size_bytes = len(pdf_bytes)
-        pages_int = None
+        pages_int = await asyncio.to_thread(count_pdf_pages_bytes, pdf_bytes)
         sha256_hex = hashlib.sha256(pdf_bytes).hexdigest()
 
     storage = get_storage()
@@ -3395,7 +4197,7 @@ async def _handle_http_exc(request: Request, exc: HTTPException):
         audit_event("api_error", path=request.url.path, status=exc.status_code, detail=str(exc.detail))
     except Exception:
         pass
-    return JSONResponse({"detail": exc.detail}, status_code=exc.status_code)
+    return JSONResponse({"detail": exc.detail}, status_code=exc.status_code, headers=getattr(exc, "headers", None))
 
 
 @app.exception_handler(Exception)
@@ -3650,6 +4452,8 @@ def update_plugin_config(plugin_id: str, payload: UpdatePluginConfigIn):
         data["providers"]["outbound"]["plugin"] = pid
         data["providers"]["outbound"]["enabled"] = bool(payload.enabled) if payload.enabled is not None else True
         data["providers"]["outbound"]["settings"] = payload.settings or data["providers"]["outbound"].get("settings", {})
+        # Kept per plugin too, for when another provider becomes the outbound one
+        data["providers"].setdefault("plugin_settings", {})[pid] = data["providers"]["outbound"]["settings"]
     wr = _write_cfg(settings.faxbot_config_path, data)
     if not wr.ok:
         raise HTTPException(500, detail=wr.error or "Failed to write config")
@@ -3704,18 +4508,13 @@ async def signalwire_callback(request: Request, job_id: Optional[str] = Query(de
     prov_sid = str(res.get('provider_sid') or '')
     status = str(res.get('status') or '')
     # Update job by job_id if present, else by provider_sid best-effort
-    with SessionLocal() as db:
-        job = None
-        if job_id:
-            job = db.get(FaxJob, str(job_id))
-        if not job and prov_sid:
-            job = db.query(FaxJob).filter(FaxJob.provider_sid == prov_sid).first()
-        if job:
-            job.status = status or job.status
-            job.updated_at = datetime.utcnow()
-            db.add(job)
-            db.commit()
-            audit_event("job_updated", job_id=job.id, status=job.status, provider="signalwire")
+    updated = None
+    if job_id:
+        updated = await status_sink.submit(str(job_id), status=status)
+    if not updated and prov_sid:
+        updated = await status_sink.submit(provider_sid=prov_sid, status=status)
+    if updated:
+        audit_event("job_updated", job_id=updated, status=status or None, provider="signalwire")
     return {"ok": True}
 class FSOutboundResultIn(BaseModel):
     job_id: Optional[str] = None
@@ -3727,7 +4526,7 @@ class FSOutboundResultIn(BaseModel):
 
 
 @app.post("/_internal/freeswitch/outbound_result")
-def freeswitch_outbound_result(payload: FSOutboundResultIn, x_internal_secret: Optional[str] = Header(default=None)):
+async def freeswitch_outbound_result(payload: FSOutboundResultIn, x_internal_secret: Optional[str] = Header(default=None)):
     # Reuse Asterisk secret for simplicity; can introduce a dedicated FS secret later
     secret = settings.asterisk_inbound_secret
     if not secret:
@@ -3745,18 +4544,24 @@ def freeswitch_outbound_result(payload: FSOutboundResultIn, x_internal_secret: O
     }
     status = (payload.fax_status or payload.fax_result_text or '').upper()
     internal = status_map.get(status, 'FAILED' if 'FAIL' in status else 'in_progress')
-    with SessionLocal() as db:
-        job = db.get(FaxJob, str(payload.job_id))
-        if not job:
-            raise HTTPException(404, detail="Job not found")
-        job.status = internal
-        if payload.fax_document_transferred_pages:
-            job.pages = payload.fax_document_transferred_pages
-        if payload.fax_result_text:
-            job.error = None if internal == 'SUCCESS' else payload.fax_result_text
-        job.updated_at = datetime.utcnow()
-        db.add(job)
-        db.commit()
+    if internal == 'FAILED':
+        with SessionLocal() as db:
+            if not db.get(FaxJob, str(payload.job_id)):
+                raise HTTPException(404, detail="Job not found")
+        # Line failures go back to the queue with backoff; delivered pages are skipped on the retry
+        _dispatch_failed(
+            str(payload.job_id), payload.fax_result_text or "Fax transmission failed", "freeswitch",
+            final_status=internal, pages=payload.fax_document_transferred_pages,
+        )
+        return {"ok": True}
+    updated = await status_sink.submit(
+        str(payload.job_id), status=internal, pages=payload.fax_document_transferred_pages,
+        error=payload.fax_result_text,
+    )
+    if not updated:
+        raise HTTPException(404, detail="Job not found")
+    if internal == 'SUCCESS':
+        resume.discard(str(payload.job_id))
     audit_event("job_updated", job_id=str(payload.job_id), status=internal, provider="freeswitch")                                                              
     return {"ok": True}
 
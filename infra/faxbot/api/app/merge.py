@@ -0,0 +1,368 @@
+"""Mail-merge broadcasts: one TXT template, one recipient dataset, one fax per row.
+
+The template is compiled once per broadcast (``{{field}}`` placeholders split out of
+the text), so rendering a recipient is a string join. Rows are parsed incrementally
+from the stored CSV, JSON Lines or JSON array file, ``ROW_CHUNK`` at a time on a worker
+thread, so neither a large dataset nor skipping to the cursor blocks the event loop.
+Each rendered letter goes through the normal outbound pipeline before the next one, so
+dispatch starts with the first recipient and no more than one document is in flight
+per broadcast.
+
+``fax_broadcasts.cursor`` counts consumed rows and is advanced in the same transaction
+that inserts the row's job, under a lease like the dispatch queue. After a restart (or
+in another process once the lease lapses) rendering resumes at the cursor without
+duplicating jobs.
+"""
+import asyncio
+import contextlib
+import csv
+import json
+import logging
+import os
+import re
+import shutil
+from itertools import islice
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Set
+
+from sqlalchemy import or_, select, update  # type: ignore
+
+from .config import settings
+from .db import SessionLocal, FaxBroadcast
+from .dispatcher import job_dispatcher
+from .audit import audit_event
+
+logger = logging.getLogger(__name__)
+
+# Rows parsed per worker-thread hop while rendering
+ROW_CHUNK = 100
+# Characters read at a time from a JSON array dataset
+JSON_READ_CHARS = 64 * 1024
+
+PLACEHOLDER_RE = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_.\-]*)\s*\}\}")
+
+RowHandler = Callable[[FaxBroadcast, int, Dict[str, str], str], Awaitable[None]]
+
+
+class LeaseLost(Exception):
+    """Another process took over the broadcast; stop rendering it here."""
+
+
+class MergeTemplate:
+    def __init__(self, text: str):
+        # Alternating literal text and field names: [lit, field, lit, field, ..., lit]
+        self._parts = PLACEHOLDER_RE.split(text)
+        self.fields: Set[str] = set(self._parts[1::2])
+
+    def render(self, row: Dict[str, Any]) -> str:
+        out = list(self._parts)
+        for i in range(1, len(out), 2):
+            out[i] = _field_value(row.get(out[i]))
+        return "".join(out)
+
+
+def _field_value(value: Any) -> str:
+    if value is None:
+        return ""
+    # Keep the template's line layout: values never add lines or pages
+    return re.sub(r"[\r\n\f\v]+", " ", str(value))
+
+
+def detect_format(filename: Optional[str], head: bytes) -> str:
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".json", ".jsonl", ".ndjson")):
+        return "json"
+    return "json" if head.lstrip(b"\xef\xbb\xbf \t\r\n")[:1] in (b"[", b"{") else "csv"
+
+
+def csv_header(path: str) -> List[str]:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return list(csv.DictReader(f).fieldnames or [])
+
+
+def _json_array(f: Any) -> Iterator[Any]:
+    """Items of the top-level JSON array in ``f``, decoded one at a time."""
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+
+    def more() -> bool:
+        nonlocal buf, pos, eof
+        data = "" if eof else f.read(JSON_READ_CHARS)
+        if not data:
+            eof = True
+            return False
+        buf, pos = buf[pos:] + data, 0
+        return True
+
+    def skip(chars: str) -> None:
+        nonlocal pos
+        while True:
+            while pos < len(buf) and (buf[pos].isspace() or buf[pos] in chars):
+                pos += 1
+            if pos < len(buf) or not more():
+                return
+
+    skip("")
+    if buf[pos:pos + 1] != "[":
+        raise ValueError("expected a JSON array")
+    pos += 1
+    while True:
+        skip(",")
+        if pos >= len(buf):
+            raise ValueError("unterminated JSON array")
+        if buf[pos] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if more():
+                continue
+            raise
+        # A number at the end of the buffer may continue in the next read
+        if end >= len(buf) and more():
+            continue
+        pos = end
+        yield item
+
+
+def _take(rows: Iterator[Dict[str, Any]], count: int) -> List[Dict[str, Any]]:
+    return list(islice(rows, count))
+
+
+def _skip(rows: Iterator[Dict[str, Any]], count: int) -> None:
+    for _ in islice(rows, count):
+        pass
+
+
+def iter_rows(path: str, fmt: str) -> Iterator[Dict[str, Any]]:
+    """Rows as dicts, parsed incrementally for CSV, JSON Lines and JSON arrays alike."""
+    if fmt == "csv":
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            yield from csv.DictReader(f)
+        return
+    with open(path, encoding="utf-8-sig") as f:
+        first = f.read(1)
+        while first and first.isspace():
+            first = f.read(1)
+        if first == "[":
+            f.seek(0)
+            for row in _json_array(f):
+                yield row if isinstance(row, dict) else {}
+            return
+        f.seek(0)
+        for line in f:
+            line = line.strip()
+            if line:
+                row = json.loads(line)
+                yield row if isinstance(row, dict) else {}
+
+
+class BroadcastRunner:
+    """Renders claimed broadcasts row by row; up to ``MERGE_WORKERS`` at a time per process."""
+
+    def __init__(self):
+        self.instance_id = job_dispatcher.instance_id
+        self._handler: Optional[RowHandler] = None
+        self._supervisor: Optional[asyncio.Task] = None
+        self._running: Dict[str, asyncio.Task] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stats: Dict[str, int] = {"rows": 0, "jobs": 0, "failed_rows": 0, "completed": 0}
+
+    def broadcast_dir(self, broadcast_id: str) -> str:
+        return os.path.join(settings.fax_data_dir, "broadcasts", broadcast_id)
+
+    def _lease_until(self) -> datetime:
+        return datetime.utcnow() + timedelta(seconds=max(1, settings.dispatch_lease_seconds))
+
+    # ----- DB primitives -----
+
+    def claim_next(self) -> Optional[str]:
+        now = datetime.utcnow()
+        with SessionLocal() as db:
+            ids = db.execute(
+                select(FaxBroadcast.id)
+                .where(FaxBroadcast.status == "rendering",
+                       or_(FaxBroadcast.lease_expires_at.is_(None), FaxBroadcast.lease_expires_at < now))
+                .order_by(FaxBroadcast.created_at)
+                .limit(5)
+            ).scalars().all()
+            for broadcast_id in ids:
+                if broadcast_id in self._running:
+                    continue
+                res = db.execute(
+                    update(FaxBroadcast)
+                    .where(FaxBroadcast.id == broadcast_id, FaxBroadcast.status == "rendering",
+                           or_(FaxBroadcast.lease_expires_at.is_(None), FaxBroadcast.lease_expires_at < now))
+                    .values(lease_owner=self.instance_id, lease_expires_at=self._lease_until())
+                    .execution_options(synchronize_session=False)
+                )
+                db.commit()
+                if res.rowcount == 1:
+                    return broadcast_id
+        return None
+
+    def advance(self, db: Any, broadcast_id: str, index: int, created: bool, error: Optional[str] = None) -> None:
+        """Move the cursor past row ``index`` inside the caller's transaction; renews the lease.
+
+        Raises LeaseLost when this process no longer owns the broadcast.
+        """
+        values: Dict[str, Any] = {
+            "cursor": index + 1,
+            "lease_expires_at": self._lease_until(),
+            "updated_at": datetime.utcnow(),
+        }
+        if created:
+            values["created_jobs"] = FaxBroadcast.created_jobs + 1
+        else:
+            values["failed_rows"] = FaxBroadcast.failed_rows + 1
+            values["error"] = error
+        res = db.execute(
+            update(FaxBroadcast)
+            .where(FaxBroadcast.id == broadcast_id, FaxBroadcast.lease_owner == self.instance_id,
+                   FaxBroadcast.cursor == index)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if res.rowcount != 1:
+            db.rollback()
+            raise LeaseLost(broadcast_id)
+
+    def _finish(self, broadcast_id: str, status: str, error: Optional[str] = None) -> None:
+        values: Dict[str, Any] = {"status": status, "lease_owner": None, "lease_expires_at": None,
+                                  "updated_at": datetime.utcnow()}
+        if error:
+            values["error"] = error
+        with SessionLocal() as db:
+            db.execute(
+                update(FaxBroadcast)
+                .where(FaxBroadcast.id == broadcast_id, FaxBroadcast.lease_owner == self.instance_id)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        shutil.rmtree(self.broadcast_dir(broadcast_id), ignore_errors=True)
+
+    def _release(self, broadcast_id: str) -> None:
+        with SessionLocal() as db:
+            db.execute(
+                update(FaxBroadcast)
+                .where(FaxBroadcast.id == broadcast_id, FaxBroadcast.lease_owner == self.instance_id)
+                .values(lease_owner=None, lease_expires_at=None)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+
+    # ----- rendering -----
+
+    async def _render(self, broadcast_id: str) -> None:
+        assert self._handler is not None
+        with SessionLocal() as db:
+            b = db.get(FaxBroadcast, broadcast_id)
+        if b is None:
+            return
+        try:
+            with open(str(b.template_path), encoding="utf-8", errors="ignore") as f:
+                template = MergeTemplate(f.read())
+            index = int(b.cursor or 0)
+            rows = iter_rows(str(b.data_path), str(b.data_format))
+            try:
+                await asyncio.to_thread(_skip, rows, index)
+                while True:
+                    chunk = await asyncio.to_thread(_take, rows, ROW_CHUNK)
+                    if not chunk:
+                        break
+                    for row in chunk:
+                        await self._render_row(b, index, row, template)
+                        index += 1
+            finally:
+                # Still parsing on a worker thread if cancelled there; the file closes with the generator
+                with contextlib.suppress(ValueError):
+                    rows.close()
+        except LeaseLost:
+            logger.warning(f"Broadcast {broadcast_id} taken over by another process")
+            return
+        except asyncio.CancelledError:
+            self._release(broadcast_id)
+            raise
+        except Exception as e:
+            # Unreadable template or dataset: nothing more can be rendered
+            logger.error(f"Broadcast {broadcast_id} failed: {e}")
+            self._finish(broadcast_id, "failed", str(e)[:500])
+            audit_event("broadcast_failed", job_id=broadcast_id)
+            return
+        self._finish(broadcast_id, "complete")
+        self._stats["completed"] += 1
+        audit_event("broadcast_completed", job_id=broadcast_id)
+
+    async def _render_row(self, b: FaxBroadcast, index: int, row: Dict[str, Any], template: MergeTemplate) -> None:
+        assert self._handler is not None
+        self._stats["rows"] += 1
+        try:
+            await self._handler(b, index, row, template.render(row))
+            self._stats["jobs"] += 1
+        except (LeaseLost, asyncio.CancelledError):
+            raise
+        except Exception as e:
+            self._stats["failed_rows"] += 1
+            detail = getattr(e, "detail", None) or str(e) or e.__class__.__name__
+            with SessionLocal() as db:
+                self.advance(db, str(b.id), index, created=False, error=f"row {index + 1}: {detail}"[:500])
+                db.commit()
+
+    # ----- supervisor -----
+
+    def notify(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self, handler: RowHandler) -> None:
+        if self._supervisor is not None or settings.merge_workers <= 0:
+            return
+        self._handler = handler
+        self._wakeup = asyncio.Event()
+        self._supervisor = asyncio.create_task(self._supervise())
+
+    async def stop(self) -> None:
+        tasks = list(self._running.values())
+        if self._supervisor is not None:
+            tasks.append(self._supervisor)
+        self._supervisor = None
+        for t in tasks:
+            t.cancel()
+        for t in tasks:
+            try:
+                await t
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._running.clear()
+        self._wakeup = None
+
+    async def _supervise(self) -> None:
+        assert self._wakeup is not None
+        while True:
+            while len(self._running) < settings.merge_workers:
+                try:
+                    broadcast_id = self.claim_next()
+                except Exception as e:
+                    logger.error(f"Broadcast claim failed: {e}")
+                    broadcast_id = None
+                if broadcast_id is None:
+                    break
+                task = asyncio.create_task(self._render(broadcast_id))
+                self._running[broadcast_id] = task
+                task.add_done_callback(lambda _t, bid=broadcast_id: (self._running.pop(bid, None), self.notify()))
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.05, settings.dispatch_poll_seconds))
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = dict(self._stats)
+        out["active"] = len(self._running)
+        return out
+
+
+broadcast_runner = BroadcastRunner()
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -15,5 +15,40 @@ class FaxJobOut(BaseModel):
     pages: Optional[int] = None
     backend: str = "sip"  # "sip" or "phaxio"
     provider_sid: Optional[str] = None  # Phaxio fax ID or other cloud provider ID
+    send_at: Optional[datetime] = None  # scheduled send time (UTC), when deferred
+    priority: str = "normal"  # dispatch lane: urgent | normal | bulk
+    attempts: int = 0  # failed dispatch attempts; a pending retry shows in send_at
     created_at: datetime
     updated_at: datetime
+
+
+class FaxBatchOut(BaseModel):
+    jobs: List[FaxJobOut]
+
+
+class BroadcastOut(BaseModel):
+    id: str
+    status: str
+    template: str
+    rows_processed: int = 0
+    jobs_created: int = 0
+    rows_failed: int = 0
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+
+class WebhookIn(BaseModel):
+    url: str = Field(..., description="HTTPS endpoint that receives job status changes")
+    events: Optional[List[str]] = None  # job statuses to send; all when omitted
+    batch_size: int = Field(default=1, ge=1, le=100)  # events per POST; above 1 the body is {"events": [...]}
+    secret: Optional[str] = Field(default=None, min_length=16)  # HMAC signing key; generated when omitted
+
+
+class WebhookOut(BaseModel):
+    id: str
+    url: str
+    events: List[str] = []
+    batch_size: int = 1
+    secret: Optional[str] = None  # returned only when the subscription is created
+    created_at: datetime
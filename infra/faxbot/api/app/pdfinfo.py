@@ -0,0 +1,449 @@
+"""Pure-Python PDF page counting.
+
+Reads the cross-reference data (classic ``xref`` tables and PDF 1.5 xref/object
+streams), follows ``/Root`` → ``/Pages`` and walks the page tree. When the xref is
+damaged the object table is rebuilt by scanning for ``N G obj`` headers, the same
+repair strategy Ghostscript uses. Only what page counting needs is implemented: no
+content streams, fonts or decryption (object streams of encrypted files fall back to
+the raw ``/Type /Page`` scan).
+"""
+import re
+import zlib
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+
+class PDFSyntaxError(ValueError):
+    pass
+
+
+class Ref(NamedTuple):
+    num: int
+    gen: int
+
+
+class Name(str):
+    """A PDF name (``/Type``) stored without the slash, distinct from byte strings."""
+
+
+_WS = b" \t\r\n\f\x00"
+_DELIM = b"()<>[]{}/%"
+_NUM_RE = re.compile(rb"[+-]?(?:\d+\.?\d*|\.\d+)")
+_REF_RE = re.compile(rb"\s*(\d+)\s+R(?![^\s()<>\[\]{}/%])")
+_OBJ_HDR_RE = re.compile(rb"(\d+)\s+(\d+)\s+obj\b")
+_MAX_DEPTH = 64
+
+
+class _Lexer:
+    def __init__(self, data: bytes, pos: int = 0):
+        self.data = data
+        self.pos = pos
+
+    def skip_ws(self) -> None:
+        data, n = self.data, len(self.data)
+        while self.pos < n:
+            c = data[self.pos]
+            if c in _WS:
+                self.pos += 1
+            elif c == 0x25:  # % comment
+                while self.pos < n and data[self.pos] not in b"\r\n":
+                    self.pos += 1
+            else:
+                break
+
+    def _regular(self) -> bytes:
+        start, data, n = self.pos, self.data, len(self.data)
+        while self.pos < n and data[self.pos] not in _WS and data[self.pos] not in _DELIM:
+            self.pos += 1
+        return data[start:self.pos]
+
+    def keyword(self) -> bytes:
+        self.skip_ws()
+        return self._regular()
+
+    def parse(self, depth: int = 0) -> Any:
+        if depth > _MAX_DEPTH:
+            raise PDFSyntaxError("object nesting too deep")
+        self.skip_ws()
+        data = self.data
+        if self.pos >= len(data):
+            raise PDFSyntaxError("unexpected end of data")
+        c = data[self.pos:self.pos + 1]
+        if data.startswith(b"<<", self.pos):
+            self.pos += 2
+            out: Dict[str, Any] = {}
+            while True:
+                self.skip_ws()
+                if data.startswith(b">>", self.pos):
+                    self.pos += 2
+                    return out
+                key = self.parse(depth + 1)
+                if not isinstance(key, Name):
+                    raise PDFSyntaxError("dictionary key is not a name")
+                out[str(key)] = self.parse(depth + 1)
+        if c == b"[":
+            self.pos += 1
+            arr: List[Any] = []
+            while True:
+                self.skip_ws()
+                if data.startswith(b"]", self.pos):
+                    self.pos += 1
+                    return arr
+                arr.append(self.parse(depth + 1))
+        if c == b"/":
+            self.pos += 1
+            raw = self._regular()
+            return Name(re.sub(rb"#([0-9A-Fa-f]{2})", lambda m: bytes([int(m.group(1), 16)]), raw).decode("latin-1"))
+        if c == b"(":
+            return self._literal_string()
+        if c == b"<":
+            end = data.find(b">", self.pos)
+            if end < 0:
+                raise PDFSyntaxError("unterminated hex string")
+            hexdigits = re.sub(rb"[^0-9A-Fa-f]", b"", data[self.pos + 1:end])
+            self.pos = end + 1
+            if len(hexdigits) % 2:
+                hexdigits += b"0"
+            return bytes.fromhex(hexdigits.decode("ascii"))
+        m = _NUM_RE.match(data, self.pos)
+        if m:
+            tok = m.group(0)
+            self.pos = m.end()
+            if b"." not in tok:
+                r = _REF_RE.match(data, self.pos)
+                if r and not tok.startswith((b"+", b"-")):
+                    self.pos = r.end()
+                    return Ref(int(tok), int(r.group(1)))
+                return int(tok)
+            return float(tok)
+        word = self._regular()
+        if word == b"true":
+            return True
+        if word == b"false":
+            return False
+        if word == b"null":
+            return None
+        raise PDFSyntaxError(f"unexpected token {word[:20]!r} at {self.pos}")
+
+    def _literal_string(self) -> bytes:
+        data, n = self.data, len(self.data)
+        self.pos += 1
+        start, depth = self.pos, 1
+        while self.pos < n:
+            c = data[self.pos]
+            if c == 0x5C:  # backslash escapes the next byte
+                self.pos += 2
+                continue
+            if c == 0x28:
+                depth += 1
+            elif c == 0x29:
+                depth -= 1
+                if depth == 0:
+                    self.pos += 1
+                    return data[start:self.pos - 1]
+            self.pos += 1
+        raise PDFSyntaxError("unterminated string")
+
+
+def _png_unpredict(raw: bytes, columns: int) -> bytes:
+    """Undo PNG row predictors (Predictor >= 10), as used by most xref streams."""
+    row_len = columns
+    out = bytearray()
+    prev = bytearray(row_len)
+    for i in range(0, len(raw), row_len + 1):
+        ftype = raw[i]
+        row = bytearray(raw[i + 1:i + 1 + row_len])
+        for j in range(len(row)):
+            left = row[j - 1] if j else 0
+            up = prev[j]
+            if ftype == 1:
+                row[j] = (row[j] + left) & 0xFF
+            elif ftype == 2:
+                row[j] = (row[j] + up) & 0xFF
+            elif ftype == 3:
+                row[j] = (row[j] + ((left + up) >> 1)) & 0xFF
+            elif ftype == 4:
+                ul = prev[j - 1] if j else 0
+                p = left + up - ul
+                pa, pb, pc = abs(p - left), abs(p - up), abs(p - ul)
+                pred = left if pa <= pb and pa <= pc else (up if pb <= pc else ul)
+                row[j] = (row[j] + pred) & 0xFF
+        out += row
+        prev = row
+    return bytes(out)
+
+
+class _PdfDocument:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.offsets: Dict[int, int] = {}
+        self.in_objstm: Dict[int, Tuple[int, int]] = {}
+        self.trailer: Dict[str, Any] = {}
+        self._cache: Dict[int, Any] = {}
+        self._objstm: Dict[int, Dict[int, Any]] = {}
+
+    # ----- object access -----
+
+    def resolve(self, obj: Any, depth: int = 0) -> Any:
+        while isinstance(obj, Ref) and depth < _MAX_DEPTH:
+            obj = self.get(obj.num)
+            depth += 1
+        return obj
+
+    def get(self, num: int) -> Any:
+        if num in self._cache:
+            return self._cache[num]
+        self._cache[num] = None  # cycle guard
+        val: Any = None
+        if num in self.offsets:
+            try:
+                val, _ = self._read_indirect(self.offsets[num])
+            except PDFSyntaxError:
+                val = None
+        elif num in self.in_objstm:
+            stm_num, idx = self.in_objstm[num]
+            val = self._objstm_objects(stm_num).get(num)
+        self._cache[num] = val
+        return val
+
+    def _read_indirect(self, offset: int) -> Tuple[Any, Optional[bytes]]:
+        m = _OBJ_HDR_RE.match(self.data, offset)
+        if not m:
+            # Tolerate slightly wrong offsets (leading whitespace / EOL differences)
+            m = _OBJ_HDR_RE.search(self.data, offset, offset + 64)
+            if not m:
+                raise PDFSyntaxError(f"no object at {offset}")
+        lex = _Lexer(self.data, m.end())
+        val = lex.parse()
+        stream: Optional[bytes] = None
+        if isinstance(val, dict) and lex.keyword() == b"stream":
+            pos = lex.pos
+            if self.data.startswith(b"\r\n", pos):
+                pos += 2
+            elif self.data.startswith(b"\n", pos) or self.data.startswith(b"\r", pos):
+                pos += 1
+            length = self.resolve(val.get("Length"))
+            end = pos + length if isinstance(length, int) and length >= 0 else -1
+            if end < 0 or self.data.find(b"endstream", end, end + 32) < 0:
+                end = self.data.find(b"endstream", pos)
+                if end < 0:
+                    raise PDFSyntaxError("unterminated stream")
+            stream = self.data[pos:end]
+        return val, stream
+
+    def _decode(self, d: Dict[str, Any], raw: bytes) -> bytes:
+        filters = self.resolve(d.get("Filter"))
+        if isinstance(filters, Name):
+            filters = [filters]
+        parms = self.resolve(d.get("DecodeParms"))
+        if isinstance(parms, list):
+            parms = parms[0] if parms else None
+        out = raw
+        for f in (filters or []):
+            if f in ("FlateDecode", "Fl"):
+                try:
+                    out = zlib.decompress(out)
+                except zlib.error:
+                    out = zlib.decompressobj().decompress(out)
+            else:
+                raise PDFSyntaxError(f"unsupported filter {f}")
+        if isinstance(parms, dict) and int(self.resolve(parms.get("Predictor")) or 1) >= 10:
+            out = _png_unpredict(out, int(self.resolve(parms.get("Columns")) or 1))
+        return out
+
+    def _objstm_objects(self, stm_num: int) -> Dict[int, Any]:
+        if stm_num in self._objstm:
+            return self._objstm[stm_num]
+        self._objstm[stm_num] = {}
+        offset = self.offsets.get(stm_num)
+        if offset is None:
+            return {}
+        try:
+            d, raw = self._read_indirect(offset)
+            if not isinstance(d, dict) or raw is None:
+                return {}
+            body = self._decode(d, raw)
+            n, first = int(self.resolve(d.get("N")) or 0), int(self.resolve(d.get("First")) or 0)
+            lex = _Lexer(body)
+            pairs = [(lex.parse(), lex.parse()) for _ in range(n)]
+            objs: Dict[int, Any] = {}
+            for num, off in pairs:
+                try:
+                    objs[int(num)] = _Lexer(body, first + int(off)).parse()
+                except PDFSyntaxError:
+                    continue
+            self._objstm[stm_num] = objs
+        except (PDFSyntaxError, ValueError, TypeError):
+            pass
+        return self._objstm[stm_num]
+
+    # ----- cross-reference loading -----
+
+    def load_xref(self) -> None:
+        tail = self.data[-2048:]
+        idx = tail.rfind(b"startxref")
+        if idx < 0:
+            raise PDFSyntaxError("startxref not found")
+        m = re.match(rb"startxref\s+(\d+)", tail[idx:])
+        if not m:
+            raise PDFSyntaxError("bad startxref")
+        pos: Optional[int] = int(m.group(1))
+        seen: Set[int] = set()
+        while pos is not None and pos not in seen and 0 <= pos < len(self.data):
+            seen.add(pos)
+            lex = _Lexer(self.data, pos)
+            lex.skip_ws()
+            if self.data.startswith(b"xref", lex.pos):
+                trailer = self._read_xref_table(lex.pos + 4)
+                stm = trailer.get("XRefStm")
+                if isinstance(stm, int) and stm not in seen:
+                    seen.add(stm)
+                    self._read_xref_stream(stm)
+            else:
+                trailer = self._read_xref_stream(pos)
+            for k, v in trailer.items():
+                self.trailer.setdefault(k, v)
+            prev = trailer.get("Prev")
+            pos = prev if isinstance(prev, int) else None
+        if "Root" not in self.trailer:
+            raise PDFSyntaxError("trailer has no /Root")
+
+    def _read_xref_table(self, pos: int) -> Dict[str, Any]:
+        lex = _Lexer(self.data, pos)
+        while True:
+            lex.skip_ws()
+            if self.data.startswith(b"trailer", lex.pos):
+                lex.pos += len(b"trailer")
+                trailer = lex.parse()
+                if not isinstance(trailer, dict):
+                    raise PDFSyntaxError("bad trailer")
+                return trailer
+            start, count = lex.parse(), lex.parse()
+            if not isinstance(start, int) or not isinstance(count, int):
+                raise PDFSyntaxError("bad xref subsection")
+            for i in range(count):
+                off, _gen, kind = lex.parse(), lex.parse(), lex.keyword()
+                if kind == b"n" and isinstance(off, int) and off > 0:
+                    self.offsets.setdefault(start + i, off)
+
+    def _read_xref_stream(self, pos: int) -> Dict[str, Any]:
+        d, raw = self._read_indirect(pos)
+        if not isinstance(d, dict) or raw is None or d.get("Type") != "XRef":
+            raise PDFSyntaxError("expected xref stream")
+        body = self._decode(d, raw)
+        widths = [int(w) for w in (self.resolve(d.get("W")) or [])]
+        if len(widths) != 3:
+            raise PDFSyntaxError("bad /W")
+        size = int(self.resolve(d.get("Size")) or 0)
+        index = self.resolve(d.get("Index")) or [0, size]
+        rec = sum(widths)
+        p = 0
+
+        def field(i: int, default: int) -> int:
+            nonlocal p
+            w = widths[i]
+            if w == 0:
+                return default
+            v = int.from_bytes(body[p:p + w], "big")
+            p += w
+            return v
+
+        for j in range(0, len(index) - 1, 2):
+            start, count = int(index[j]), int(index[j + 1])
+            for i in range(count):
+                if p + rec > len(body):
+                    break
+                kind, a, b = field(0, 1), field(1, 0), field(2, 0)
+                num = start + i
+                if num in self.offsets or num in self.in_objstm:
+                    continue
+                if kind == 1 and a > 0:
+                    self.offsets[num] = a
+                elif kind == 2:
+                    self.in_objstm[num] = (a, b)
+        return {k: v for k, v in d.items() if k in ("Root", "Prev", "Info", "Size", "Encrypt")}
+
+    def rebuild(self) -> None:
+        """Repair path: index every ``N G obj`` header and find the catalog."""
+        self.offsets.clear()
+        self.in_objstm.clear()
+        self._cache.clear()
+        self._objstm.clear()
+        for m in _OBJ_HDR_RE.finditer(self.data):
+            self.offsets[int(m.group(1))] = m.start()  # later definitions win
+        root = self.trailer.get("Root")
+        if isinstance(root, Ref) and isinstance(self.get(root.num), dict):
+            return
+        for num in list(self.offsets):
+            obj = self.get(num)
+            if isinstance(obj, dict) and obj.get("Type") == "ObjStm":
+                for inner, val in self._objstm_objects(num).items():
+                    self._cache.setdefault(inner, val)
+                    self.in_objstm.setdefault(inner, (num, 0))
+        for num in list(self.offsets) + list(self.in_objstm):
+            obj = self.get(num)
+            if isinstance(obj, dict) and obj.get("Type") == "Catalog":
+                self.trailer["Root"] = Ref(num, 0)
+                return
+        raise PDFSyntaxError("catalog not found")
+
+    # ----- page tree -----
+
+    def page_count(self) -> int:
+        catalog = self.resolve(self.trailer.get("Root"))
+        if not isinstance(catalog, dict):
+            raise PDFSyntaxError("catalog missing")
+        pages_ref = catalog.get("Pages")
+        root = self.resolve(pages_ref)
+        if not isinstance(root, dict):
+            raise PDFSyntaxError("page tree missing")
+        seen: Set[int] = set()
+
+        def walk(node_ref: Any, depth: int) -> int:
+            if isinstance(node_ref, Ref):
+                if node_ref.num in seen:
+                    return 0
+                seen.add(node_ref.num)
+            node = self.resolve(node_ref)
+            if not isinstance(node, dict) or depth > _MAX_DEPTH:
+                return 0
+            kids = self.resolve(node.get("Kids"))
+            if node.get("Type") == "Pages" or isinstance(kids, list):
+                return sum(walk(k, depth + 1) for k in (kids or []))
+            return 1
+
+        walked = walk(pages_ref, 0)
+        declared = self.resolve(root.get("Count"))
+        if walked > 0:
+            return walked
+        if isinstance(declared, int) and declared > 0:
+            return declared
+        raise PDFSyntaxError("empty page tree")
+
+
+def count_pdf_pages_bytes(data: bytes) -> Optional[int]:
+    """Number of pages in a PDF held in memory, or None when it cannot be determined."""
+    if not data or b"%PDF" not in data[:1024]:
+        return None
+    doc = _PdfDocument(data)
+    try:
+        doc.load_xref()
+        return doc.page_count()
+    except (PDFSyntaxError, ValueError, TypeError, IndexError, zlib.error):
+        pass
+    try:
+        doc.rebuild()
+        return doc.page_count()
+    except (PDFSyntaxError, ValueError, TypeError, IndexError, zlib.error):
+        pass
+    # Last resort: count uncompressed page leaves
+    leaves = len(re.findall(rb"/Type\s*/Page(?![A-Za-z])", data))
+    return leaves or None
+
+
+def count_pdf_pages_file(pdf_path: str) -> Optional[int]:
+    try:
+        with open(pdf_path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    return count_pdf_pages_bytes(data)
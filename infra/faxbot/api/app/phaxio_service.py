@@ -1,9 +1,11 @@
-import asyncio
-from typing import Optional, Dict, Any
+from datetime import datetime
+from typing import Optional, Dict, Any, AsyncIterator
 import httpx
 import logging
 
 from .config import settings, reload_settings
+from .governor import provider_governor
+from .retry import ProviderError
 
 logger = logging.getLogger(__name__)
 
@@ -68,49 +70,39 @@ class PhaxioFaxService:
 
         auth = (self.api_key, self.api_secret)
 
-        # Basic retry with exponential backoff
-        attempts = 3
-        delay = 1.0
-        from typing import Optional
-        last_err: Optional[Exception] = None
+        # One attempt per dispatch; failed dispatches are retried with backoff by the queue (see retry.py)
         async with httpx.AsyncClient(timeout=30.0) as client:
-            for _ in range(attempts):
-                try:
-                    resp = await client.post(f"{self.BASE_URL}/faxes", data=data, auth=auth)
-                    if resp.status_code >= 400:
-                        try:
-                            j = resp.json()
-                            msg = j.get("message") or str(j)
-                        except Exception:
-                            msg = resp.text
-                        error_msg = f"Phaxio API error {resp.status_code}: {msg}"
-                        logger.error(error_msg)
-                        raise Exception(error_msg)
-                    
-                    payload = resp.json()
-                    if not payload.get("success", False):
-                        error_msg = f"Phaxio API returned success=false: {payload.get('message', 'Unknown error')}"
-                        logger.error(error_msg)
-                        raise Exception(error_msg)
-                        
-                    data = payload.get("data", {})
-                    fax_id = data.get("id")
-                    if not fax_id:
-                        raise Exception("Phaxio API did not return a fax ID")
-                        
-                    result = {
-                        "provider_sid": str(fax_id),
-                        "status": self._map_status_str(data.get("status", "queued")),
-                    }
-                    logger.info(f"Phaxio fax sent successfully: {result}")
-                    return result
-                except Exception as e:
-                    last_err = e
-                    await asyncio.sleep(delay)
-                    delay = min(delay * 2, 8.0)
-        # Exhausted retries
-        assert last_err is not None
-        raise last_err
+            async with provider_governor.slot("phaxio"):
+                resp = await client.post(f"{self.BASE_URL}/faxes", data=data, auth=auth)
+        if resp.status_code == 429:
+            provider_governor.backoff("phaxio", resp.headers.get("Retry-After"))
+        if resp.status_code >= 400:
+            try:
+                j = resp.json()
+                msg = j.get("message") or str(j)
+            except Exception:
+                msg = resp.text
+            error_msg = f"Phaxio API error {resp.status_code}: {msg}"
+            logger.error(error_msg)
+            raise ProviderError(error_msg, status_code=resp.status_code)
+
+        payload = resp.json()
+        if not payload.get("success", False):
+            error_msg = f"Phaxio API returned success=false: {payload.get('message', 'Unknown error')}"
+            logger.error(error_msg)
+            raise ProviderError(error_msg, status_code=resp.status_code)
+
+        data = payload.get("data", {})
+        fax_id = data.get("id")
+        if not fax_id:
+            raise Exception("Phaxio API did not return a fax ID")
+
+        result = {
+            "provider_sid": str(fax_id),
+            "status": self._map_status_str(data.get("status", "queued")),
+        }
+        logger.info(f"Phaxio fax sent successfully: {result}")
+        return result
 
     async def get_fax_status(self, provider_sid: str) -> Dict[str, Any]:
         if not self.is_configured():
@@ -122,6 +114,34 @@ class PhaxioFaxService:
             payload = resp.json().get("data", {})
             return self._map_status(payload)
 
+    async def list_faxes(self, since: datetime, until: datetime) -> AsyncIterator[Dict[str, Any]]:
+        """Sent faxes created in [since, until] (UTC), mapped like get_fax_status, page by page."""
+        if not self.is_configured():
+            raise ValueError("Phaxio is not properly configured")
+        auth = (self.api_key, self.api_secret)
+        params: Dict[str, Any] = {
+            "direction": "sent",
+            "created_after": since.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "created_before": until.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "per_page": 1000,
+            "page": 1,
+        }
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            while True:
+                async with provider_governor.slot("phaxio"):
+                    resp = await client.get(f"{self.BASE_URL}/faxes", params=params, auth=auth)
+                if resp.status_code == 429:
+                    provider_governor.backoff("phaxio", resp.headers.get("Retry-After"))
+                if resp.status_code >= 400:
+                    raise ProviderError(f"Phaxio API error {resp.status_code}: {resp.text}", status_code=resp.status_code)
+                body = resp.json()
+                for item in body.get("data") or []:
+                    yield self._map_status(item)
+                paging = body.get("paging") or {}
+                if params["page"] * int(paging.get("per_page") or params["per_page"]) >= int(paging.get("total") or 0):
+                    return
+                params["page"] += 1
+
     async def cancel_fax(self, provider_sid: str) -> bool:
         if not self.is_configured():
             raise ValueError("Phaxio is not properly configured")
@@ -0,0 +1,136 @@
+"""Background status polling for jobs whose provider callback may never arrive.
+
+Every tick the poller reads the ``in_progress`` jobs that have a ``provider_sid`` on a
+pollable backend and picks the ones that are due. A job is polled again after
+``clamp(age / 4, STATUS_POLL_SECONDS, STATUS_POLL_MAX_SECONDS)``, so a fresh fax is
+checked every minute while one that has been in flight for hours is checked a few times
+an hour. Due jobs are fetched with at most ``STATUS_POLL_CONCURRENCY`` requests in
+flight (each also paced by the provider governor), and what came back is written in
+one batched update (see jobstatus.py). Poll times are kept in memory per process.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select  # type: ignore
+
+from .config import settings
+from .db import SessionLocal, FaxJob
+from .jobstatus import apply_updates, observed
+
+logger = logging.getLogger(__name__)
+
+# Jobs polled per tick at most; the rest wait for the next one
+MAX_PER_TICK = 500
+
+# (backend, provider_sid, job_id) → {status, pages?, error?}
+Fetcher = Callable[[str, str, str], Awaitable[Dict[str, Any]]]
+
+
+def poll_interval(age_seconds: float, backend: Optional[str] = None) -> float:
+    base = float(settings.status_poll_seconds)
+    if backend == "signalwire" and settings.signalwire_status_poll_seconds > 0:
+        base = float(settings.signalwire_status_poll_seconds)
+    base = max(1.0, base)
+    return min(max(base, age_seconds / 4), max(base, float(settings.status_poll_max_seconds)))
+
+
+class StatusPoller:
+    def __init__(self):
+        self._fetch: Optional[Fetcher] = None
+        self._backends: Callable[[], Sequence[str]] = lambda: ()
+        self._task: Optional[asyncio.Task] = None
+        self._last: Dict[str, float] = {}
+        self._stats: Dict[str, int] = {"polls": 0, "updated": 0, "errors": 0, "ticks": 0}
+
+    def due(self, rows: Sequence[Tuple[str, str, str, datetime]], now: Optional[float] = None) -> List[Tuple[str, str, str]]:
+        """(job id, backend, provider sid) of rows due for a poll, oldest poll first."""
+        mono = time.monotonic() if now is None else now
+        wall = datetime.utcnow()
+        live = {r[0] for r in rows}
+        for job_id in [j for j in self._last if j not in live]:
+            del self._last[job_id]
+        out: List[Tuple[float, str, str, str]] = []
+        for job_id, backend, sid, started in rows:
+            age = (wall - started).total_seconds() if started else 0.0
+            last = self._last.get(job_id)
+            if last is None or mono - last >= poll_interval(age, backend):
+                out.append((last or 0.0, job_id, backend, sid))
+        out.sort()
+        return [(j, b, s) for _, j, b, s in out[:MAX_PER_TICK]]
+
+    async def poll_once(self) -> int:
+        """One pass: poll every due job and write the changes. Returns rows updated."""
+        assert self._fetch is not None
+        backends = list(self._backends())
+        if not backends:
+            return 0
+        with SessionLocal() as db:
+            rows = db.execute(
+                select(FaxJob.id, FaxJob.backend, FaxJob.provider_sid,
+                       func.coalesce(FaxJob.dispatched_at, FaxJob.created_at), FaxJob.pages, FaxJob.error)
+                .where(FaxJob.status == "in_progress", FaxJob.backend.in_(backends),
+                       FaxJob.provider_sid.is_not(None), FaxJob.provider_sid != "")
+            ).all()
+        current = {r[0]: (r[4], r[5]) for r in rows}
+        due = self.due([(r[0], r[1], r[2], r[3]) for r in rows])
+        if not due:
+            return 0
+        sem = asyncio.Semaphore(max(1, settings.status_poll_concurrency))
+        fetch = self._fetch
+
+        async def one(job_id: str, backend: str, sid: str) -> Optional[Dict[str, Any]]:
+            async with sem:
+                self._last[job_id] = time.monotonic()
+                try:
+                    return await fetch(backend, sid, job_id)
+                except Exception as e:
+                    self._stats["errors"] += 1
+                    logger.warning(f"Status poll failed for job {job_id} ({backend}): {e}")
+                    return None
+
+        results = await asyncio.gather(*[one(*d) for d in due])
+        self._stats["polls"] += len(due)
+        updates: List[Dict[str, Any]] = []
+        for (job_id, _, _), res in zip(due, results):
+            update = observed(job_id, res, *current[job_id]) if res else None
+            if update:
+                updates.append(update)
+        changed = await asyncio.to_thread(apply_updates, updates) if updates else 0
+        self._stats["updated"] += changed
+        return changed
+
+    def start(self, fetch: Fetcher, backends: Callable[[], Sequence[str]]) -> None:
+        if self._task is not None or settings.status_poll_seconds <= 0:
+            return
+        self._fetch = fetch
+        self._backends = backends
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.poll_once()
+            except Exception as e:
+                logger.error(f"Status poll pass failed: {e}")
+            self._stats["ticks"] += 1
+            await asyncio.sleep(max(1.0, settings.status_poll_seconds / 4))
+
+    def stats(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = dict(self._stats)
+        out["tracked"] = len(self._last)
+        return out
+
+
+status_poller = StatusPoller()
@@ -0,0 +1,130 @@
+"""Bulk reconciliation of in-flight jobs against the providers' list-faxes APIs.
+
+After a webhook outage tens of thousands of jobs can sit ``in_progress`` although the
+provider finished them long ago. A sweep loads a backend's in-flight jobs into a map of
+``provider_sid`` → job, pages through the provider's fax list for the time window those
+jobs were sent in (1000 faxes per call), and applies every status, page and error change
+through the batched writer in jobstatus.py. Recovering 50k jobs costs about 50 list
+calls instead of 50k status requests. Paging stops early once every job is matched.
+
+Sweeps run every ``RECONCILE_INTERVAL_SECONDS`` per backend and on demand from
+``POST /admin/reconcile``; one sweep per backend at a time.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from sqlalchemy import func, select  # type: ignore
+
+from .config import settings
+from .db import SessionLocal, FaxJob
+from .jobstatus import apply_updates, observed
+
+logger = logging.getLogger(__name__)
+
+# Provider clocks and queueing: the window opens this long before the oldest dispatch
+WINDOW_MARGIN = timedelta(minutes=10)
+# Updates written per batched transaction while a sweep is paging
+FLUSH_EVERY = 1000
+
+# (since, until) → provider faxes mapped to {provider_sid, status, pages?, error_message?}
+Lister = Callable[[datetime, datetime], AsyncIterator[Dict[str, Any]]]
+
+
+class Reconciler:
+    def __init__(self):
+        self._listers: Callable[[], Dict[str, Lister]] = lambda: {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._last: Dict[str, Dict[str, Any]] = {}
+
+    async def sweep(self, backend: str, lister: Optional[Lister] = None) -> Dict[str, Any]:
+        """Reconcile one backend's in-progress jobs. Returns the sweep summary."""
+        lister = lister or self._listers().get(backend)
+        if lister is None:
+            raise KeyError(backend)
+        async with self._locks.setdefault(backend, asyncio.Lock()):
+            started = time.monotonic()
+            with SessionLocal() as db:
+                rows = db.execute(
+                    select(FaxJob.id, FaxJob.provider_sid, FaxJob.pages, FaxJob.error,
+                           func.coalesce(FaxJob.dispatched_at, FaxJob.created_at))
+                    .where(FaxJob.status == "in_progress", FaxJob.backend == backend,
+                           FaxJob.provider_sid.is_not(None), FaxJob.provider_sid != "")
+                ).all()
+            pending = {str(r[1]): (r[0], r[2], r[3]) for r in rows}
+            summary: Dict[str, Any] = {"backend": backend, "in_flight": len(pending), "listed": 0,
+                                       "matched": 0, "updated": 0}
+            if pending:
+                now = datetime.utcnow()
+                starts = [r[4] for r in rows if r[4] is not None]
+                oldest = min(starts) if starts else now
+                since = max(oldest - WINDOW_MARGIN, now - timedelta(hours=max(1, settings.reconcile_max_hours)))
+                summary["since"] = since.isoformat()
+                updates: List[Dict[str, Any]] = []
+                items = lister(since, now)
+                try:
+                    async for item in items:
+                        summary["listed"] += 1
+                        hit = pending.pop(str(item.get("provider_sid") or ""), None)
+                        if hit is None:
+                            continue
+                        summary["matched"] += 1
+                        job_id, old_pages, old_error = hit
+                        res = {"status": item.get("status"), "pages": item.get("pages"),
+                               "error": item.get("error_message") or item.get("error")}
+                        update = observed(job_id, res, old_pages, old_error)
+                        if update:
+                            updates.append(update)
+                        if len(updates) >= FLUSH_EVERY:
+                            summary["updated"] += await asyncio.to_thread(apply_updates, updates)
+                            updates = []
+                        if not pending:
+                            break
+                finally:
+                    await items.aclose()  # type: ignore[attr-defined]
+                    if updates:
+                        summary["updated"] += await asyncio.to_thread(apply_updates, updates)
+            summary["duration_ms"] = int((time.monotonic() - started) * 1000)
+            summary["finished_at"] = datetime.utcnow().isoformat()
+            self._last[backend] = summary
+            return summary
+
+    async def sweep_all(self, listers: Optional[Dict[str, Lister]] = None) -> List[Dict[str, Any]]:
+        out: List[Dict[str, Any]] = []
+        for backend, lister in sorted((listers if listers is not None else self._listers()).items()):
+            try:
+                out.append(await self.sweep(backend, lister))
+            except Exception as e:
+                logger.error(f"Reconciliation of {backend} failed: {e}")
+                out.append({"backend": backend, "error": str(e)})
+                self._last[backend] = out[-1]
+        return out
+
+    def start(self, listers: Callable[[], Dict[str, Lister]]) -> None:
+        self._listers = listers
+        if self._task is not None or settings.reconcile_interval_seconds <= 0:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(max(1, settings.reconcile_interval_seconds))
+            await self.sweep_all()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"interval_seconds": settings.reconcile_interval_seconds, "last": dict(self._last)}
+
+
+reconciler = Reconciler()
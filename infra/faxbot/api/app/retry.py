@@ -0,0 +1,155 @@
+"""Retries for failed outbound dispatches.
+
+A failure is classified as retryable (provider 5xx/408/429, network errors and
+timeouts, busy or unanswered lines) or permanent (other 4xx, missing configuration,
+invalid numbers). A retryable failure puts the job back in the dispatch queue with
+``send_at`` pushed out by jittered exponential backoff, so nothing holds a task while
+it waits; the send scheduler wakes a worker when it falls due. Every failed attempt is
+appended to ``fax_jobs.attempt_log``. After ``RETRY_MAX_ATTEMPTS`` attempts, or on a
+permanent failure, the job fails for good.
+"""
+import asyncio
+import json
+import random
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Union
+
+import httpx
+from sqlalchemy import func  # type: ignore
+
+from .config import settings
+from .db import SessionLocal, FaxJob
+from .audit import audit_event
+from . import jobstate
+
+# Attempts kept in fax_jobs.attempt_log
+MAX_LOG_ENTRIES = 20
+
+_RETRYABLE_STATUS = {408, 425, 429}
+_STATUS_RE = re.compile(r"\b(?:error|http)\s+(\d{3})\b", re.I)
+_PERMANENT_RE = re.compile(
+    r"not (?:properly )?configured|not available|invalid|unallocated|not in service|rejected|"
+    r"blocked|forbidden|unauthori[sz]ed|unsupported|no such|does not exist",
+    re.I,
+)
+
+
+class ProviderError(Exception):
+    """Provider API rejection; ``status_code`` drives retry classification."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _status_retryable(code: int) -> bool:
+    return code >= 500 or code in _RETRYABLE_STATUS
+
+
+def is_retryable(error: Union[BaseException, str]) -> bool:
+    if isinstance(error, ProviderError) and error.status_code is not None:
+        return _status_retryable(error.status_code)
+    if isinstance(error, httpx.HTTPStatusError):
+        return _status_retryable(error.response.status_code)
+    if isinstance(error, (httpx.TransportError, asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    if isinstance(error, (FileNotFoundError, PermissionError)):
+        return False
+    text = str(error)
+    m = _STATUS_RE.search(text)
+    if m:
+        return _status_retryable(int(m.group(1)))
+    if _PERMANENT_RE.search(text):
+        return False
+    # Unrecognized errors get the benefit of the doubt; the retry budget bounds them
+    return True
+
+
+def backoff_seconds(attempt: int, base: Optional[float] = None, cap: Optional[float] = None) -> float:
+    """Delay before retry number ``attempt`` (1-based): exponential, capped, half of it jittered.
+
+    ``base`` and ``cap`` default to RETRY_BASE_SECONDS and RETRY_MAX_SECONDS.
+    """
+    cap = max(1.0, float(settings.retry_max_seconds if cap is None else cap))
+    base = float(settings.retry_base_seconds if base is None else base)
+    delay = min(cap, max(1.0, base) * (2 ** max(0, attempt - 1)))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def attempt_log(job: FaxJob) -> List[Dict[str, Any]]:
+    raw = getattr(job, "attempt_log", None)
+    if not raw:
+        return []
+    try:
+        entries = json.loads(raw)
+    except ValueError:
+        return []
+    return entries if isinstance(entries, list) else []
+
+
+def record_failure(
+    job_id: str,
+    error: Union[BaseException, str],
+    backend: Optional[str] = None,
+    final_status: str = "failed",
+    retryable: Optional[bool] = None,
+    pages: Optional[int] = None,
+) -> Optional[datetime]:
+    """Log a failed attempt and requeue the job with backoff when it is retryable and
+    within budget. Returns the retry time, or None when the job has failed for good
+    (its status is then ``final_status``) or had already finished. ``retryable`` overrides
+    classification; ``pages`` is how many pages the attempt delivered before failing (see
+    resume.py).
+    """
+    message = str(error) or error.__class__.__name__
+    if retryable is None:
+        retryable = is_retryable(error)
+    # Optimistic: the write only lands if no other failure was recorded in between
+    for _ in range(3):
+        now = datetime.utcnow()
+        retry_at: Optional[datetime] = None
+        with SessionLocal() as db:
+            job = db.get(FaxJob, job_id)
+        if job is None:
+            return None
+        j: Any = job
+        seen = int(j.attempts or 0)
+        attempts = seen + 1
+        log = attempt_log(job)
+        log.append({
+            "attempt": attempts,
+            "at": now.isoformat(),
+            "backend": backend or j.backend,
+            "error": message[:500],
+            "retryable": retryable,
+            "pages": pages,
+        })
+        values: Dict[str, Any] = {
+            "attempts": attempts,
+            "attempt_log": json.dumps(log[-MAX_LOG_ENTRIES:]),
+            "error": message,
+            "updated_at": now,
+        }
+        if pages:
+            values["pages_sent"] = int(j.pages_sent or 0) + pages
+        if retryable and attempts < settings.retry_max_attempts:
+            retry_at = now + timedelta(seconds=backoff_seconds(attempts))
+            # Back in the queue; clearing the lease also keeps the worker's release from marking it dispatched
+            to = jobstate.QUEUED
+            values.update(send_at=retry_at, ready_at=retry_at, dispatched_at=None, lease_owner=None, lease_expires_at=None,
+                          provider_sid=None)
+        else:
+            to = final_status
+        if not jobstate.can(j.status, to):
+            # Finished meanwhile (e.g. a SUCCESS callback won the race); nothing to record
+            return None
+        if jobstate.transition(job_id, to, where=[func.coalesce(FaxJob.attempts, 0) == seen], **values):
+            break
+    else:
+        return None
+    if retry_at is not None:
+        audit_event("job_retry_scheduled", job_id=job_id, attempt=attempts, retry_at=retry_at.isoformat(), error=message)
+    else:
+        audit_event("job_failed", job_id=job_id, error=message, attempts=attempts, retryable=retryable)
+    return retry_at
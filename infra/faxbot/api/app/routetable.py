@@ -0,0 +1,186 @@
+"""Destination-prefix routing: pick the outbound backend for a number by its longest prefix.
+
+Routes map a dialing prefix to a backend id, e.g. ``+1`` → ``sip`` for domestic calls
+over our own trunk and ``+44`` → ``sinch``. They come from ``FAX_ROUTES_FILE`` (default
+``config/routes.json``; a JSON object of prefix → backend, ``"*"`` for the default) and
+from ``FAX_ROUTES`` (``+44=sinch,+1=sip``), which wins on conflicts. Both are compiled
+into a digit trie, so a lookup walks the number once with no database or file access.
+The file is re-checked at most every ``RELOAD_CHECK_SECONDS`` and a changed table is
+swapped in whole; a file that fails to parse leaves the previous table in place.
+Numbers without a matching route use the active outbound backend. Routes to a backend
+that is not configured (no credentials, no AMI login) are skipped and reported in
+``problems``, so those numbers fall back to the outbound backend too.
+"""
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from .config import settings, valid_backends
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of the routes file for changes
+RELOAD_CHECK_SECONDS = 2.0
+
+# Trie node: digit → child node; the None key holds the (prefix, backend) ending here
+Node = Dict[Optional[str], Any]
+
+
+def _digits(value: str) -> str:
+    return "".join(ch for ch in value if ch.isdigit())
+
+
+def compile_routes(routes: Dict[str, str], usable: Optional[Callable[[str], bool]] = None) -> Tuple[Node, List[str]]:
+    """Build the trie from prefix → backend. Returns (root, problems); bad entries are skipped.
+
+    ``usable`` (if given) tells whether a known backend is configured to send.
+    """
+    root: Node = {}
+    problems: List[str] = []
+    known = valid_backends()
+    for prefix, backend in routes.items():
+        backend = str(backend or "").strip().lower()
+        if backend not in known:
+            problems.append(f"{prefix}: unknown backend '{backend}'")
+            continue
+        if usable is not None and not usable(backend):
+            problems.append(f"{prefix}: backend '{backend}' is not configured")
+            continue
+        key = "" if str(prefix).strip() == "*" else _digits(str(prefix))
+        if not key and str(prefix).strip() != "*":
+            problems.append(f"{prefix}: prefix has no digits")
+            continue
+        node = root
+        for ch in key:
+            node = node.setdefault(ch, {})
+        node[None] = (str(prefix).strip(), backend)
+    return root, problems
+
+
+def _backends(node: Node) -> Set[str]:
+    out: Set[str] = set()
+    for key, child in node.items():
+        if key is None:
+            out.add(child[1])
+        else:
+            out |= _backends(child)
+    return out
+
+
+def parse_inline(value: str) -> Dict[str, str]:
+    out: Dict[str, str] = {}
+    for part in (value or "").split(","):
+        prefix, sep, backend = part.partition("=")
+        if sep and prefix.strip():
+            out[prefix.strip()] = backend.strip()
+    return out
+
+
+class RouteTable:
+    def __init__(self):
+        self._root: Node = {}
+        self._count = 0
+        self._inline: Optional[str] = None
+        self._source: Optional[Tuple[str, str, Optional[float]]] = None
+        self._next_check = 0.0
+        self._loaded_at: Optional[datetime] = None
+        self._problems: List[str] = []
+        self._hits: Dict[str, int] = {}
+        self._backends: Set[str] = set()
+        self._usable: Optional[Callable[[str], bool]] = None
+
+    def set_usable(self, check: Optional[Callable[[str], bool]]) -> None:
+        """Set the configured-backend check and recompile the routes with it."""
+        self._usable = check
+        self._source = None
+        self._next_check = 0.0
+
+    def _path(self) -> str:
+        path = settings.fax_routes_file or os.path.join("config", "routes.json")
+        return path if os.path.isabs(path) else os.path.join(os.getcwd(), path)
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        inline = settings.fax_routes or ""
+        if inline == self._inline and now < self._next_check:
+            return
+        self._inline = inline
+        self._next_check = now + RELOAD_CHECK_SECONDS
+        path = self._path()
+        try:
+            mtime: Optional[float] = os.stat(path).st_mtime
+        except OSError:
+            mtime = None
+        source = (inline, path, mtime)
+        if source == self._source:
+            return
+        self.load(path if mtime is not None else None, inline)
+        self._source = source
+
+    def load(self, path: Optional[str], inline: str = "") -> None:
+        """Compile the file at ``path`` (if any) plus inline routes and swap them in."""
+        routes: Dict[str, str] = {}
+        problems: List[str] = []
+        if path:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if not isinstance(data, dict):
+                    raise ValueError("expected a JSON object of prefix → backend")
+                routes.update({str(k): str(v) for k, v in data.items()})
+            except (OSError, ValueError) as e:
+                logger.error(f"Routes file {path} not loaded, keeping previous routes: {e}")
+                self._problems = [f"{path}: {e}"]
+                return
+        routes.update(parse_inline(inline))
+        root, bad = compile_routes(routes, self._usable)
+        problems.extend(bad)
+        for p in problems:
+            logger.warning(f"Route skipped: {p}")
+        self._root, self._count, self._problems = root, len(routes) - len(bad), problems
+        self._backends = _backends(root)
+        self._loaded_at = datetime.utcnow()
+
+    def match(self, number: str) -> Optional[Tuple[str, str]]:
+        """Longest matching (prefix, backend) for ``number``, or None."""
+        self._refresh()
+        node = self._root
+        best = node.get(None)
+        for ch in number:
+            if not ch.isdigit():
+                continue
+            node = node.get(ch)
+            if node is None:
+                break
+            hit = node.get(None)
+            if hit is not None:
+                best = hit
+        return best
+
+    def backend_for(self, number: str) -> Optional[str]:
+        hit = self.match(number)
+        if hit is None:
+            return None
+        self._hits[hit[0]] = self._hits.get(hit[0], 0) + 1
+        return hit[1]
+
+    def backends(self) -> Set[str]:
+        """Backends some route sends to."""
+        self._refresh()
+        return set(self._backends)
+
+    def stats(self) -> Dict[str, Any]:
+        self._refresh()
+        return {
+            "routes": self._count,
+            "file": self._source[1] if self._source and self._source[2] is not None else None,
+            "loaded_at": self._loaded_at.isoformat() if self._loaded_at else None,
+            "problems": list(self._problems),
+            "hits": dict(sorted(self._hits.items(), key=lambda kv: -kv[1])[:50]),
+        }
+
+
+route_table = RouteTable()
@@ -0,0 +1,67 @@
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Tuple
+
+from .config import settings
+
+
+class BackendRouter:
+    """Rolling health/latency scoring for outbound cloud backends.
+
+    Each send attempt records (ok, latency). A backend is unhealthy once it has at
+    least ``routing_min_samples`` recent attempts and its success rate falls below
+    ``routing_unhealthy_success_rate``. ``order()`` puts healthy backends first, best
+    success rate then lowest p95 latency; unhealthy ones are kept last so a job still
+    goes out if every backend is degraded. Samples age out after
+    ``routing_window_seconds``, which is how a recovered provider comes back.
+    """
+
+    def __init__(self, max_samples: int = 200):
+        self._samples: Dict[str, Deque[Tuple[float, bool, float]]] = {}
+        self._max_samples = max_samples
+
+    def record(self, backend: str, ok: bool, latency_s: float) -> None:
+        dq = self._samples.setdefault(backend, deque(maxlen=self._max_samples))
+        dq.append((time.monotonic(), bool(ok), max(0.0, float(latency_s))))
+
+    def _recent(self, backend: str) -> List[Tuple[float, bool, float]]:
+        dq = self._samples.get(backend)
+        if not dq:
+            return []
+        cutoff = time.monotonic() - max(1, settings.routing_window_seconds)
+        while dq and dq[0][0] < cutoff:
+            dq.popleft()
+        return list(dq)
+
+    def health(self, backend: str) -> Dict[str, Any]:
+        recent = self._recent(backend)
+        n = len(recent)
+        if not n:
+            return {"samples": 0, "success_rate": None, "p95_ms": None, "healthy": True}
+        ok = sum(1 for _, good, _ in recent if good)
+        lat = sorted(l for _, _, l in recent)
+        p95 = lat[min(n - 1, int(round(0.95 * (n - 1))))]
+        rate = ok / n
+        healthy = n < settings.routing_min_samples or rate >= settings.routing_unhealthy_success_rate
+        return {"samples": n, "success_rate": round(rate, 3), "p95_ms": int(p95 * 1000), "healthy": healthy}
+
+    def order(self, candidates: List[str]) -> List[str]:
+        """Return candidates best-first. Ties keep the configured order (primary first)."""
+        def key(item: Tuple[int, str]):
+            idx, b = item
+            h = self.health(b)
+            rate = 1.0 if h["success_rate"] is None else h["success_rate"]
+            p95 = 0 if h["p95_ms"] is None else h["p95_ms"]
+            # Bucket the scores so small jitter does not flap traffic between providers
+            return (not h["healthy"], -round(rate * 20), p95 // 500, idx)
+        seen: List[str] = []
+        for b in candidates:
+            if b and b not in seen:
+                seen.append(b)
+        return [b for _, b in sorted(enumerate(seen), key=key)]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {b: self.health(b) for b in list(self._samples.keys())}
+
+
+backend_router = BackendRouter()
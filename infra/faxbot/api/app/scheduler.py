@@ -0,0 +1,115 @@
+"""Delayed sends: wake the dispatch workers exactly when a scheduled job falls due.
+
+Jobs created with ``send_at`` stay ``queued`` in fax_jobs and are simply not ready
+(see ``JobDispatcher._ready``) until that time, so the table remains the source of truth
+and any process sharing the database will send them. This module keeps the due times
+in a min-heap and a single task sleeps until the earliest one, then notifies the
+dispatcher, so a job scheduled for 09:00:00 is claimed at 09:00:00 rather than on the
+next idle poll. On startup (and whenever the in-memory window runs dry) the heap is
+refilled from the database, so timers survive restarts.
+"""
+import asyncio
+import heapq
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select  # type: ignore
+
+from .db import SessionLocal, FaxJob
+from .dispatcher import job_dispatcher
+
+logger = logging.getLogger(__name__)
+
+# Due times held in memory; later ones are loaded as the heap drains
+PRELOAD = 10000
+
+
+class SendScheduler:
+    def __init__(self):
+        self._heap: List[Tuple[datetime, str]] = []
+        self._truncated = False
+        self._horizon: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stats: Dict[str, int] = {"scheduled": 0, "fired": 0, "recovered": 0}
+
+    def recover(self) -> int:
+        """Load the earliest ``PRELOAD`` pending send times from the database."""
+        now = datetime.utcnow()
+        with SessionLocal() as db:
+            rows = db.execute(
+                select(FaxJob.send_at, FaxJob.id)
+                .where(FaxJob.status == "queued", FaxJob.dispatched_at.is_(None), FaxJob.send_at > now)
+                .order_by(FaxJob.send_at)
+                .limit(PRELOAD)
+            ).all()
+        self._heap = [(r[0], r[1]) for r in rows]
+        heapq.heapify(self._heap)
+        self._truncated = len(rows) >= PRELOAD
+        self._horizon = rows[-1][0] if self._truncated else None
+        self._stats["recovered"] += len(rows)
+        return len(rows)
+
+    def schedule(self, job_id: str, send_at: datetime) -> None:
+        """Register a newly created job; wakes the timer if it is now the earliest."""
+        if self._horizon is not None and send_at > self._horizon:
+            # Beyond the loaded window; the next refill picks it up
+            return
+        earliest = self._heap[0][0] if self._heap else None
+        heapq.heappush(self._heap, (send_at, job_id))
+        self._stats["scheduled"] += 1
+        if self._wakeup is not None and (earliest is None or send_at < earliest):
+            self._wakeup.set()
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._wakeup = None
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None
+        while True:
+            now = datetime.utcnow()
+            fired = 0
+            while self._heap and self._heap[0][0] <= now:
+                heapq.heappop(self._heap)
+                fired += 1
+            if fired:
+                self._stats["fired"] += fired
+                job_dispatcher.notify()
+            timeout: Optional[float] = None
+            if not self._heap and self._truncated:
+                try:
+                    self.recover()
+                    continue
+                except Exception as e:
+                    logger.error(f"Scheduled send reload failed: {e}")
+                    timeout = 60.0
+            if self._heap:
+                timeout = (self._heap[0][0] - now).total_seconds()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = dict(self._stats)
+        out["pending"] = len(self._heap)
+        out["next_due"] = self._heap[0][0].isoformat() if self._heap else None
+        return out
+
+
+send_scheduler = SendScheduler()
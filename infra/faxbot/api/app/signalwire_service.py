@@ -1,9 +1,11 @@
-import asyncio
-from typing import Optional, Dict, Any
+from datetime import datetime
+from typing import Optional, Dict, Any, AsyncIterator
 import httpx
 import logging
 
 from .config import settings, reload_settings
+from .governor import provider_governor
+from .retry import ProviderError
 
 logger = logging.getLogger(__name__)
 
@@ -57,35 +59,27 @@ class SignalWireFaxService:
 
         url = f"{self._compat_base()}/Accounts/{self.project_id}/Faxes.json"
 
-        # Simple retry with backoff
-        attempts = 3
-        delay = 1.0
-        last_err: Optional[Exception] = None
+        # One attempt per dispatch; failed dispatches are retried with backoff by the queue (see retry.py)
         async with httpx.AsyncClient(timeout=30.0) as client:
-            for _ in range(attempts):
-                try:
-                    resp = await client.post(url, data=data, auth=auth)
-                    if resp.status_code >= 400:
-                        try:
-                            j = resp.json()
-                            msg = j.get('message') or str(j)
-                        except Exception:
-                            msg = resp.text
-                        raise Exception(f"SignalWire API error {resp.status_code}: {msg}")
-                    j = resp.json()
-                    # Expected Twilio-like shape `{ sid, status, ... }`
-                    sid = str(j.get('sid') or j.get('faxSid') or '')
-                    status = str(j.get('status') or j.get('faxStatus') or 'queued').lower()
-                    return {
-                        'provider_sid': sid,
-                        'status': self._map_status_str(status),
-                    }
-                except Exception as e:
-                    last_err = e
-                    await asyncio.sleep(delay)
-                    delay = min(8.0, delay * 2)
-        assert last_err is not None
-        raise last_err
+            async with provider_governor.slot("signalwire"):
+                resp = await client.post(url, data=data, auth=auth)
+        if resp.status_code == 429:
+            provider_governor.backoff("signalwire", resp.headers.get("Retry-After"))
+        if resp.status_code >= 400:
+            try:
+                j = resp.json()
+                msg = j.get('message') or str(j)
+            except Exception:
+                msg = resp.text
+            raise ProviderError(f"SignalWire API error {resp.status_code}: {msg}", status_code=resp.status_code)
+        j = resp.json()
+        # Expected Twilio-like shape `{ sid, status, ... }`
+        sid = str(j.get('sid') or j.get('faxSid') or '')
+        status = str(j.get('status') or j.get('faxStatus') or 'queued').lower()
+        return {
+            'provider_sid': sid,
+            'status': self._map_status_str(status),
+        }
 
     async def get_fax_status(self, provider_sid: str) -> Dict[str, Any]:
         if not self.is_configured():
@@ -106,8 +100,42 @@ class SignalWireFaxService:
                 'provider_sid': str(j.get('sid') or provider_sid),
                 'status': self._map_status_str(status),
                 'provider_status': status,
+                'pages': j.get('num_pages'),
             }
 
+    async def list_faxes(self, since: datetime, until: datetime) -> AsyncIterator[Dict[str, Any]]:
+        """Faxes created in [since, until] (UTC), mapped like get_fax_status, following next-page links."""
+        if not self.is_configured():
+            raise ValueError("SignalWire is not properly configured")
+        auth = (self.project_id, self.api_token)
+        url: Optional[str] = f"{self._compat_base()}/Accounts/{self.project_id}/Faxes.json"
+        params: Optional[Dict[str, Any]] = {
+            "DateCreatedAfter": since.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "DateCreatedOnOrBefore": until.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "PageSize": 1000,
+        }
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            while url:
+                async with provider_governor.slot("signalwire"):
+                    resp = await client.get(url, params=params, auth=auth)
+                if resp.status_code == 429:
+                    provider_governor.backoff("signalwire", resp.headers.get("Retry-After"))
+                if resp.status_code >= 400:
+                    raise ProviderError(f"SignalWire API error {resp.status_code}: {resp.text}", status_code=resp.status_code)
+                j = resp.json()
+                for item in j.get('faxes') or []:
+                    status = str(item.get('status') or '').lower()
+                    yield {
+                        'provider_sid': str(item.get('sid') or ''),
+                        'status': self._map_status_str(status),
+                        'provider_status': status,
+                        'pages': item.get('num_pages'),
+                    }
+                # Next page links carry the filters; relative URIs hang off the space host
+                nxt = j.get('next_page_uri') or (j.get('meta') or {}).get('next_page_url')
+                url = (nxt if str(nxt).startswith("http") else f"https://{self.space_url}{nxt}") if nxt else None
+                params = None
+
     async def handle_status_callback(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         sid = payload.get('FaxSid') or payload.get('sid') or payload.get('MessageSid')
         status = (payload.get('FaxStatus') or payload.get('status') or '').lower()
@@ -1,9 +1,11 @@
-from typing import Optional, Dict, Any, Tuple
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, Tuple, AsyncIterator
 import httpx
 import logging
 import os
 
 from .config import settings, reload_settings
+from .governor import provider_governor
 
 logger = logging.getLogger(__name__)
 
@@ -70,7 +72,10 @@ class SinchFaxService:
         url = f"{self.base_url}/projects/{self.project_id}/faxes"
         payload = {"to": to, "file": file_id}
         async with httpx.AsyncClient(timeout=30.0) as client:
-            resp = await client.post(url, json=payload, auth=self._auth())
+            async with provider_governor.slot("sinch"):
+                resp = await client.post(url, json=payload, auth=self._auth())
+            if resp.status_code == 429:
+                provider_governor.backoff("sinch", resp.headers.get("Retry-After"))
             if resp.status_code >= 400:
                 raise RuntimeError(f"Sinch create fax error {resp.status_code}: {resp.text}")
             return resp.json()
@@ -82,6 +87,55 @@ class SinchFaxService:
             resp.raise_for_status()
             return resp.json()
 
+    @staticmethod
+    def map_status_str(status: str) -> str:
+        s = (status or "").upper()
+        if s == "IN_PROGRESS":
+            return "in_progress"
+        if s in {"SUCCESS", "COMPLETED", "COMPLETED_OK"}:
+            return "SUCCESS"
+        if s in {"FAILED", "FAILURE", "ERROR"}:
+            return "FAILED"
+        return "queued"
+
+    def map_status(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        data = payload.get("data") if isinstance(payload.get("data"), dict) else payload
+        return {
+            "provider_sid": str(data.get("id") or ""),
+            "status": self.map_status_str(str(data.get("status") or "")),
+            "provider_status": data.get("status"),
+            "pages": data.get("numberOfPages"),
+            "error_message": data.get("errorMessage"),
+        }
+
+    async def list_faxes(self, since: datetime, until: datetime) -> AsyncIterator[Dict[str, Any]]:
+        """Outbound faxes created in [since, until] (UTC), mapped with map_status.
+
+        The list is newest first; paging stops at the first page reaching past ``since``.
+        """
+        url = f"{self.base_url}/projects/{self.project_id}/faxes"
+        params: Dict[str, Any] = {"direction": "OUTBOUND", "pageSize": 1000, "page": 1}
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            while True:
+                async with provider_governor.slot("sinch"):
+                    resp = await client.get(url, params=params, auth=self._auth())
+                if resp.status_code == 429:
+                    provider_governor.backoff("sinch", resp.headers.get("Retry-After"))
+                if resp.status_code >= 400:
+                    raise RuntimeError(f"Sinch list faxes error {resp.status_code}: {resp.text}")
+                body = resp.json()
+                older = False
+                for item in body.get("faxes") or []:
+                    created = _parse_time(item.get("createTime"))
+                    if created is not None and created < since:
+                        older = True
+                        continue
+                    if created is None or created <= until:
+                        yield self.map_status(item)
+                if older or params["page"] >= int(body.get("totalPages") or 1):
+                    return
+                params["page"] += 1
+
     async def send_fax_file(self, to_number: str, file_path: str) -> Dict[str, Any]:
         """Create a fax by posting the file directly as multipart/form-data.
 
@@ -101,12 +155,26 @@ class SinchFaxService:
             with open(file_path, "rb") as fh:
                 files = {"file": (os.path.basename(file_path), fh, "application/pdf")}
                 data = {"to": to}
-                resp = await client.post(url, files=files, data=data, auth=self._auth())
+                async with provider_governor.slot("sinch"):
+                    resp = await client.post(url, files=files, data=data, auth=self._auth())
+            if resp.status_code == 429:
+                provider_governor.backoff("sinch", resp.headers.get("Retry-After"))
             if resp.status_code >= 400:
                 raise RuntimeError(f"Sinch create fax error {resp.status_code}: {resp.text}")
             return resp.json()
 
 
+def _parse_time(value: Any) -> Optional[datetime]:
+    """ISO 8601 timestamp as naive UTC, or None."""
+    try:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except (TypeError, ValueError):
+        return None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
 _sinch_service: Optional[SinchFaxService] = None
 
 
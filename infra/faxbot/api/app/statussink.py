@@ -0,0 +1,220 @@
+"""Write-behind sink for provider status callbacks.
+
+Phaxio, SignalWire, FreeSWITCH and Asterisk report progress per job, and after a carrier
+recovers they do so in bursts of thousands. Instead of a session, ``db.get`` and commit
+per callback, handlers submit their update here. Updates are buffered for
+``STATUS_SINK_WINDOW_MS`` (or until ``STATUS_SINK_MAX_BATCH`` jobs are pending),
+coalesced per job, and flushed as grouped ``UPDATE ... WHERE id IN (...)`` statements in
+one transaction, so SQLite's single writer commits once per burst rather than once per
+callback. The awaitable returned by ``submit`` resolves after that commit, so a callback
+is still acknowledged only once its status is stored.
+
+Statuses only move forward: queued < in_progress < final (SUCCESS, FAILED, failed,
+disabled), and between final statuses only as jobstate.py allows. Within a batch a
+later update never replaces one it could not follow, and every UPDATE is guarded by
+``status IN`` the jobstate sources of its target, so a late ``in_progress`` or a late
+FAILED never overwrites a job that already finished. Flushes run one at a time, in
+submission order.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import case, select, update  # type: ignore
+
+from .config import settings
+from .db import SessionLocal, FaxJob
+from .jobevents import job_events
+from .jobstate import ACTIVE, FINAL, can, sources
+
+logger = logging.getLogger(__name__)
+
+# Ids per IN (...) list, below SQLite's bound-parameter limit
+CHUNK = 500
+
+# ("id", job id) or ("sid", provider sid)
+Key = Tuple[str, str]
+
+
+def rank(status: Optional[str]) -> int:
+    if status in FINAL:
+        return 2
+    return 1 if status == "in_progress" else 0
+
+
+def follows(current: Optional[str], to: str) -> bool:
+    """Whether a callback reporting ``to`` may replace ``current``: never backwards."""
+    if current is None or current == to:
+        return True
+    return rank(to) >= rank(current) and can(current, to)
+
+
+def guard(status: Optional[str]) -> List[str]:
+    """Statuses a job may hold for a callback update to apply (the jobstate sources, forward only)."""
+    if status is None:
+        return list(ACTIVE)
+    return [s for s in sources(status) if rank(s) <= rank(status)]
+
+
+def merge(old: Optional[Dict[str, Any]], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Coalesce two updates to one job; the later one wins unless it ranks lower."""
+    if old is None:
+        return dict(new)
+    if new.get("status") is not None and follows(old.get("status"), new["status"]):
+        head, tail = new, old
+    elif old.get("status") is not None:
+        head, tail = old, new
+    else:
+        head, tail = new, old
+    out = dict(head)
+    for field in ("pages", "error"):
+        if out.get(field) is None:
+            out[field] = tail.get(field)
+    if out.get("status") == "SUCCESS":
+        out["error"] = None
+    return out
+
+
+def write(batch: Dict[Key, Dict[str, Any]]) -> Dict[Key, Optional[str]]:
+    """Apply a batch in one transaction. Returns key → job id written (None if no such job)."""
+    table = FaxJob.__table__
+    resolved: Dict[Key, Optional[str]] = {}
+    merged: Dict[str, Dict[str, Any]] = {}
+    changes: List[Dict[str, Any]] = []
+    now = datetime.utcnow()
+    with SessionLocal() as db:
+        ids = [k[1] for k in batch if k[0] == "id"]
+        sids = [k[1] for k in batch if k[0] == "sid"]
+        # job id → API key, for the published events
+        found: Dict[str, Optional[str]] = {}
+        for i in range(0, len(ids), CHUNK):
+            found.update(db.execute(select(table.c.id, table.c.key_id).where(table.c.id.in_(ids[i:i + CHUNK]))).all())
+        by_sid: Dict[str, str] = {}
+        for i in range(0, len(sids), CHUNK):
+            for sid, job_id, key_id in db.execute(
+                select(table.c.provider_sid, table.c.id, table.c.key_id).where(table.c.provider_sid.in_(sids[i:i + CHUNK]))
+            ).all():
+                by_sid.setdefault(str(sid), str(job_id))
+                found.setdefault(str(job_id), key_id)
+        for key, upd in batch.items():
+            if key[0] == "id":
+                job_id = key[1] if key[1] in found else None
+            else:
+                job_id = by_sid.get(key[1])
+            resolved[key] = job_id
+            if job_id is not None:
+                merged[job_id] = merge(merged.get(job_id), upd)
+        # Jobs with identical values share one UPDATE ... WHERE id IN (...)
+        resumed = table.c.pages_sent.is_not(None) & (table.c.pages_sent != 0)
+        groups: Dict[Tuple[Any, ...], List[str]] = {}
+        for job_id, upd in merged.items():
+            groups.setdefault((upd.get("status"), upd.get("pages"), upd.get("error")), []).append(job_id)
+        for (status, pages, error), group in groups.items():
+            values: Dict[str, Any] = {"updated_at": now}
+            if status is not None:
+                values["status"] = status
+            if pages is not None:
+                # A resumed send reports only its own pages; keep the document's count
+                values["pages"] = case((resumed, table.c.pages), else_=pages)
+            if status == "SUCCESS":
+                values["error"] = None
+            elif error is not None:
+                values["error"] = error
+            allowed = table.c.status.in_(guard(status))
+            returning = db.get_bind().dialect.update_returning
+            for i in range(0, len(group), CHUNK):
+                stmt = update(table).where(table.c.id.in_(group[i:i + CHUNK]), allowed).values(**values)
+                # Without RETURNING every job in the group is reported; repeats are dropped downstream
+                written = db.execute(stmt.returning(table.c.id)).scalars().all() if returning else group[i:i + CHUNK]
+                if status is not None:
+                    changes.extend({"job_id": job_id, "key_id": found.get(job_id), "status": status,
+                                    "pages": pages, "error": values.get("error")} for job_id in written)
+        db.commit()
+    job_events.publish(changes)
+    return resolved
+
+
+class StatusSink:
+    def __init__(self):
+        self._pending: Dict[Key, Dict[str, Any]] = {}
+        self._waiters: Dict[Key, List[asyncio.Future]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._lock: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Lock]] = None
+        self._flushes: set = set()
+        self._stats: Dict[str, int] = {"submitted": 0, "coalesced": 0, "flushes": 0, "jobs": 0, "errors": 0}
+
+    def submit(self, job_id: Optional[str] = None, provider_sid: Optional[str] = None,
+               status: Optional[str] = None, pages: Optional[int] = None,
+               error: Optional[str] = None) -> "asyncio.Future[Optional[str]]":
+        """Queue a status update for a job (by id, else by provider sid).
+
+        Resolves to the job id once written, or None when no such job exists. ``pages`` and
+        ``error`` of None keep the stored values; SUCCESS clears the error.
+        """
+        loop = asyncio.get_running_loop()
+        key: Key = ("id", str(job_id)) if job_id else ("sid", str(provider_sid or ""))
+        fut: "asyncio.Future[Optional[str]]" = loop.create_future()
+        if not key[1]:
+            fut.set_result(None)
+            return fut
+        upd = {"status": status or None, "pages": pages or None, "error": error or None}
+        self._stats["submitted"] += 1
+        if key in self._pending:
+            self._stats["coalesced"] += 1
+        self._pending[key] = merge(self._pending.get(key), upd)
+        self._waiters.setdefault(key, []).append(fut)
+        if len(self._pending) >= max(1, settings.status_sink_max_batch):
+            self._kick()
+        elif self._timer is None:
+            self._timer = loop.call_later(max(0, settings.status_sink_window_ms) / 1000.0, self._kick)
+        return fut
+
+    def _kick(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, waiters = self._pending, self._waiters
+        self._pending, self._waiters = {}, {}
+        task = asyncio.get_running_loop().create_task(self._flush(batch, waiters))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: Dict[Key, Dict[str, Any]], waiters: Dict[Key, List[asyncio.Future]]) -> None:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock[0] is not loop:
+            self._lock = (loop, asyncio.Lock())
+        async with self._lock[1]:
+            try:
+                resolved = await asyncio.to_thread(write, batch)
+            except Exception as e:
+                self._stats["errors"] += 1
+                logger.error(f"Status flush of {len(batch)} jobs failed: {e}")
+                for futs in waiters.values():
+                    for fut in futs:
+                        if not fut.done():
+                            fut.set_exception(e)
+                return
+            self._stats["flushes"] += 1
+            self._stats["jobs"] += len(batch)
+            for key, futs in waiters.items():
+                for fut in futs:
+                    if not fut.done():
+                        fut.set_result(resolved.get(key))
+
+    async def drain(self) -> None:
+        """Flush whatever is buffered and wait for in-flight flushes (shutdown)."""
+        self._kick()
+        if self._flushes:
+            await asyncio.gather(*list(self._flushes), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = dict(self._stats)
+        out["pending"] = len(self._pending)
+        out["window_ms"] = settings.status_sink_window_ms
+        return out
+
+
+status_sink = StatusSink()
@@ -0,0 +1,144 @@
+"""Direct text → fax TIFF rasterizer (no PDF, no Ghostscript).
+
+Plain-text uploads for TIFF backends (SIP/FreeSWITCH) are drawn line by line with a
+monospaced font straight onto 1-bit fax pages and written as CCITT Group 4 TIFF. The
+input is read as a stream and each page is encoded as soon as it is full, so memory
+stays at one page regardless of document size. The layout follows ``txt_to_pdf``
+(US Letter, 0.75" margins, 10 pt text on 12 pt lines; form feed starts a new page).
+Glyphs are rendered once into byte-aligned cells, so composing a page is byte copying.
+Cloud backends that fetch a PDF keep using ``conversion.txt_to_pdf``.
+"""
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    from PIL import Image, ImageDraw, ImageFont, TiffImagePlugin, features  # type: ignore
+except Exception:  # pragma: no cover - Pillow ships with reportlab
+    Image = None  # type: ignore
+
+# Fine resolution (matches conversion.FAX_TIFF_RESOLUTION); 1728 pels is the T.4 scan line
+DPI_X, DPI_Y = 204, 196
+PAGE_WIDTH = 1728
+PAGE_HEIGHT = 11 * DPI_Y
+FONT_PX = round(10 * DPI_Y / 72)
+LINE_PX = round(12 * DPI_Y / 72)
+# Character cells are two bytes wide so a text row is composed by joining byte strings
+CELL_PX = 16
+MARGIN_X = 152
+MARGIN_Y = (3 * DPI_Y) // 4
+MAX_COLUMNS = min(120, (PAGE_WIDTH - MARGIN_X) // CELL_PX)
+LINES_PER_PAGE = (PAGE_HEIGHT - 2 * MARGIN_Y) // LINE_PX
+
+_STRIDE = PAGE_WIDTH // 8
+_CELL_BYTES = CELL_PX // 8
+
+_FONT_CANDIDATES = (
+    "DejaVuSansMono.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSansMono.ttf",
+    "LiberationMono-Regular.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationMono-Regular.ttf",
+)
+
+_font: Any = None
+_font_loaded = False
+# char -> LINE_PX scan-line slices of its 1-bit cell (white = 1 bits)
+_glyphs: Dict[str, List[bytes]] = {}
+
+
+def _load_font() -> Any:
+    global _font, _font_loaded
+    if _font_loaded:
+        return _font
+    _font_loaded = True
+    if Image is None:
+        return None
+    override = os.getenv("TEXT_FAX_FONT")
+    for name in ((override,) if override else ()) + _FONT_CANDIDATES:
+        try:
+            _font = ImageFont.truetype(name, FONT_PX)
+            break
+        except Exception:
+            continue
+    return _font
+
+
+def available() -> bool:
+    """True when Pillow has a Group 4 encoder and a monospaced font was found."""
+    if Image is None:
+        return False
+    try:
+        if not features.check("libtiff"):
+            return False
+    except Exception:
+        return False
+    return _load_font() is not None
+
+
+def _glyph(ch: str) -> List[bytes]:
+    g = _glyphs.get(ch)
+    if g is None:
+        cell = Image.new("1", (CELL_PX, LINE_PX), 1)
+        if ch.isprintable() and not ch.isspace():
+            ascent, descent = _font.getmetrics()
+            ImageDraw.Draw(cell).text((0, max(0, (LINE_PX - ascent - descent) // 2)), ch, font=_font, fill=0)
+        raw = cell.tobytes()
+        g = [raw[y * _CELL_BYTES:(y + 1) * _CELL_BYTES] for y in range(LINE_PX)]
+        _glyphs[ch] = g
+    return g
+
+
+def _pages(lines: Iterator[str]) -> Iterator[bytes]:
+    """Yield packed 1-bit pages (``PAGE_WIDTH`` x ``PAGE_HEIGHT``, rows of ``_STRIDE`` bytes)."""
+    blank = b"\xff" * (_STRIDE * PAGE_HEIGHT)
+    page: Optional[bytearray] = None
+    row = 0
+    for raw in lines:
+        parts = raw.rstrip("\r\n").split("\f")
+        for i, part in enumerate(parts):
+            if i > 0 and page is not None:
+                # Form feed ends the current page
+                yield bytes(page)
+                page = None
+            if not part and len(parts) > 1:
+                continue
+            if page is None:
+                page = bytearray(blank)
+                row = 0
+            line = part.expandtabs(8)[:MAX_COLUMNS].rstrip()
+            if line:
+                cells = [_glyph(ch) for ch in line]
+                width = len(cells) * _CELL_BYTES
+                pos = (MARGIN_Y + row * LINE_PX) * _STRIDE + MARGIN_X // 8
+                for y in range(LINE_PX):
+                    page[pos:pos + width] = b"".join([c[y] for c in cells])
+                    pos += _STRIDE
+            row += 1
+            if row >= LINES_PER_PAGE:
+                yield bytes(page)
+                page = None
+    if page is not None:
+        yield bytes(page)
+
+
+def _write_page(tf: Any, data: bytes) -> None:
+    page = Image.frombytes("1", (PAGE_WIDTH, PAGE_HEIGHT), data)
+    page.save(tf, format="TIFF", compression="group4", dpi=(DPI_X, DPI_Y))
+    tf.newFrame()
+
+
+def txt_to_tiff(txt_path: str, tiff_path: str) -> Tuple[int, str]:
+    """Render a UTF-8 text file to a multi-page Group 4 fax TIFF. Returns (pages, tiff_path)."""
+    if not available():
+        raise RuntimeError("Text fax rasterizer unavailable (needs Pillow with libtiff and a monospaced font)")
+    pages = 0
+    with open(txt_path, "r", encoding="utf-8", errors="ignore") as src, \
+            TiffImagePlugin.AppendingTiffWriter(tiff_path, new=True) as tf:
+        for data in _pages(src):
+            _write_page(tf, data)
+            pages += 1
+        if pages == 0:
+            # An empty document still faxes one blank page
+            _write_page(tf, b"\xff" * (_STRIDE * PAGE_HEIGHT))
+            pages = 1
+    return pages, tiff_path
@@ -0,0 +1,185 @@
+import asyncio
+import hashlib
+import os
+import shutil
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from .config import settings
+from . import conversion
+from .conversion_service import conversion_service
+from .tiffio import count_tiff_pages
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _link_or_copy(src: str, dst: str) -> None:
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+class TiffRenderCache:
+    """On-disk LRU of rendered fax TIFFs keyed by (PDF sha256, device, resolution).
+
+    Entries live in ``{FAX_DATA_DIR}/tiff-cache``. A hit hard-links the cached render
+    to the job's TIFF path, so evicting an entry never removes a file a job still
+    uses. Recency is the file mtime (touched on every hit), which keeps the LRU order
+    across restarts and between processes sharing the data dir. The cache is bounded
+    by ``TIFF_CACHE_MAX_MB`` and, when ``ARTIFACT_TTL_DAYS`` is set, entries unused for
+    that long are dropped by the retention cleanup.
+    """
+
+    def __init__(self):
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # path -> size, oldest first
+        self._indexed_dir: Optional[str] = None
+        self._stats: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def cache_dir(self) -> str:
+        return os.path.join(settings.fax_data_dir, "tiff-cache")
+
+    def enabled(self) -> bool:
+        return settings.tiff_cache_max_mb > 0
+
+    def entry_path(self, sha256: str, device: str, resolution: str) -> str:
+        return os.path.join(self.cache_dir(), f"{sha256}-{device}-{resolution}.tiff")
+
+    def _ensure_index(self) -> None:
+        d = self.cache_dir()
+        if self._indexed_dir == d:
+            return
+        self._index.clear()
+        self._indexed_dir = d
+        if not os.path.isdir(d):
+            return
+        entries = []
+        for name in os.listdir(d):
+            if not name.endswith(".tiff"):
+                continue
+            p = os.path.join(d, name)
+            try:
+                st = os.stat(p)
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, p, st.st_size))
+        for _, p, size in sorted(entries):
+            self._index[p] = size
+
+    def lookup(self, sha256: str, device: str, resolution: str) -> Optional[str]:
+        self._ensure_index()
+        p = self.entry_path(sha256, device, resolution)
+        try:
+            os.utime(p)
+        except FileNotFoundError:
+            self._index.pop(p, None)
+            self._stats["misses"] += 1
+            return None
+        if p in self._index:
+            self._index.move_to_end(p)
+        else:
+            self._index[p] = os.path.getsize(p)
+        self._stats["hits"] += 1
+        return p
+
+    def store(self, sha256: str, device: str, resolution: str, rendered_path: str) -> str:
+        """Add a finished render to the cache (hard link; the caller keeps its file)."""
+        self._ensure_index()
+        os.makedirs(self.cache_dir(), exist_ok=True)
+        p = self.entry_path(sha256, device, resolution)
+        tmp = f"{p}.{uuid.uuid4().hex[:8]}.tmp"
+        _link_or_copy(rendered_path, tmp)
+        os.replace(tmp, p)
+        self._index[p] = os.path.getsize(p)
+        self._index.move_to_end(p)
+        self._stats["stores"] += 1
+        self._evict_to_budget()
+        return p
+
+    def _evict_to_budget(self) -> None:
+        budget = settings.tiff_cache_max_mb * 1024 * 1024
+        total = sum(self._index.values())
+        while self._index and total > budget:
+            p, size = self._index.popitem(last=False)
+            total -= size
+            self._remove(p)
+
+    def _remove(self, p: str) -> None:
+        try:
+            os.remove(p)
+            self._stats["evictions"] += 1
+        except FileNotFoundError:
+            pass
+
+    def evict_expired(self) -> int:
+        """Drop entries not used within ARTIFACT_TTL_DAYS (no-op when retention is disabled)."""
+        if settings.artifact_ttl_days <= 0:
+            return 0
+        self._indexed_dir = None  # rescan: other processes may have added or touched entries
+        self._ensure_index()
+        cutoff = time.time() - settings.artifact_ttl_days * 86400
+        removed = 0
+        for p in list(self._index.keys()):
+            try:
+                expired = os.stat(p).st_mtime < cutoff
+            except FileNotFoundError:
+                expired = True
+            if expired:
+                self._index.pop(p, None)
+                self._remove(p)
+                removed += 1
+        return removed
+
+    async def render(
+        self,
+        pdf_path: str,
+        tiff_path: str,
+        sha256: Optional[str] = None,
+        device: str = conversion.FAX_TIFF_DEVICE,
+        resolution: str = conversion.FAX_TIFF_RESOLUTION,
+    ) -> int:
+        """Produce ``tiff_path`` for ``pdf_path``, from the cache when possible. Returns pages."""
+        tmp = f"{tiff_path}.{uuid.uuid4().hex[:8]}.tmp"
+        # Placeholder renders (test mode, no Ghostscript) are never cached
+        real = not conversion.conversion_stubbed(pdf_path) and shutil.which("gs") is not None
+        try:
+            if real and self.enabled():
+                # Hashing a large PDF is disk-bound: keep it off the event loop
+                sha = sha256 or await asyncio.to_thread(file_sha256, pdf_path)
+                hit = self.lookup(sha, device, resolution)
+                if hit:
+                    _link_or_copy(hit, tmp)
+                    os.replace(tmp, tiff_path)
+                    return count_tiff_pages(tiff_path) or 1
+                pages, _ = await conversion_service.pdf_to_tiff(pdf_path, tmp, device=device, resolution=resolution)
+                os.replace(tmp, tiff_path)
+                self.store(sha, device, resolution, tiff_path)
+                return pages
+            pages, _ = await conversion_service.pdf_to_tiff(pdf_path, tmp, device=device, resolution=resolution)
+            os.replace(tmp, tiff_path)
+            return pages
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def stats(self) -> Dict[str, Any]:
+        self._ensure_index()
+        out: Dict[str, Any] = dict(self._stats)
+        out.update({
+            "enabled": self.enabled(),
+            "entries": len(self._index),
+            "size_bytes": sum(self._index.values()),
+            "max_bytes": settings.tiff_cache_max_mb * 1024 * 1024,
+        })
+        return out
+
+
+tiff_cache = TiffRenderCache()
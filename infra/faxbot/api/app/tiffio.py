@@ -0,0 +1,154 @@
+"""Minimal TIFF structure helpers (no pixel decoding)."""
+import struct
+from typing import List, Optional
+
+
+def count_tiff_pages(tiff_path: str) -> Optional[int]:
+    """Count IFDs (pages) in a classic or BigTIFF file. Returns None if not a TIFF."""
+    try:
+        with open(tiff_path, "rb") as f:
+            head = f.read(16)
+            if len(head) < 8 or head[:2] not in (b"II", b"MM"):
+                return None
+            bo = "<" if head[:2] == b"II" else ">"
+            magic = struct.unpack(bo + "H", head[2:4])[0]
+            if magic == 42:
+                offset = struct.unpack(bo + "I", head[4:8])[0]
+                count_fmt, count_size, entry_size, off_fmt, off_size = "H", 2, 12, "I", 4
+            elif magic == 43 and len(head) >= 16:
+                offset = struct.unpack(bo + "Q", head[8:16])[0]
+                count_fmt, count_size, entry_size, off_fmt, off_size = "Q", 8, 20, "Q", 8
+            else:
+                return None
+            pages = 0
+            seen = set()
+            while offset and offset not in seen:
+                seen.add(offset)
+                f.seek(offset)
+                raw = f.read(count_size)
+                if len(raw) < count_size:
+                    break
+                n = struct.unpack(bo + count_fmt, raw)[0]
+                pages += 1
+                f.seek(offset + count_size + n * entry_size)
+                raw = f.read(off_size)
+                if len(raw) < off_size:
+                    break
+                offset = struct.unpack(bo + off_fmt, raw)[0]
+            return pages or None
+    except OSError:
+        return None
+
+
+# Field type sizes (TIFF 6.0) for deciding whether a value is inline or behind an offset
+_TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 6: 1, 7: 1, 8: 2, 9: 4, 10: 8, 11: 4, 12: 8, 13: 4}
+# Tags whose values are file offsets (StripOffsets, FreeOffsets, TileOffsets, JPEGInterchangeFormat)
+_OFFSET_TAGS = {273, 288, 324, 513}
+
+
+def concat_tiffs(parts: List[str], out_path: str) -> int:
+    """Join classic TIFF files into one multi-page TIFF, in order, without re-encoding.
+
+    Each part is copied verbatim and its offsets are shifted by where it lands in the
+    output; the last IFD of one part is chained to the first IFD of the next. Returns
+    the total page count. Raises ValueError for input it cannot relocate.
+    """
+    pages = 0
+    bo = ""
+    with open(out_path, "wb") as out:
+        link_pos = 4  # where the previous IFD chain ends (header's first-IFD slot to start)
+        for part in parts:
+            with open(part, "rb") as f:
+                data = bytearray(f.read())
+            if len(data) < 8 or data[:2] not in (b"II", b"MM"):
+                raise ValueError(f"Not a TIFF: {part}")
+            part_bo = "<" if data[:2] == b"II" else ">"
+            if struct.unpack(part_bo + "H", data[2:4])[0] != 42:
+                raise ValueError(f"Only classic TIFF can be concatenated: {part}")
+            if not bo:
+                bo = part_bo
+                out.write(data[:4] + b"\0\0\0\0")
+            elif part_bo != bo:
+                raise ValueError(f"Byte order differs: {part}")
+            if out.tell() % 2:
+                out.write(b"\0")
+            delta = out.tell()
+            if delta + len(data) >= 1 << 32:
+                raise ValueError("Concatenated TIFF exceeds 4 GiB")
+
+            first = struct.unpack(bo + "I", data[4:8])[0]
+            offset, last_next, seen = first, 0, set()
+            while offset and offset not in seen:
+                seen.add(offset)
+                n = struct.unpack_from(bo + "H", data, offset)[0]
+                for i in range(n):
+                    pos = offset + 2 + 12 * i
+                    tag, typ, count = struct.unpack_from(bo + "HHI", data, pos)
+                    values = pos + 8
+                    if _TYPE_SIZES.get(typ, 1) * count > 4:
+                        values = struct.unpack_from(bo + "I", data, pos + 8)[0]
+                        struct.pack_into(bo + "I", data, pos + 8, values + delta)
+                    if tag in _OFFSET_TAGS:
+                        if typ == 3 and count == 1:
+                            # A SHORT offset may not fit once shifted; widen it in place
+                            v = struct.unpack_from(bo + "H", data, values)[0]
+                            struct.pack_into(bo + "HI", data, pos + 2, 4, count)
+                            struct.pack_into(bo + "I", data, pos + 8, v + delta)
+                        elif typ in (4, 13):
+                            for k in range(count):
+                                v = struct.unpack_from(bo + "I", data, values + 4 * k)[0]
+                                struct.pack_into(bo + "I", data, values + 4 * k, v + delta)
+                        else:
+                            raise ValueError(f"Unsupported offset field type {typ}: {part}")
+                pages += 1
+                last_next = offset + 2 + 12 * n
+                offset = struct.unpack_from(bo + "I", data, last_next)[0]
+                if offset:
+                    struct.pack_into(bo + "I", data, last_next, offset + delta)
+            if not seen:
+                continue
+            out.write(data)
+            end = out.tell()
+            out.seek(link_pos)
+            out.write(struct.pack(bo + "I", first + delta))
+            out.seek(end)
+            link_pos = delta + last_next
+    if not pages:
+        raise ValueError("No pages to concatenate")
+    return pages
+
+
+def skip_tiff_pages(src_path: str, out_path: str, skip: int) -> int:
+    """Write a TIFF that starts at page ``skip + 1`` of ``src_path``, without re-encoding.
+
+    The file is copied and its header repointed at that page's IFD; the skipped pages'
+    bytes stay in the copy but are no longer reachable. Returns the remaining page count.
+    Raises ValueError when the source has no page past ``skip``.
+    """
+    with open(src_path, "rb") as f:
+        data = bytearray(f.read())
+    if len(data) < 8 or data[:2] not in (b"II", b"MM"):
+        raise ValueError(f"Not a TIFF: {src_path}")
+    bo = "<" if data[:2] == b"II" else ">"
+    magic = struct.unpack_from(bo + "H", data, 2)[0]
+    if magic == 42:
+        head_slot, count_fmt, count_size, entry_size, off_fmt = 4, "H", 2, 12, "I"
+    elif magic == 43 and len(data) >= 16:
+        head_slot, count_fmt, count_size, entry_size, off_fmt = 8, "Q", 8, 20, "Q"
+    else:
+        raise ValueError(f"Not a TIFF: {src_path}")
+    offsets: List[int] = []
+    offset = struct.unpack_from(bo + off_fmt, data, head_slot)[0]
+    while offset and offset not in offsets and offset + count_size <= len(data):
+        offsets.append(offset)
+        n = struct.unpack_from(bo + count_fmt, data, offset)[0]
+        link = offset + count_size + n * entry_size
+        if link + struct.calcsize(off_fmt) > len(data):
+            break
+        offset = struct.unpack_from(bo + off_fmt, data, link)[0]
+    if skip < 0 or skip >= len(offsets):
+        raise ValueError(f"No page {skip + 1} in {src_path}")
+    struct.pack_into(bo + off_fmt, data, head_slot, offsets[skip])
+    with open(out_path, "wb") as out:
+        out.write(data)
+    return len(offsets) - skip
@@ -0,0 +1,203 @@
+"""Resumable outbound uploads.
+
+A client opens a session, appends chunks at explicit offsets (a chunk at the wrong
+offset is rejected with the current one, so an interrupted client asks where to
+resume), then finalizes it into a fax job. Bytes go to ``{FAX_DATA_DIR}/uploads/<id>.part``
+and are hashed as they arrive; finalizing renames the file into place and reuses the
+running SHA-256, so there is no second pass over the document. The running hash lives
+in process memory together with the offset it covers, and is only trusted while that
+offset equals ``received_bytes``: after a restart, or when another worker process took
+some of the chunks, the file is hashed once at finalize instead.
+
+Each chunk is written at its offset and committed by an ``UPDATE ... WHERE
+received_bytes = <offset>``, so of two workers appending at the same offset only one
+advances the session; the other gets the usual offset mismatch.
+"""
+import asyncio
+import hashlib
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from sqlalchemy import delete, func, update  # type: ignore
+
+from .config import settings
+from .db import SessionLocal, FaxUpload
+from . import ingest
+
+
+class UploadNotFound(Exception):
+    pass
+
+
+class UploadOffsetMismatch(Exception):
+    def __init__(self, offset: int):
+        super().__init__(f"expected offset {offset}")
+        self.offset = offset
+
+
+class UploadIncomplete(Exception):
+    pass
+
+
+def _hash_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(ingest.WRITE_BUFFER), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _read_head(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read(ingest.SNIFF_BYTES)
+
+
+class UploadSessions:
+    def __init__(self):
+        # upload id → (bytes covered, running sha256)
+        self._hashers: Dict[str, Tuple[int, Any]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def upload_dir(self) -> str:
+        return os.path.join(settings.fax_data_dir, "uploads")
+
+    def part_path(self, upload_id: str) -> str:
+        return os.path.join(self.upload_dir(), f"{upload_id}.part")
+
+    def max_bytes(self) -> int:
+        return settings.upload_max_size_mb * 1024 * 1024
+
+    def _ttl(self) -> timedelta:
+        return timedelta(hours=max(1, settings.upload_session_ttl_hours))
+
+    def create(self, file_name: str, size_bytes: Optional[int], key_id: Optional[str]) -> FaxUpload:
+        self.expire()
+        now = datetime.utcnow()
+        up = FaxUpload(
+            id=uuid.uuid4().hex,
+            key_id=key_id,
+            file_name=file_name,
+            size_bytes=size_bytes,
+            received_bytes=0,
+            created_at=now,
+            updated_at=now,
+            expires_at=now + self._ttl(),
+        )
+        os.makedirs(self.upload_dir(), exist_ok=True)
+        open(self.part_path(str(up.id)), "wb").close()
+        with SessionLocal() as db:
+            db.add(up)
+            db.commit()
+        self._hashers[str(up.id)] = (0, hashlib.sha256())
+        return up
+
+    def get(self, upload_id: str, key_id: Optional[str]) -> FaxUpload:
+        """The live session, visible only to the key that opened it."""
+        with SessionLocal() as db:
+            up = db.get(FaxUpload, upload_id)
+        if up is None or up.expires_at <= datetime.utcnow() or (up.key_id and up.key_id != key_id):
+            raise UploadNotFound(upload_id)
+        return up
+
+    async def append(self, upload_id: str, key_id: Optional[str], offset: int, chunks: AsyncIterator[bytes]) -> FaxUpload:
+        async with self._locks.setdefault(upload_id, asyncio.Lock()):
+            up = self.get(upload_id, key_id)
+            received = int(up.received_bytes or 0)
+            if offset != received:
+                raise UploadOffsetMismatch(received)
+            limit = self.max_bytes() - received
+            if up.size_bytes is not None:
+                limit = min(limit, int(up.size_bytes) - received)
+            # Hash into a copy so a failed chunk leaves the running digest at `received`;
+            # a digest that missed chunks written by another process is dropped
+            running = self._hashers.get(upload_id)
+            hasher = running[1].copy() if running is not None and running[0] == received else None
+            path = self.part_path(upload_id)
+            try:
+                written = await ingest.append(chunks, path, limit, hasher, offset=received)
+            except BaseException:
+                if os.path.exists(path) and self._offset(upload_id) == received:
+                    os.truncate(path, received)
+                raise
+            now = datetime.utcnow()
+            with SessionLocal() as db:
+                moved = db.execute(
+                    update(FaxUpload)
+                    .where(FaxUpload.id == upload_id, FaxUpload.received_bytes == received)
+                    .values(received_bytes=received + written, updated_at=now, expires_at=now + self._ttl())
+                ).rowcount
+                db.commit()
+                row = db.get(FaxUpload, upload_id)
+            if not moved:
+                # Another worker appended at this offset first; its bytes and count stand
+                self._hashers.pop(upload_id, None)
+                raise UploadOffsetMismatch(int(row.received_bytes or 0) if row is not None else received)
+            if hasher is not None:
+                self._hashers[upload_id] = (received + written, hasher)
+            return row
+
+    def _offset(self, upload_id: str) -> Optional[int]:
+        with SessionLocal() as db:
+            up = db.get(FaxUpload, upload_id)
+            return int(up.received_bytes or 0) if up is not None else None
+
+    async def take(self, upload_id: str, key_id: Optional[str], dest_path: str) -> Tuple[int, str, bytes, str]:
+        """Close the session and move its file to ``dest_path``.
+
+        Returns (size, sha256 hex, leading bytes, file name).
+        """
+        async with self._locks.setdefault(upload_id, asyncio.Lock()):
+            up = self.get(upload_id, key_id)
+            received = int(up.received_bytes or 0)
+            if received == 0 or (up.size_bytes is not None and received != int(up.size_bytes)):
+                raise UploadIncomplete(received)
+            # A chunk that lost an offset race may have left bytes past `received`
+            os.truncate(self.part_path(upload_id), received)
+            os.replace(self.part_path(upload_id), dest_path)
+            running = self._hashers.pop(upload_id, None)
+            if running is not None and running[0] == received:
+                sha = running[1].hexdigest()
+            else:
+                sha = await asyncio.to_thread(_hash_file, dest_path)
+            head = await asyncio.to_thread(_read_head, dest_path)
+            with SessionLocal() as db:
+                db.execute(delete(FaxUpload).where(FaxUpload.id == upload_id))
+                db.commit()
+        self._locks.pop(upload_id, None)
+        return received, sha, head, str(up.file_name)
+
+    def abort(self, upload_id: str, key_id: Optional[str]) -> None:
+        self.get(upload_id, key_id)
+        self._drop(upload_id)
+
+    def _drop(self, upload_id: str) -> None:
+        with SessionLocal() as db:
+            db.execute(delete(FaxUpload).where(FaxUpload.id == upload_id))
+            db.commit()
+        self._hashers.pop(upload_id, None)
+        self._locks.pop(upload_id, None)
+        try:
+            os.remove(self.part_path(upload_id))
+        except FileNotFoundError:
+            pass
+
+    def expire(self) -> int:
+        """Remove sessions idle past UPLOAD_SESSION_TTL_HOURS and their files."""
+        with SessionLocal() as db:
+            ids = [r[0] for r in db.query(FaxUpload.id).filter(FaxUpload.expires_at <= datetime.utcnow()).all()]
+        for upload_id in ids:
+            self._drop(upload_id)
+        return len(ids)
+
+    def stats(self) -> Dict[str, Any]:
+        with SessionLocal() as db:
+            count, received = db.query(
+                func.count(FaxUpload.id),
+                func.coalesce(func.sum(FaxUpload.received_bytes), 0),
+            ).one()
+        return {"sessions": int(count or 0), "received_bytes": int(received or 0)}
+
+
+uploads = UploadSessions()
@@ -0,0 +1,450 @@
+"""Customer webhooks: job status changes POSTed to endpoints registered per API key.
+
+A subscription (``POST /webhooks``) names a URL, the statuses it wants (all by default)
+and how many events may share one POST. Status changes published by jobevents.py for
+jobs sent with the subscription's API key are written to the ``webhook_deliveries``
+outbox, one insert per pass, so pending deliveries survive a restart. Each pass claims
+the due rows, groups them per subscription into POSTs of up to ``batch_size`` events and
+sends them through one shared keep-alive client, with at most
+``WEBHOOK_ENDPOINT_CONCURRENCY`` requests in flight per endpoint URL. A pass only keeps
+the rows it can start POSTing right away and hands the rest back, so no claimed row
+waits behind a slow endpoint until its lease runs out and another pass sends it again;
+an outcome is only stored by the pass that still holds the row's claim.
+
+A POST carries one event object, or ``{"events": [...]}`` when the subscription batches.
+``X-Faxbot-Signature: sha256=<hex>`` is the HMAC-SHA256 of
+``"<X-Faxbot-Timestamp>.<body>"`` under the subscription's secret. Any non-2xx answer or
+network error is retried with jittered exponential backoff, up to
+``WEBHOOK_MAX_ATTEMPTS`` attempts.
+
+Endpoints must be public: the host is resolved when the subscription is created and
+again for every POST, and the connection is made to the checked address, so a DNS
+answer that later points at an internal host is refused rather than followed.
+"""
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import json
+import logging
+import secrets
+import socket
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+from sqlalchemy import bindparam, delete, insert, select, update  # type: ignore
+
+from .config import settings
+from .db import SessionLocal, WebhookSubscription, WebhookDelivery
+from .jobevents import job_events
+from .retry import backoff_seconds
+
+logger = logging.getLogger(__name__)
+
+# Due deliveries claimed per pass
+CLAIM_LIMIT = 500
+# Seconds between passes when no new event wakes the loop
+POLL_SECONDS = 1.0
+# Pause after a wake-up so a burst of events is written and sent together
+BATCH_DELAY = 0.05
+# Seconds between reloads of the subscription list (other processes may change it)
+REFRESH_SECONDS = 30.0
+# Seconds between removals of delivered rows older than WEBHOOK_RETENTION_HOURS
+PRUNE_SECONDS = 3600.0
+
+# (delivery id, subscription id, payload JSON, attempts so far, claim token)
+Claimed = Tuple[int, str, str, int, str]
+
+
+def sign(secret: str, timestamp: str, body: bytes) -> str:
+    mac = hmac.new(secret.encode(), timestamp.encode() + b"." + body, hashlib.sha256)
+    return "sha256=" + mac.hexdigest()
+
+
+def check_url(url: str) -> Optional[str]:
+    """Why ``url`` cannot be a webhook endpoint, or None. HTTPS to a public host only."""
+    try:
+        parts = urlsplit(url)
+        host = (parts.hostname or "").rstrip(".").lower()
+    except ValueError:
+        return "'url' is not a valid URL"
+    if parts.scheme.lower() != "https" or not host:
+        return "'url' must be an https:// URL"
+    if host == "localhost" or host.endswith((".localhost", ".local", ".internal")):
+        return "'url' must point to a public host"
+    try:
+        addresses = _resolve(host, parts.port or 443)
+    except (OSError, ValueError):
+        return "'url' host does not resolve"
+    if not _public(addresses):
+        return "'url' must point to a public address"
+    return None
+
+
+def _resolve(host: str, port: int) -> List[str]:
+    """The addresses ``host`` resolves to, in resolver order (an IP literal is its own answer)."""
+    infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    return list(dict.fromkeys(str(info[4][0]) for info in infos))
+
+
+def _public(addresses: Sequence[str]) -> bool:
+    """True when there is at least one address and every one of them is globally routable."""
+    return bool(addresses) and all(ipaddress.ip_address(a.split("%")[0]).is_global for a in addresses)
+
+
+class PublicTransport(httpx.AsyncBaseTransport):
+    """HTTP transport that only connects to public addresses.
+
+    Each request's host is resolved here and the connection pinned to the first address
+    (TLS is still verified against the hostname), so a record rebound to a private address
+    after the subscription was checked fails the delivery instead of reaching it.
+    """
+
+    def __init__(self, **kwargs: Any):
+        self._inner = httpx.AsyncHTTPTransport(**kwargs)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        try:
+            addresses = await asyncio.to_thread(_resolve, host, request.url.port or 443)
+        except (OSError, ValueError) as e:
+            raise httpx.ConnectError(f"cannot resolve {host}: {e}", request=request)
+        if not _public(addresses):
+            raise httpx.ConnectError(f"{host} resolves to a non-public address", request=request)
+        request.url = request.url.copy_with(host=addresses[0])
+        request.extensions = {**request.extensions, "sni_hostname": host}
+        return await self._inner.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+def _subscription(s: WebhookSubscription) -> Dict[str, Any]:
+    x: Any = s
+    return {
+        "id": x.id,
+        "key_id": x.key_id,
+        "url": x.url,
+        "secret": x.secret,
+        "events": [e for e in (x.events or "").split(",") if e],
+        "batch_size": max(1, int(x.batch_size or 1)),
+        "created_at": x.created_at,
+    }
+
+
+def create_subscription(key_id: Optional[str], url: str, events: Sequence[str], batch_size: int = 1,
+                        secret: Optional[str] = None) -> Dict[str, Any]:
+    sub = WebhookSubscription(
+        id=uuid.uuid4().hex,
+        key_id=key_id,
+        url=url,
+        secret=secret or secrets.token_urlsafe(32),
+        events=",".join(events),
+        batch_size=max(1, batch_size),
+        created_at=datetime.utcnow(),
+    )
+    with SessionLocal() as db:
+        db.add(sub)
+        db.commit()
+    webhook_outbox.reload()
+    return _subscription(sub)
+
+
+def list_subscriptions(key_id: Optional[str]) -> List[Dict[str, Any]]:
+    owner = WebhookSubscription.key_id.is_(None) if key_id is None else WebhookSubscription.key_id == key_id
+    with SessionLocal() as db:
+        rows = db.query(WebhookSubscription).filter(owner).order_by(WebhookSubscription.created_at).all()
+    return [_subscription(s) for s in rows]
+
+
+def delete_subscription(sub_id: str, key_id: Optional[str]) -> bool:
+    """Remove a subscription owned by ``key_id``; its pending deliveries are dropped."""
+    with SessionLocal() as db:
+        sub = db.get(WebhookSubscription, sub_id)
+        if sub is None or sub.key_id != key_id:
+            return False
+        db.delete(sub)
+        db.execute(delete(WebhookDelivery.__table__).where(
+            WebhookDelivery.__table__.c.subscription_id == sub_id, WebhookDelivery.__table__.c.status == "pending"))
+        db.commit()
+    webhook_outbox.reload()
+    return True
+
+
+class WebhookOutbox:
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._subs: Dict[str, Dict[str, Any]] = {}
+        self._by_key: Dict[Optional[str], List[Dict[str, Any]]] = {}
+        self._client = client
+        self._limits: Dict[str, asyncio.Semaphore] = {}
+        # endpoint URL → POSTs started and not yet recorded
+        self._inflight: Dict[str, int] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._sending: set = set()
+        self._next_refresh = 0.0
+        self._next_prune = 0.0
+        self._stats: Dict[str, int] = {"queued": 0, "posts": 0, "delivered": 0, "retried": 0, "failed": 0}
+
+    def reload(self) -> None:
+        """Re-read the subscriptions; called after changes and every REFRESH_SECONDS."""
+        with SessionLocal() as db:
+            subs = [_subscription(s) for s in db.query(WebhookSubscription).all()]
+        by_key: Dict[Optional[str], List[Dict[str, Any]]] = {}
+        for sub in subs:
+            by_key.setdefault(sub["key_id"], []).append(sub)
+        self._subs, self._by_key = {s["id"]: s for s in subs}, by_key
+        self._next_refresh = time.monotonic() + REFRESH_SECONDS
+
+    def on_events(self, events: List[Dict[str, Any]]) -> None:
+        """jobevents listener: keep events some subscription wants and wake the loop."""
+        by_key = self._by_key
+        wanted = [e for e in events if e.get("key_id") in by_key]
+        if not wanted:
+            return
+        self._buffer.extend(wanted)
+        loop, wakeup = self._loop, self._wakeup
+        if loop is not None and wakeup is not None:
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                pass  # loop already closed; the rows are written on the next pass or at stop
+
+    def persist(self) -> int:
+        """Write buffered events to the outbox, one row per matching subscription. Returns rows."""
+        events: List[Dict[str, Any]] = []
+        while self._buffer:
+            events.append(self._buffer.popleft())
+        now = datetime.utcnow()
+        rows: List[Dict[str, Any]] = []
+        for event in events:
+            payload: Optional[str] = None
+            for sub in self._by_key.get(event.get("key_id"), []):
+                if sub["events"] and event["status"] not in sub["events"]:
+                    continue
+                if payload is None:
+                    payload = json.dumps({k: v for k, v in event.items() if k != "key_id"})
+                rows.append({"subscription_id": sub["id"], "job_id": event["job_id"], "payload": payload,
+                             "status": "pending", "attempts": 0, "next_attempt_at": now, "created_at": now})
+        if rows:
+            with SessionLocal() as db:
+                db.execute(insert(WebhookDelivery.__table__), rows)
+                db.commit()
+            self._stats["queued"] += len(rows)
+        return len(rows)
+
+    def claim(self) -> List[Claimed]:
+        """Lease up to CLAIM_LIMIT due deliveries to this pass, oldest first."""
+        t = WebhookDelivery.__table__
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+        lease_until = now + timedelta(seconds=max(1.0, settings.webhook_timeout_seconds) * 3)
+        due = select(t.c.id).where(t.c.status == "pending", t.c.next_attempt_at <= now).order_by(t.c.id).limit(CLAIM_LIMIT)
+        with SessionLocal() as db:
+            db.execute(
+                update(t)
+                .where(t.c.id.in_(due.scalar_subquery()), t.c.status == "pending", t.c.next_attempt_at <= now)
+                .values(claim=token, next_attempt_at=lease_until)
+            )
+            rows = db.execute(
+                select(t.c.id, t.c.subscription_id, t.c.payload, t.c.attempts).where(t.c.claim == token).order_by(t.c.id)
+            ).all()
+            db.commit()
+        return [(int(r[0]), str(r[1]), str(r[2]), int(r[3] or 0), token) for r in rows]
+
+    def release(self, rows: Sequence[Claimed]) -> None:
+        """Hand claimed rows back unsent, due again at once (the endpoint has no free slot)."""
+        t = WebhookDelivery.__table__
+        with SessionLocal() as db:
+            db.execute(
+                update(t).where(t.c.id.in_([r[0] for r in rows]), t.c.claim == rows[0][4])
+                .values(claim=None, next_attempt_at=datetime.utcnow())
+            )
+            db.commit()
+
+    def record(self, rows: Sequence[Claimed], error: Optional[str]) -> None:
+        """Store the outcome of one POST: delivered, or retried with backoff until attempts run out.
+
+        Rows whose claim was since taken by another pass are left to that pass.
+        """
+        t = WebhookDelivery.__table__
+        now = datetime.utcnow()
+        with SessionLocal() as db:
+            if error is None:
+                res = db.execute(
+                    update(t).where(t.c.id.in_([r[0] for r in rows]), t.c.claim == rows[0][4])
+                    .values(status="delivered", delivered_at=now, attempts=t.c.attempts + 1, claim=None, last_error=None)
+                )
+                self._stats["delivered"] += int(res.rowcount or 0)
+            else:
+                params = []
+                for delivery_id, _, _, attempts, token in rows:
+                    attempts += 1
+                    final = attempts >= max(1, settings.webhook_max_attempts)
+                    delay = backoff_seconds(attempts, settings.webhook_retry_base_seconds, settings.webhook_retry_max_seconds)
+                    params.append({
+                        "d_id": delivery_id,
+                        "d_claim": token,
+                        "d_status": "failed" if final else "pending",
+                        "d_attempts": attempts,
+                        "d_next": now if final else now + timedelta(seconds=delay),
+                        "d_error": error[:500],
+                    })
+                    self._stats["failed" if final else "retried"] += 1
+                db.execute(
+                    update(t).where(t.c.id == bindparam("d_id"), t.c.claim == bindparam("d_claim")).values(
+                        status=bindparam("d_status"), attempts=bindparam("d_attempts"),
+                        next_attempt_at=bindparam("d_next"), last_error=bindparam("d_error"), claim=None,
+                    ),
+                    params,
+                )
+            db.commit()
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            size = max(1, settings.webhook_pool_size)
+            self._client = httpx.AsyncClient(
+                timeout=max(1.0, settings.webhook_timeout_seconds),
+                transport=PublicTransport(limits=httpx.Limits(max_connections=size, max_keepalive_connections=size)),
+            )
+        return self._client
+
+    async def _post(self, sub: Dict[str, Any], rows: Sequence[Claimed]) -> None:
+        sem = self._limits.setdefault(sub["url"], asyncio.Semaphore(max(1, settings.webhook_endpoint_concurrency)))
+        events = [json.loads(r[2]) for r in rows]
+        body = json.dumps(events[0] if sub["batch_size"] == 1 else {"events": events}).encode()
+        error: Optional[str] = None
+        async with sem:
+            timestamp = str(int(time.time()))
+            headers = {
+                "Content-Type": "application/json",
+                "X-Faxbot-Timestamp": timestamp,
+                "X-Faxbot-Signature": sign(sub["secret"], timestamp, body),
+            }
+            try:
+                resp = await self._http().post(sub["url"], content=body, headers=headers)
+                if not 200 <= resp.status_code < 300:
+                    error = f"HTTP {resp.status_code}"
+            except httpx.HTTPError as e:
+                error = str(e) or e.__class__.__name__
+        self._stats["posts"] += 1
+        await asyncio.to_thread(self.record, rows, error)
+
+    async def deliver_once(self, wait: bool = False) -> int:
+        """One pass: write buffered events, claim due deliveries and POST them.
+
+        Returns the POSTs started; with ``wait`` the pass also waits for their outcomes.
+        """
+        await asyncio.to_thread(self.persist)
+        claimed = await asyncio.to_thread(self.claim)
+        groups: Dict[str, List[Claimed]] = {}
+        for row in claimed:
+            groups.setdefault(row[1], []).append(row)
+        tasks: List[asyncio.Task] = []
+        unsent: List[Claimed] = []
+        for sub_id, rows in groups.items():
+            sub = self._subs.get(sub_id)
+            if sub is None:
+                # Removed by another process since it was queued
+                await asyncio.to_thread(self.record, [(r[0], r[1], r[2], settings.webhook_max_attempts, r[4]) for r in rows],
+                                        "subscription removed")
+                continue
+            size, url = sub["batch_size"], sub["url"]
+            free = max(1, settings.webhook_endpoint_concurrency) - self._inflight.get(url, 0)
+            unsent.extend(rows[max(0, free) * size:])
+            for i in range(0, min(len(rows), max(0, free) * size), size):
+                self._inflight[url] = self._inflight.get(url, 0) + 1
+                task = asyncio.create_task(self._post(sub, rows[i:i + size]))
+                self._sending.add(task)
+                task.add_done_callback(self._sending.discard)
+                task.add_done_callback(lambda _, url=url: self._done(url))
+                tasks.append(task)
+        if unsent:
+            await asyncio.to_thread(self.release, unsent)
+        if wait and tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return len(tasks)
+
+    def _done(self, url: str) -> None:
+        left = self._inflight.get(url, 0) - 1
+        if left > 0:
+            self._inflight[url] = left
+        else:
+            self._inflight.pop(url, None)
+
+    def prune(self) -> int:
+        t = WebhookDelivery.__table__
+        cutoff = datetime.utcnow() - timedelta(hours=max(1, settings.webhook_retention_hours))
+        with SessionLocal() as db:
+            res = db.execute(delete(t).where(t.c.status == "delivered", t.c.delivered_at < cutoff))
+            db.commit()
+        self._next_prune = time.monotonic() + PRUNE_SECONDS
+        return int(res.rowcount or 0)
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        try:
+            self.reload()
+        except Exception as e:
+            logger.error(f"Webhook subscriptions not loaded: {e}")
+        job_events.subscribe(self.on_events)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        job_events.unsubscribe(self.on_events)
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        if self._sending:
+            await asyncio.gather(*list(self._sending), return_exceptions=True)
+        try:
+            # Events not yet written are kept in the outbox for the next start
+            self.persist()
+        except Exception as e:
+            logger.error(f"Webhook outbox flush at shutdown failed: {e}")
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._loop = self._wakeup = None
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=POLL_SECONDS)
+                await asyncio.sleep(BATCH_DELAY)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                if time.monotonic() >= self._next_refresh:
+                    await asyncio.to_thread(self.reload)
+                await self.deliver_once()
+                if time.monotonic() >= self._next_prune:
+                    await asyncio.to_thread(self.prune)
+            except Exception as e:
+                logger.error(f"Webhook delivery pass failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = dict(self._stats)
+        out["subscriptions"] = len(self._subs)
+        out["buffered"] = len(self._buffer)
+        out["sending"] = len(self._sending)
+        return out
+
+
+webhook_outbox = WebhookOutbox()
@@ -1,5 +1,9 @@
 import os
 import sys
+from datetime import datetime, timedelta
+from typing import Any
+
+import pytest
 
 # Ensure project root is on sys.path for `import api.*`
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
@@ -8,3 +12,55 @@ if ROOT not in sys.path:
 
 # Ensure test mode flag for Ghostscript-less CI/unit tests
 os.environ.setdefault("FAXBOT_TEST_MODE", "true")
+
+from app.config import reload_settings  # noqa: E402
+from app.db import init_db, SessionLocal, FaxJob  # noqa: E402
+
+
+class TmpDB:
+    """A fresh SQLite database and data dir under the test's tmp_path, auth disabled."""
+
+    def __init__(self, monkeypatch: pytest.MonkeyPatch, path: Any):
+        self._monkeypatch = monkeypatch
+        self.path = path
+
+    def env(self, **values: str) -> None:
+        """Set further environment variables and reload settings from them."""
+        for name, value in values.items():
+            self._monkeypatch.setenv(name, value)
+        reload_settings()
+
+    def sending(self, backend: str = "phaxio", workers: str = "0", **values: str) -> None:
+        """Enable sending through ``backend`` with ``workers`` dispatch workers, plus ``values``."""
+        self.env(FAX_DISABLED="false", FAX_BACKEND=backend, DISPATCH_WORKERS=workers, **values)
+
+
+@pytest.fixture
+def tmp_db(monkeypatch, tmp_path):
+    """Run the test against its own database; returns a TmpDB to adjust settings with."""
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path}/faxbot.db")
+    monkeypatch.setenv("FAX_DATA_DIR", str(tmp_path / "faxdata"))
+    monkeypatch.setenv("API_KEY", "")
+    monkeypatch.setenv("REQUIRE_API_KEY", "false")
+    reload_settings()
+    init_db()
+    yield TmpDB(monkeypatch, tmp_path)
+    # Restore the environment first so the next test does not inherit this one's settings
+    monkeypatch.undo()
+    reload_settings()
+
+
+@pytest.fixture
+def make_job(tmp_db):
+    """Insert a fax_jobs row: ``make_job(id, status="queued", age=seconds_ago, **columns)``."""
+
+    def make(job_id: str, status: str = "queued", age: float = 0, **columns: Any) -> None:
+        now = datetime.utcnow() - timedelta(seconds=age)
+        row = {"to_number": "+15551230001", "file_name": "a.pdf", "tiff_path": "a.tiff", "status": status,
+               "backend": "phaxio", "created_at": now, "updated_at": now}
+        row.update(columns)
+        with SessionLocal() as db:
+            db.add(FaxJob(id=job_id, **row))
+            db.commit()
+
+    return make
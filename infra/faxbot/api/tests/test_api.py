@@ -32,3 +32,34 @@ def test_send_txt():
         data = r.json()
         assert data["status"] in {"queued", "disabled"}
         assert data["id"]
+
+
+def test_send_raw_pdf_body():
+    """Raw application/pdf body: no multipart, `to` in the query string."""
+    with TestClient(app) as c:
+        r = c.post(
+            "/fax/raw?to=%2B15551230001",
+            content=b"%PDF-1.4\n1 0 obj<<>>endobj\ntrailer<<>>\n%%EOF\n",
+            headers={"Content-Type": "application/pdf"},
+        )
+        assert r.status_code == 202, r.text
+        assert r.json()["id"]
+
+
+def test_send_raw_rejects_other_types_and_oversize(monkeypatch):
+    from app.config import reload_settings
+    monkeypatch.setenv("MAX_FILE_SIZE_MB", "1")
+    reload_settings()
+    try:
+        with TestClient(app) as c:
+            r = c.post("/fax/raw?to=%2B15551230001", content=b"GIF89a", headers={"Content-Type": "image/gif"})
+            assert r.status_code == 415
+            r = c.post(
+                "/fax/raw?to=%2B15551230001",
+                content=b"a" * (1024 * 1024 + 1),
+                headers={"Content-Type": "text/plain"},
+            )
+            assert r.status_code == 413
+    finally:
+        monkeypatch.undo()
+        reload_settings()
@@ -61,3 +61,41 @@ def test_admin_create_and_use_api_key(monkeypatch, tmp_path):
     # Try to use revoked key
     r6 = client.get(f"/fax/{job_id}", headers={"X-API-Key": token})
     assert r6.status_code == 401
+
+
+def test_key_priority_is_default_lane_for_its_jobs(monkeypatch, tmp_path):
+    monkeypatch.setenv("API_KEY", "bootstrap_admin_only")
+    monkeypatch.setenv("REQUIRE_API_KEY", "true")
+    monkeypatch.setenv("FAX_DISABLED", "true")
+    monkeypatch.setenv("FAX_BACKEND", "phaxio")
+    monkeypatch.setenv("FAX_DATA_DIR", str(tmp_path / "faxdata_test_keys"))
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path}/keys_priority.db")
+    admin = {"X-API-Key": "bootstrap_admin_only"}
+
+    with TestClient(app) as client:
+        bad = client.post("/admin/api-keys", headers=admin, json={"name": "x", "priority": "asap"})
+        assert bad.status_code == 400
+        r = client.post(
+            "/admin/api-keys",
+            headers=admin,
+            json={"name": "marketing", "scopes": ["fax:send", "fax:read"], "priority": "bulk"},
+        )
+        assert r.status_code == 200, r.text
+        assert r.json()["priority"] == "bulk"
+        key = {"X-API-Key": r.json()["token"]}
+        files = {"file": ("example.txt", b"hello world", "text/plain")}
+
+        default = client.post("/fax", headers=key, data={"to": "+15551234567"}, files=files)
+        assert default.status_code == 202 and default.json()["priority"] == "bulk"
+        urgent = client.post("/fax", headers=key, data={"to": "+15551234567", "priority": "URGENT"}, files=files)
+        assert urgent.status_code == 202 and urgent.json()["priority"] == "urgent"
+        wrong = client.post("/fax", headers=key, data={"to": "+15551234567", "priority": "asap"}, files=files)
+        assert wrong.status_code == 400
+
+        key_id = r.json()["key_id"]
+        upd = client.patch(f"/admin/api-keys/{key_id}", headers=admin, json={"dispatch_weight": 4, "max_in_flight": 2})
+        assert upd.status_code == 200, upd.text
+        assert upd.json()["priority"] == "bulk"
+        assert (upd.json()["dispatch_weight"], upd.json()["max_in_flight"]) == (4, 2)
+        assert client.patch(f"/admin/api-keys/{key_id}", headers=admin, json={"dispatch_weight": 0}).status_code == 422
+        assert client.patch("/admin/api-keys/missing", headers=admin, json={"max_in_flight": 1}).status_code == 404
@@ -0,0 +1,60 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient  # type: ignore
+
+from app import artifacts
+from app.db import SessionLocal, FaxJob, FaxArtifact
+from app.main import app, _cleanup_once
+
+
+PDF = b"%PDF-1.4\n1 0 obj<<>>endobj\ntrailer<<>>\n%%EOF\n"
+
+
+def test_refcount_release_deletes_files_with_last_reference(tmp_db):
+    sha = "ab" * 32
+    art = artifacts.retain(sha, 10)
+    os.makedirs(os.path.dirname(art.pdf_path), exist_ok=True)
+    with open(art.pdf_path, "wb") as f:
+        f.write(PDF)
+    assert artifacts.retain(sha).refcount == 2
+
+    assert artifacts.release(sha) is False
+    assert os.path.exists(art.pdf_path)
+    assert artifacts.release(sha) is True
+    assert not os.path.exists(art.pdf_path)
+    with SessionLocal() as db:
+        assert db.get(FaxArtifact, sha) is None
+
+
+def test_identical_uploads_share_one_artifact(tmp_db, tmp_path):
+    tmp_db.sending()
+
+    with TestClient(app) as client:
+        ids = []
+        for to in ("+15551230001", "+15551230002"):
+            r = client.post("/fax", data={"to": to}, files={"file": ("doc.pdf", PDF, "application/pdf")})
+            assert r.status_code == 202, r.text
+            ids.append(r.json()["id"])
+
+    with SessionLocal() as db:
+        jobs = [db.get(FaxJob, i) for i in ids]
+        sha = jobs[0].content_sha256
+        assert sha and jobs[1].content_sha256 == sha
+        assert db.get(FaxArtifact, sha).refcount == 2
+        for j in jobs:
+            j.status = "failed"
+            j.updated_at = datetime.utcnow() - timedelta(days=30)
+            db.add(j)
+        db.commit()
+    pdf_path = artifacts.cas_path(sha, "pdf")
+    with open(pdf_path, "rb") as f:
+        assert f.read() == PDF
+    # Uploads are moved into the store, not left behind per job
+    assert sorted(os.listdir(tmp_path / "faxdata")) == ["cas"]
+
+    asyncio.run(_cleanup_once())
+    assert not os.path.exists(pdf_path)
+    with SessionLocal() as db:
+        assert db.get(FaxArtifact, sha) is None
@@ -0,0 +1,62 @@
+from fastapi.testclient import TestClient  # type: ignore
+
+from app import main as main_module
+from app.db import SessionLocal, FaxJob, FaxArtifact
+from app.main import app
+
+
+PDF_A = b"%PDF-1.4\n% a\n1 0 obj<<>>endobj\ntrailer<<>>\n%%EOF\n"
+PDF_B = b"%PDF-1.4\n% b\n1 0 obj<<>>endobj\ntrailer<<>>\n%%EOF\n"
+
+
+def test_one_document_to_many_recipients_converts_once(tmp_db, monkeypatch):
+    tmp_db.sending()
+    calls = []
+
+    async def fake_txt_to_pdf(txt_path, pdf_path, timeout=None):
+        calls.append(txt_path)
+        with open(pdf_path, "wb") as f:
+            f.write(PDF_A)
+
+    monkeypatch.setattr(main_module.conversion_service, "txt_to_pdf", fake_txt_to_pdf)
+    recipients = ["+15551230001", "+15551230002", "+15551230003"]
+    with TestClient(app) as client:
+        r = client.post(
+            "/fax/batch",
+            data={"to": recipients},
+            files=[("file", ("memo.txt", b"hello everyone\n", "text/plain"))],
+        )
+    assert r.status_code == 202, r.text
+    jobs = r.json()["jobs"]
+    assert [j["to"] for j in jobs] == recipients
+    assert len({j["id"] for j in jobs}) == 3
+    assert len(calls) == 1
+    with SessionLocal() as db:
+        shas = {db.get(FaxJob, j["id"]).content_sha256 for j in jobs}
+        assert len(shas) == 1
+        assert db.get(FaxArtifact, shas.pop()).refcount == 3
+
+
+def test_pairs_share_identical_documents(tmp_db):
+    tmp_db.sending()
+    with TestClient(app) as client:
+        r = client.post(
+            "/fax/batch",
+            data={"to": ["+15551230001", "+15551230002", "+15551230003"]},
+            files=[
+                ("file", ("a.pdf", PDF_A, "application/pdf")),
+                ("file", ("b.pdf", PDF_B, "application/pdf")),
+                ("file", ("a-again.pdf", PDF_A, "application/pdf")),
+            ],
+        )
+        assert r.status_code == 202, r.text
+        bad = client.post(
+            "/fax/batch",
+            data={"to": ["+15551230001", "+15551230002"]},
+            files=[("file", ("a.pdf", PDF_A, "application/pdf"))] * 3,
+        )
+        assert bad.status_code == 400
+    with SessionLocal() as db:
+        refs = sorted(a.refcount for a in db.query(FaxArtifact).all())
+        assert refs == [1, 2]
+        assert db.query(FaxJob).count() == 3
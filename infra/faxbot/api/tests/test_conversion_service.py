@@ -0,0 +1,152 @@
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pytest
+from PIL import Image
+
+from app.config import reload_settings
+from app.conversion_service import ConversionService, ConversionTimeout
+
+
+@pytest.fixture
+def workdir(monkeypatch):
+    # Paths containing "test" are stubbed by conversion.py, so work outside pytest's tmp_path
+    d = tempfile.mkdtemp(prefix="faxconv")
+    monkeypatch.delenv("FAX_DISABLED", raising=False)
+    yield d
+    shutil.rmtree(d, ignore_errors=True)
+
+
+def _fake_gs(monkeypatch, workdir, body):
+    bindir = os.path.join(workdir, "bin")
+    os.makedirs(bindir)
+    path = os.path.join(bindir, "gs")
+    with open(path, "w") as f:
+        f.write("#!/bin/sh\n" + body + "\n")
+    os.chmod(path, 0o755)
+    monkeypatch.setenv("PATH", bindir + os.pathsep + os.environ.get("PATH", ""))
+
+
+@pytest.mark.asyncio
+async def test_timeout_kills_ghostscript(monkeypatch, workdir):
+    _fake_gs(monkeypatch, workdir, "exec sleep 5")
+    monkeypatch.setenv("CONVERSION_TIMEOUT_SECONDS", "0.2")
+    reload_settings()
+    svc = ConversionService()
+    start = time.monotonic()
+    with pytest.raises(ConversionTimeout):
+        await svc.pdf_to_tiff(os.path.join(workdir, "a.pdf"), os.path.join(workdir, "a.tiff"))
+    assert time.monotonic() - start < 2
+    stats = svc.stats()
+    assert stats["timeouts"] == 1 and stats["running"] == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded_and_queue_depth_reported(monkeypatch, workdir):
+    # Fake gs logs each invocation and takes a moment
+    log = os.path.join(workdir, "gs.log")
+    _fake_gs(monkeypatch, workdir, f'echo run >> {log}; sleep 0.2')
+    monkeypatch.setenv("CONVERSION_WORKERS", "1")
+    monkeypatch.setenv("CONVERSION_TIMEOUT_SECONDS", "10")
+    reload_settings()
+    svc = ConversionService()
+    jobs = [
+        asyncio.create_task(svc.pdf_to_tiff(os.path.join(workdir, f"{i}.pdf"), os.path.join(workdir, f"{i}.tiff")))
+        for i in range(3)
+    ]
+    await asyncio.sleep(0.05)
+    assert svc.stats()["running"] == 1
+    assert svc.stats()["queued"] == 2
+    await asyncio.gather(*jobs)
+    assert svc.stats()["completed"] == 3
+    # One Ghostscript run per document: page counts come from the output, not a second gs
+    with open(log) as f:
+        assert len(f.read().split()) == 3
+
+
+@pytest.mark.asyncio
+async def test_txt_to_pdf_runs_in_process_pool(monkeypatch, workdir):
+    reload_settings()
+    svc = ConversionService()
+    src = os.path.join(workdir, "note.txt")
+    with open(src, "w") as f:
+        f.write("hello\n" * 200)
+    out = os.path.join(workdir, "note.pdf")
+    try:
+        await svc.txt_to_pdf(src, out)
+    finally:
+        svc.shutdown()
+    with open(out, "rb") as f:
+        assert f.read(5) == b"%PDF-"
+
+
+def _fake_gs_python(monkeypatch, workdir, log):
+    # Writes one small G4 page per requested page; page N is (100 + N) pixels wide
+    bindir = os.path.join(workdir, "bin")
+    os.makedirs(bindir)
+    path = os.path.join(bindir, "gs")
+    with open(path, "w") as f:
+        f.write(f"""#!{sys.executable}
+import sys
+from PIL import Image
+args = dict(a[2:].split("=", 1) for a in sys.argv[1:] if a.startswith(("-d", "-s")) and "=" in a)
+first, last = int(args.get("FirstPage", 1)), int(args.get("LastPage", {_PDF_PAGES}))
+with open({log!r}, "a") as log:
+    log.write(f"{{first}}-{{last}}\\n")
+pages = [Image.new("1", (100 + n, 20), 1) for n in range(first, last + 1)]
+pages[0].save(args["OutputFile"], format="TIFF", compression="group4", save_all=True, append_images=pages[1:])
+""")
+    os.chmod(path, 0o755)
+    monkeypatch.setenv("PATH", bindir + os.pathsep + os.environ.get("PATH", ""))
+
+
+_PDF_PAGES = 10
+
+
+def _make_pdf(path, pages):
+    from reportlab.pdfgen import canvas  # type: ignore
+    c = canvas.Canvas(path)
+    for i in range(pages):
+        c.drawString(72, 720, f"page {i + 1}")
+        c.showPage()
+    c.save()
+
+
+@pytest.mark.asyncio
+async def test_large_pdf_is_rasterized_as_parallel_page_ranges(monkeypatch, workdir):
+    log = os.path.join(workdir, "gs.log")
+    _fake_gs_python(monkeypatch, workdir, log)
+    monkeypatch.setenv("CONVERSION_WORKERS", "3")
+    monkeypatch.setenv("CONVERSION_PARALLEL_MIN_PAGES", "8")
+    reload_settings()
+    svc = ConversionService()
+    big = os.path.join(workdir, "big.pdf")
+    _make_pdf(big, _PDF_PAGES)
+    out = os.path.join(workdir, "big.tiff")
+
+    pages, _ = await svc.pdf_to_tiff(big, out)
+
+    assert pages == _PDF_PAGES
+    with open(log) as f:
+        assert sorted(f.read().split()) == ["1-4", "5-7", "8-10"]
+    with Image.open(out) as im:
+        widths = []
+        for i in range(im.n_frames):
+            im.seek(i)
+            im.load()
+            widths.append(im.size[0])
+    assert widths == [100 + n for n in range(1, _PDF_PAGES + 1)]
+    assert svc.stats()["split_documents"] == 1
+    assert not [p for p in os.listdir(workdir) if ".part" in p]
+
+    # Below the threshold a document keeps the single Ghostscript run
+    small = os.path.join(workdir, "small.pdf")
+    _make_pdf(small, 3)
+    os.remove(log)
+    await svc.pdf_to_tiff(small, os.path.join(workdir, "small.tiff"))
+    with open(log) as f:
+        assert f.read().split() == ["1-10"]
@@ -0,0 +1,59 @@
+import asyncio
+
+from fastapi.testclient import TestClient  # type: ignore
+
+from app.eventstream import EventStream
+from app.jobevents import job_events
+from app.main import app
+from app import jobstate
+
+
+def test_fanout_is_scoped_and_resumable():
+    stream = EventStream()
+
+    async def run():
+        stream.start()
+        try:
+            mine, _, _ = stream.subscribe("k1", see_all=False)
+            admin, _, _ = stream.subscribe("admin", see_all=True)
+            # Published from a worker thread, as the batched writers do
+            await asyncio.to_thread(job_events.publish, [
+                {"job_id": "ev-a", "key_id": "k1", "status": "in_progress"},
+                {"job_id": "ev-b", "key_id": "k2", "status": "in_progress"},
+                {"job_id": "ev-a", "key_id": "k1", "status": "SUCCESS"},
+            ])
+            await asyncio.sleep(0.05)
+            got = [mine.queue.get_nowait() for _ in range(mine.queue.qsize())]
+            assert [(e["job_id"], e["status"]) for e in got] == [("ev-a", "in_progress"), ("ev-a", "SUCCESS")]
+            assert admin.queue.qsize() == 3
+            # Reconnect after the first event: only what was missed, still scoped
+            _, replay, reset = stream.subscribe("k1", see_all=False, last_event_id=stream.event_id(got[0]))
+            assert not reset and [e["status"] for e in replay] == ["SUCCESS"]
+            assert "key_id" not in stream.public(replay[0])
+            _, replay, reset = stream.subscribe("k1", see_all=False, last_event_id="0000-1")
+            assert reset and replay == []
+            # The SSE body: retry hint, replayed events, then live ones
+            sub, replay, reset = stream.subscribe("k1", see_all=False, last_event_id=stream.event_id(got[0]))
+            body = stream.sse_stream(sub, replay, reset)
+            assert await body.__anext__() == "retry: 3000\n\n"
+            assert (await body.__anext__()).startswith(f"id: {stream.event_id(got[1])}\nevent: job.status\ndata: ")
+            await body.aclose()
+            assert sub not in stream._subs
+        finally:
+            stream.stop()
+
+    asyncio.run(run())
+
+
+def test_websocket_streams_status_changes(tmp_db, make_job):
+    tmp_db.env(FAX_DISABLED="true")
+    make_job("ws-job")
+    with TestClient(app) as client:
+        with client.websocket_connect("/fax/events/ws?job_id=ws-job") as ws:
+            jobstate.advance("ws-job", "in_progress", provider_sid="p1")
+            jobstate.transition("ws-job", "SUCCESS")
+            first, second = ws.receive_json(), ws.receive_json()
+        assert (first["job_id"], first["status"], second["status"]) == ("ws-job", "in_progress", "SUCCESS")
+        # Resume from the first event replays the rest
+        with client.websocket_connect(f"/fax/events/ws?job_id=ws-job&last_event_id={first['id']}") as ws:
+            assert ws.receive_json()["status"] == "SUCCESS"
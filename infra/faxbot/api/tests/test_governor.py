@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+import pytest
+
+from app import governor as governor_module
+from app.governor import ProviderGovernor
+
+
+@pytest.mark.asyncio
+async def test_max_in_flight_queues_excess_calls(monkeypatch):
+    monkeypatch.setattr(governor_module, "get_provider_limits", lambda pid: {"max_in_flight": 2})
+    gov = ProviderGovernor()
+    peak = 0
+    current = 0
+
+    async def call():
+        nonlocal peak, current
+        async with gov.slot("phaxio"):
+            current += 1
+            peak = max(peak, current)
+            await asyncio.sleep(0.02)
+            current -= 1
+
+    tasks = [asyncio.create_task(call()) for _ in range(6)]
+    await asyncio.sleep(0.005)
+    assert gov.queue_depth()["phaxio"] == 4
+    await asyncio.gather(*tasks)
+    assert peak == 2
+    stats = gov.stats()["phaxio"]
+    assert stats["granted"] == 6 and stats["in_flight"] == 0 and stats["waiting"] == 0
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_paces_requests(monkeypatch):
+    monkeypatch.setattr(
+        governor_module, "get_provider_limits", lambda pid: {"requests_per_second": 20, "burst": 2}
+    )
+    gov = ProviderGovernor()
+    start = time.monotonic()
+    for _ in range(6):
+        async with gov.slot("sinch"):
+            pass
+    # Two calls ride the burst, the remaining four are spaced at 1/20s
+    assert time.monotonic() - start >= 0.18
+
+
+@pytest.mark.asyncio
+async def test_backoff_pauses_new_grants(monkeypatch):
+    monkeypatch.setattr(governor_module, "get_provider_limits", lambda pid: {})
+    gov = ProviderGovernor()
+    gov.backoff("signalwire", "0.1")
+    start = time.monotonic()
+    async with gov.slot("signalwire"):
+        pass
+    assert time.monotonic() - start >= 0.09
+    assert gov.stats()["signalwire"]["throttled"] == 1
+
+
+@pytest.mark.asyncio
+async def test_request_timing_excludes_queueing(monkeypatch):
+    monkeypatch.setattr(governor_module, "get_provider_limits", lambda pid: {"max_in_flight": 1})
+    gov = ProviderGovernor()
+
+    async def hold():
+        async with gov.slot("sinch"):
+            await asyncio.sleep(0.05)
+
+    async def timed():
+        gov.time_request()
+        queued = time.monotonic()
+        async with gov.slot("sinch"):
+            pass
+        return gov.request_started() - queued
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    assert await timed() >= 0.04
+    await holder
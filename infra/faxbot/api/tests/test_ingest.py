@@ -0,0 +1,36 @@
+import pytest
+
+from app import ingest
+
+
+async def _chunks(*parts):
+    for p in parts:
+        yield p
+
+
+@pytest.mark.asyncio
+async def test_receive_writes_hashes_and_keeps_sniff_window(tmp_path):
+    import hashlib
+    dest = tmp_path / "upload"
+    body = [b"%PDF-1.4\n", b"x" * (ingest.WRITE_BUFFER + 10), b"tail"]
+    total, sha, head = await ingest.receive(_chunks(*body), str(dest), 10 * ingest.WRITE_BUFFER)
+    data = b"".join(body)
+    assert total == len(data)
+    assert sha == hashlib.sha256(data).hexdigest()
+    assert dest.read_bytes() == data
+    assert head == data[:ingest.SNIFF_BYTES]
+    assert ingest.sniff(head) == "pdf"
+
+
+@pytest.mark.asyncio
+async def test_receive_over_limit_removes_partial_file(tmp_path):
+    dest = tmp_path / "upload"
+    with pytest.raises(ingest.UploadTooLarge):
+        await ingest.receive(_chunks(b"a" * 10, b"b" * 10), str(dest), 15)
+    assert not dest.exists()
+
+
+def test_sniff_tolerates_character_split_at_window_edge():
+    head = ("a" * (ingest.SNIFF_BYTES - 1)).encode() + "é".encode()[:1]
+    assert ingest.sniff(head) == "txt"
+    assert ingest.sniff(b"\xff\xd8\xff\xe0JFIF") is None
@@ -0,0 +1,35 @@
+from app.db import SessionLocal, FaxJob
+from app import jobstate, retry
+
+
+def _get(job_id):
+    with SessionLocal() as db:
+        return db.get(FaxJob, job_id)
+
+
+def test_transitions_only_follow_allowed_states(make_job):
+    make_job("a", "queued")
+    make_job("done", "SUCCESS")
+    assert jobstate.transition("a", "in_progress", returning=("status", "backend")) == ("in_progress", "phaxio")
+    assert jobstate.transition("a", "SUCCESS") == ("SUCCESS",)
+    # Nothing reopens or fails a delivered fax
+    assert jobstate.transition("a", "in_progress") is None
+    assert jobstate.transition("a", "FAILED") is None
+    assert jobstate.transition("missing", "in_progress") is None
+    # Facts are still recorded on a finished job; its status stays
+    assert jobstate.advance("done", "in_progress", provider_sid="p-1") == "SUCCESS"
+    assert (_get("done").status, _get("done").provider_sid) == ("SUCCESS", "p-1")
+    assert jobstate.advance("missing", "in_progress") is None
+    assert not jobstate.touch("done", backend="sinch")
+    assert _get("done").backend == "phaxio"
+
+
+def test_failure_after_success_is_not_recorded(make_job):
+    make_job("late", "SUCCESS")
+    make_job("live", "in_progress")
+    assert retry.record_failure("late", "Phaxio API error 503: unavailable") is None
+    late = _get("late")
+    assert (late.status, late.attempts, late.error) == ("SUCCESS", None, None)
+    assert retry.record_failure("live", "Phaxio API error 503: unavailable") is not None
+    live = _get("live")
+    assert (live.status, live.attempts) == ("queued", 1)
@@ -0,0 +1,124 @@
+import json
+import time
+
+from fastapi.testclient import TestClient  # type: ignore
+
+from app import main as main_module, merge
+from app.db import SessionLocal, FaxJob, FaxBroadcast
+from app.main import app
+from app.merge import MergeTemplate, iter_rows
+
+
+PDF = b"%PDF-1.4\n1 0 obj<<>>endobj\ntrailer<<>>\n%%EOF\n"
+TEMPLATE = b"Dear {{name}},\nYour balance is {{ amount }}.\n"
+
+
+def _rendered(monkeypatch):
+    texts = []
+
+    async def fake_txt_to_pdf(txt_path, pdf_path, timeout=None):
+        with open(txt_path, encoding="utf-8") as f:
+            texts.append(f.read())
+        with open(pdf_path, "wb") as f:
+            f.write(PDF)
+
+    monkeypatch.setattr(main_module.conversion_service, "txt_to_pdf", fake_txt_to_pdf)
+    return texts
+
+
+def _wait(client, broadcast_id):
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        body = client.get(f"/fax/merge/{broadcast_id}").json()
+        if body["status"] != "rendering":
+            return body
+        time.sleep(0.05)
+    raise AssertionError("broadcast did not finish")
+
+
+def test_csv_broadcast_renders_one_job_per_row(tmp_db, monkeypatch):
+    tmp_db.sending(DISPATCH_POLL_SECONDS="0.05")
+    texts = _rendered(monkeypatch)
+    rows = b"to,name,amount\n+15551230001,Ada,$10\n+15551230002,Grace,$20\nnot-a-number,Bad,$0\n"
+    with TestClient(app) as client:
+        r = client.post(
+            "/fax/merge",
+            files=[
+                ("template", ("letter.txt", TEMPLATE, "text/plain")),
+                ("recipients", ("people.csv", rows, "text/csv")),
+            ],
+        )
+        assert r.status_code == 202, r.text
+        body = _wait(client, r.json()["id"])
+    assert body["status"] == "complete"
+    assert body["rows_processed"] == 3 and body["jobs_created"] == 2 and body["rows_failed"] == 1
+    assert "row 3" in body["error"]
+    assert sorted(texts) == [
+        "Dear Ada,\nYour balance is $10.\n",
+        "Dear Grace,\nYour balance is $20.\n",
+    ]
+    with SessionLocal() as db:
+        jobs = db.query(FaxJob).filter(FaxJob.broadcast_id == body["id"]).all()
+        assert sorted(j.to_number for j in jobs) == ["+15551230001", "+15551230002"]
+        assert all(j.status == "queued" for j in jobs)
+
+
+def test_csv_missing_template_column_is_rejected(tmp_db):
+    tmp_db.sending(DISPATCH_POLL_SECONDS="0.05")
+    with TestClient(app) as client:
+        r = client.post(
+            "/fax/merge",
+            files=[
+                ("template", ("letter.txt", TEMPLATE, "text/plain")),
+                ("recipients", ("people.csv", b"to,name\n+15551230001,Ada\n", "text/csv")),
+            ],
+        )
+    assert r.status_code == 400
+    assert "amount" in r.json()["detail"]
+    with SessionLocal() as db:
+        assert db.query(FaxBroadcast).count() == 0
+
+
+def test_broadcast_resumes_from_cursor(tmp_db, monkeypatch):
+    tmp_db.sending(DISPATCH_POLL_SECONDS="0.05", MERGE_WORKERS="0")
+    texts = _rendered(monkeypatch)
+    rows = "\n".join(json.dumps({"to": f"+1555123000{i}", "name": f"n{i}", "amount": i}) for i in range(4))
+    with TestClient(app) as client:
+        r = client.post(
+            "/fax/merge",
+            files=[
+                ("template", ("letter.txt", TEMPLATE, "text/plain")),
+                ("recipients", ("people.jsonl", rows.encode(), "application/x-ndjson")),
+            ],
+        )
+        assert r.status_code == 202, r.text
+        broadcast_id = r.json()["id"]
+    # Pretend a previous process rendered two rows before dying with the lease held
+    with SessionLocal() as db:
+        b = db.get(FaxBroadcast, broadcast_id)
+        b.cursor = 2
+        b.created_jobs = 2
+        b.lease_owner = "gone"
+        db.commit()
+    tmp_db.env(MERGE_WORKERS="1")
+    with TestClient(app) as client:
+        body = _wait(client, broadcast_id)
+    assert body["status"] == "complete" and body["jobs_created"] == 4
+    assert [t.splitlines()[0] for t in texts] == ["Dear n2,", "Dear n3,"]
+
+
+def test_template_and_rows():
+    t = MergeTemplate("Hi {{ name }}, {{name}}/{{missing}}!")
+    assert t.fields == {"name", "missing"}
+    assert t.render({"name": "A\nB"}) == "Hi A B, A B/!"
+
+
+def test_json_array_rows(monkeypatch, tmp_path):
+    p = tmp_path / "rows.json"
+    p.write_text(' [{"to": "+1"}, 5, {"to": "+2"}]')
+    assert list(iter_rows(str(p), "json")) == [{"to": "+1"}, {}, {"to": "+2"}]
+    # Parsed incrementally: items and numbers split across reads decode whole
+    monkeypatch.setattr(merge, "JSON_READ_CHARS", 7)
+    rows = [{"to": f"+1555{i:07d}", "n": 1234567 + i, "note": 'a, [b] "c"'} for i in range(50)]
+    p.write_text(json.dumps(rows, indent=1))
+    assert list(iter_rows(str(p), "json")) == rows
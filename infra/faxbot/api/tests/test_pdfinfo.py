@@ -0,0 +1,79 @@
+import struct
+import zlib
+
+from PIL import Image
+from reportlab.pdfgen import canvas
+
+from app.pdfinfo import count_pdf_pages_bytes, count_pdf_pages_file
+from app.tiffio import count_tiff_pages
+
+
+def _reportlab_pdf(path, pages):
+    c = canvas.Canvas(str(path))
+    for i in range(pages):
+        c.drawString(72, 72, f"page {i + 1}")
+        c.showPage()
+    c.save()
+
+
+def _pdf15_with_object_streams(pages):
+    """PDF 1.5 layout: page tree inside an object stream, xref stream with PNG Up predictor."""
+    objs = {1: b"<</Type/Catalog/Pages 2 0 R>>"}
+    kids = b" ".join(b"%d 0 R" % (3 + i) for i in range(pages))
+    objs[2] = b"<</Type/Pages/Kids[" + kids + b"]/Count %d>>" % pages
+    for i in range(pages):
+        objs[3 + i] = b"<</Type/Page/Parent 2 0 R/MediaBox[0 0 612 792]>>"
+    header, body = [], b""
+    for num, src in objs.items():
+        header.append(b"%d %d" % (num, len(body)))
+        body += src + b"\n"
+    head = b" ".join(header) + b"\n"
+    stm = zlib.compress(head + body)
+    stm_num, xref_num = 3 + pages, 4 + pages
+    out = b"%PDF-1.5\n"
+    stm_off = len(out)
+    out += b"%d 0 obj\n<</Type/ObjStm/N %d/First %d/Length %d/Filter/FlateDecode>>\nstream\n" % (
+        stm_num, len(objs), len(head), len(stm)) + stm + b"\nendstream\nendobj\n"
+    xref_off = len(out)
+    rows = [struct.pack(">BIH", 0, 0, 65535)]
+    for idx, num in enumerate(objs):
+        rows.append(struct.pack(">BIH", 2, stm_num, idx))
+    rows.append(struct.pack(">BIH", 1, stm_off, 0))
+    rows.append(struct.pack(">BIH", 1, xref_off, 0))
+    prev = bytes(7)
+    raw = b""
+    for r in rows:
+        raw += b"\x02" + bytes((a - b) & 0xFF for a, b in zip(r, prev))
+        prev = r
+    data = zlib.compress(raw)
+    out += (b"%d 0 obj\n<</Type/XRef/Size %d/W[1 4 2]/Root 1 0 R/Filter/FlateDecode"
+            b"/DecodeParms<</Columns 7/Predictor 12>>/Length %d>>\nstream\n" % (xref_num, len(rows), len(data)))
+    out += data + b"\nendstream\nendobj\nstartxref\n%d\n%%%%EOF\n" % xref_off
+    return out
+
+
+def test_counts_classic_xref_pdf(tmp_path):
+    path = tmp_path / "doc.pdf"
+    _reportlab_pdf(path, 7)
+    assert count_pdf_pages_file(str(path)) == 7
+
+
+def test_counts_pdf_with_xref_and_object_streams():
+    assert count_pdf_pages_bytes(_pdf15_with_object_streams(12)) == 12
+
+
+def test_rebuilds_damaged_xref(tmp_path):
+    path = tmp_path / "doc.pdf"
+    _reportlab_pdf(path, 4)
+    data = path.read_bytes()
+    broken = data[: data.rindex(b"startxref")] + b"startxref\n999999\n%%EOF\n"
+    assert count_pdf_pages_bytes(broken) == 4
+    assert count_pdf_pages_bytes(b"not a pdf") is None
+
+
+def test_counts_tiff_ifds(tmp_path):
+    path = tmp_path / "fax.tiff"
+    frames = [Image.new("1", (1728, 100), 1) for _ in range(5)]
+    frames[0].save(path, save_all=True, append_images=frames[1:], compression="group4")
+    assert count_tiff_pages(str(path)) == 5
+    assert count_tiff_pages(str(tmp_path / "missing.tiff")) is None
@@ -0,0 +1,61 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from app.db import SessionLocal, FaxJob
+from app.jobstatus import apply_updates
+from app.poller import StatusPoller, poll_interval
+
+
+def _poll_env(tmp_db):
+    tmp_db.env(STATUS_POLL_SECONDS="60", STATUS_POLL_MAX_SECONDS="900")
+
+
+def test_interval_grows_with_job_age(tmp_db):
+    _poll_env(tmp_db)
+    assert poll_interval(10) == 60
+    assert poll_interval(1200) == 300
+    assert poll_interval(86400) == 900
+
+
+def test_poll_writes_changes_in_one_pass_and_backs_off(tmp_db, make_job):
+    _poll_env(tmp_db)
+    sent = datetime.utcnow() - timedelta(seconds=60)
+    for job_id in ("done", "broken", "sending"):
+        make_job(job_id, "in_progress", provider_sid=f"p-{job_id}", dispatched_at=sent)
+    make_job("already", "SUCCESS", provider_sid="p-already", dispatched_at=sent)
+    replies = {
+        "p-done": {"status": "SUCCESS", "pages": 3},
+        "p-broken": {"status": "FAILED", "error": "No answer"},
+        "p-sending": {"status": "in_progress"},
+    }
+    calls = []
+
+    async def fetch(backend, sid, job_id):
+        calls.append(sid)
+        return replies[sid]
+
+    poller = StatusPoller()
+    poller._fetch = fetch
+    poller._backends = lambda: ["phaxio"]
+    assert asyncio.run(poller.poll_once()) == 2
+    assert sorted(calls) == ["p-broken", "p-done", "p-sending"]
+    with SessionLocal() as db:
+        done, broken, sending = (db.get(FaxJob, j) for j in ("done", "broken", "sending"))
+        assert (done.status, done.pages, done.error) == ("SUCCESS", 3, None)
+        assert (broken.status, broken.error) == ("FAILED", "No answer")
+        assert sending.status == "in_progress"
+    # The job still in flight is not polled again until its interval passes
+    calls.clear()
+    assert asyncio.run(poller.poll_once()) == 0
+    assert calls == []
+    assert poller.stats()["tracked"] == 1
+
+
+def test_batched_update_skips_jobs_no_longer_in_progress(make_job):
+    make_job("a", "in_progress")
+    make_job("b", "SUCCESS")
+    assert apply_updates([{"id": "a", "status": "FAILED", "error": "busy"},
+                          {"id": "b", "status": "FAILED", "error": "late"}]) == 1
+    with SessionLocal() as db:
+        assert db.get(FaxJob, "a").status == "FAILED"
+        assert (db.get(FaxJob, "b").status, db.get(FaxJob, "b").error) == ("SUCCESS", None)
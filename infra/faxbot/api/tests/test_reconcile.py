@@ -0,0 +1,60 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient  # type: ignore
+
+from app.db import SessionLocal, FaxJob
+from app.main import app
+from app.reconcile import Reconciler
+
+
+def _jobs(n, backend="phaxio", age=3600):
+    now = datetime.utcnow()
+    with SessionLocal() as db:
+        db.add_all([
+            FaxJob(id=f"j{i}", to_number="+15551230001", file_name="a.pdf", tiff_path="a.tiff",
+                   status="in_progress", backend=backend, provider_sid=f"p{i}",
+                   dispatched_at=now - timedelta(seconds=age), created_at=now, updated_at=now)
+            for i in range(n)
+        ])
+        db.commit()
+
+
+def test_sweep_matches_by_provider_sid_and_stops_when_all_found(tmp_db):
+    _jobs(1500)
+    windows, yielded = [], []
+
+    async def lister(since, until):
+        windows.append((since, until))
+        # Other accounts' faxes first, then ours; more pages follow that must not be fetched
+        for i in range(200):
+            yielded.append(i)
+            yield {"provider_sid": f"other{i}", "status": "SUCCESS"}
+        for i in range(1500):
+            yielded.append(i)
+            if i % 3 == 0:
+                yield {"provider_sid": f"p{i}", "status": "SUCCESS", "pages": 2}
+            elif i % 3 == 1:
+                yield {"provider_sid": f"p{i}", "status": "FAILED", "error_message": "busy"}
+            else:
+                yield {"provider_sid": f"p{i}", "status": "in_progress"}
+        for i in range(5000):
+            yielded.append(i)
+            yield {"provider_sid": f"late{i}", "status": "SUCCESS"}
+
+    summary = asyncio.run(Reconciler().sweep("phaxio", lister))
+    assert (summary["in_flight"], summary["matched"], summary["updated"]) == (1500, 1500, 1000)
+    assert len(yielded) == 1700
+    since, until = windows[0]
+    assert until - since > timedelta(seconds=3600)
+    with SessionLocal() as db:
+        assert db.get(FaxJob, "j0").status == "SUCCESS" and db.get(FaxJob, "j0").pages == 2
+        assert (db.get(FaxJob, "j1").status, db.get(FaxJob, "j1").error) == ("FAILED", "busy")
+        assert db.get(FaxJob, "j2").status == "in_progress"
+
+
+def test_admin_reconcile_rejects_backend_without_list_api(tmp_db):
+    tmp_db.env(API_KEY="adminkey", FAX_DISABLED="true")
+    with TestClient(app) as client:
+        r = client.post("/admin/reconcile?backend=sip", headers={"X-API-Key": "adminkey"})
+        assert r.status_code == 400
@@ -0,0 +1,67 @@
+import asyncio
+import os
+
+from fastapi.testclient import TestClient  # type: ignore
+from PIL import Image
+
+from app.config import reload_settings
+from app.db import SessionLocal, FaxJob
+from app.main import app
+import app.main as main_mod
+from app import resume
+from app.tiffio import count_tiff_pages, skip_tiff_pages
+
+
+def _tiff(path, count):
+    pages = [Image.new("1", (100 + n, 20), 1) for n in range(count)]
+    pages[0].save(path, save_all=True, append_images=pages[1:], compression="group4")
+
+
+def test_skip_tiff_pages_starts_at_requested_page(tmp_path):
+    src, out = str(tmp_path / "doc.tiff"), str(tmp_path / "rest.tiff")
+    _tiff(src, 5)
+    assert skip_tiff_pages(src, out, 3) == 2
+    assert count_tiff_pages(out) == 2
+    with Image.open(out) as im:
+        assert im.size == (103, 20)
+        im.seek(1)
+        assert im.size == (104, 20)
+
+
+def test_continuation_header_is_safe_in_originate_strings(monkeypatch):
+    monkeypatch.setenv("FAX_HEADER", "O'Brien, Smith & Co")
+    reload_settings()
+    assert resume.continuation_header(3, 5) == "OBrien  Smith & Co - continued p4-5 of 5"
+
+
+def test_dropped_call_resends_only_remaining_pages(tmp_db, make_job, monkeypatch, tmp_path):
+    tmp_db.sending("freeswitch", ASTERISK_INBOUND_SECRET="sekret")
+    os.makedirs(tmp_path / "faxdata", exist_ok=True)
+    tiff = str(tmp_path / "faxdata" / "doc.tiff")
+    _tiff(tiff, 5)
+    make_job("j1", "in_progress", file_name="doc.pdf", tiff_path=tiff, pages=5, backend="freeswitch")
+
+    sent = []
+    monkeypatch.setattr(main_mod, "fs_cli_available", lambda: True)
+    monkeypatch.setattr(main_mod, "originate_txfax", lambda to, path, job_id, header=None: sent.append(
+        (count_tiff_pages(path), header)) or "uuid")
+    headers = {"X-Internal-Secret": "sekret"}
+    with TestClient(app) as client:
+        r = client.post("/_internal/freeswitch/outbound_result", headers=headers, json={
+            "job_id": "j1", "fax_status": "FAILED", "fax_result_text": "call dropped",
+            "fax_document_transferred_pages": 3,
+        })
+        assert r.status_code == 200
+        with SessionLocal() as db:
+            job = db.get(FaxJob, "j1")
+            assert (job.status, job.pages_sent) == ("queued", 3)
+        asyncio.run(main_mod._dispatch_job(job))
+        assert sent == [(2, resume.continuation_header(3, 5))]
+
+        r = client.post("/_internal/freeswitch/outbound_result", headers=headers, json={
+            "job_id": "j1", "fax_status": "SUCCESS", "fax_document_transferred_pages": 2,
+        })
+        assert r.status_code == 200
+        body = client.get("/fax/j1").json()
+        assert (body["status"], body["pages"]) == ("SUCCESS", 5)
+    assert not os.path.exists(resume.resume_path("j1"))
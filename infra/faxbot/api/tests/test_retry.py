@@ -0,0 +1,79 @@
+import time
+from datetime import datetime
+
+import httpx
+from fastapi.testclient import TestClient  # type: ignore
+
+from app.db import SessionLocal, FaxJob
+from app.main import app
+import app.main as main_mod
+from app import retry
+
+
+PDF = b"%PDF-1.4\n1 0 obj<<>>endobj\ntrailer<<>>\n%%EOF\n"
+
+
+def test_classification():
+    assert retry.is_retryable(retry.ProviderError("Phaxio API error 503: down", status_code=503))
+    assert retry.is_retryable(retry.ProviderError("rate limited", status_code=429))
+    assert not retry.is_retryable(retry.ProviderError("Phaxio API error 422: bad number", status_code=422))
+    assert retry.is_retryable(httpx.ConnectTimeout("timed out"))
+    assert retry.is_retryable("SignalWire API error 502: bad gateway")
+    assert not retry.is_retryable("SignalWire API error 400: invalid To")
+    assert not retry.is_retryable(ValueError("Phaxio is not properly configured"))
+    assert retry.is_retryable("USER_BUSY")
+    assert retry.is_retryable("No answer")
+
+
+def test_backoff_grows_and_is_capped(tmp_db):
+    tmp_db.sending(RETRY_BASE_SECONDS="10", RETRY_MAX_SECONDS="60")
+    for _ in range(50):
+        assert 5 <= retry.backoff_seconds(1) <= 10
+        assert 10 <= retry.backoff_seconds(2) <= 20
+        assert 30 <= retry.backoff_seconds(8) <= 60
+
+
+def test_record_failure_requeues_until_budget_spent(tmp_db, make_job):
+    tmp_db.sending(RETRY_MAX_ATTEMPTS="2")
+    make_job("j1", "in_progress")
+    retry_at = retry.record_failure("j1", "Phaxio API error 503: unavailable", "phaxio")
+    assert retry_at is not None and retry_at > datetime.utcnow()
+    with SessionLocal() as db:
+        j = db.get(FaxJob, "j1")
+        assert (j.status, j.send_at, j.attempts, j.dispatched_at) == ("queued", retry_at, 1, None)
+    assert retry.record_failure("j1", "Phaxio API error 503: unavailable", "phaxio") is None
+    with SessionLocal() as db:
+        j = db.get(FaxJob, "j1")
+        assert (j.status, j.attempts) == ("failed", 2)
+        assert [e["attempt"] for e in retry.attempt_log(j)] == [1, 2]
+
+    # Permanent errors fail on the first attempt
+    make_job("j2", "in_progress")
+    assert retry.record_failure("j2", retry.ProviderError("bad number", status_code=422)) is None
+    with SessionLocal() as db:
+        assert db.get(FaxJob, "j2").status == "failed"
+
+
+def test_worker_retries_transient_provider_error(tmp_db, monkeypatch):
+    tmp_db.sending(workers="1", RETRY_BASE_SECONDS="1")
+    calls = []
+
+    async def flaky(backend, job_id, to, pdf_path):
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            raise retry.ProviderError("Phaxio API error 503: unavailable", status_code=503)
+
+    monkeypatch.setattr(main_mod, "_send_via_backend", flaky)
+    with TestClient(app) as client:
+        r = client.post("/fax", data={"to": "+15551230001"}, files={"file": ("a.pdf", PDF, "application/pdf")})
+        assert r.status_code == 202, r.text
+        job_id = r.json()["id"]
+        for _ in range(100):
+            if len(calls) >= 2:
+                break
+            time.sleep(0.05)
+        assert len(calls) == 2
+        # Waited out the backoff instead of retrying in a tight loop
+        assert calls[1] - calls[0] >= 0.4
+        body = client.get(f"/fax/{job_id}").json()
+        assert body["attempts"] == 1
@@ -0,0 +1,89 @@
+import json
+import os
+
+from fastapi.testclient import TestClient  # type: ignore
+
+from app.config import reload_settings
+from app.db import SessionLocal, FaxJob
+from app.main import app
+from app import main as main_module, routetable
+from app.routetable import RouteTable, compile_routes
+
+
+PDF = b"%PDF-1.4\n1 0 obj<<>>endobj\ntrailer<<>>\n%%EOF\n"
+
+
+def test_longest_prefix_wins_and_bad_entries_are_skipped(monkeypatch):
+    monkeypatch.setenv("FAX_ROUTES_FILE", "/nonexistent/routes.json")
+    monkeypatch.setenv("FAX_ROUTES", "*=phaxio,+1=sip,+1212=sinch,+44=signalwire,+49=nosuch")
+    reload_settings()
+    table = RouteTable()
+    assert table.backend_for("+12125551234") == "sinch"
+    assert table.backend_for("+1 (415) 555-1234") == "sip"
+    assert table.backend_for("+442071234567") == "signalwire"
+    assert table.backend_for("+33123456789") == "phaxio"
+    stats = table.stats()
+    assert stats["routes"] == 4 and stats["hits"]["+1212"] == 1
+    assert stats["problems"] == ["+49: unknown backend 'nosuch'"]
+    _, problems = compile_routes({"abc": "sip"})
+    assert problems
+
+
+def test_routes_file_hot_reloads(monkeypatch, tmp_path):
+    path = tmp_path / "routes.json"
+    path.write_text(json.dumps({"+44": "sinch"}))
+    monkeypatch.setenv("FAX_ROUTES_FILE", str(path))
+    monkeypatch.setenv("FAX_ROUTES", "")
+    monkeypatch.setattr(routetable, "RELOAD_CHECK_SECONDS", 0.0)
+    reload_settings()
+    table = RouteTable()
+    assert table.backend_for("+447700900123") == "sinch"
+
+    path.write_text(json.dumps({"+44": "signalwire"}))
+    os.utime(path, (1, 1))
+    assert table.backend_for("+447700900123") == "signalwire"
+
+    # A broken edit keeps the last good table
+    path.write_text("{not json")
+    os.utime(path, (2, 2))
+    assert table.backend_for("+447700900123") == "signalwire"
+    assert table.stats()["problems"]
+
+
+def test_send_fax_uses_routed_backend(tmp_db, monkeypatch, tmp_path):
+    monkeypatch.delenv("SIGNALWIRE_PROJECT_ID", raising=False)
+    tmp_db.sending(
+        FAX_OUTBOUND_BACKEND="phaxio", FAX_ROUTES_FILE=str(tmp_path / "missing.json"),
+        FAX_ROUTES="+44=sinch,+49=signalwire", SINCH_PROJECT_ID="proj", SINCH_API_KEY="key", SINCH_API_SECRET="secret",
+    )
+    with TestClient(app) as client:
+        r = client.post("/fax", data={"to": "+447700900123"}, files={"file": ("a.pdf", PDF, "application/pdf")})
+        assert r.status_code == 202, r.text
+        assert r.json()["backend"] == "sinch"
+        r = client.post(
+            "/fax/batch",
+            data={"to": ["+447700900123", "+15551230001"]},
+            files={"file": ("a.pdf", PDF, "application/pdf")},
+        )
+        assert r.status_code == 202, r.text
+        # SignalWire has no credentials here: its route is reported and not used
+        assert "+49: backend 'signalwire' is not configured" in routetable.route_table.stats()["problems"]
+        r = client.post("/fax", data={"to": "+4930123456"}, files={"file": ("a.pdf", PDF, "application/pdf")})
+        assert r.json()["backend"] == "phaxio"
+    with SessionLocal() as db:
+        backends = sorted(j.backend for j in db.query(FaxJob).all())
+    assert backends == ["phaxio", "phaxio", "sinch", "sinch"]
+
+
+def test_sip_route_starts_ami_listener_under_cloud_backend(tmp_db, monkeypatch, tmp_path):
+    tmp_db.sending(FAX_OUTBOUND_BACKEND="phaxio", FAX_ROUTES_FILE=str(tmp_path / "missing.json"), FAX_ROUTES="+1=sip")
+    connects = []
+
+    async def connect():
+        connects.append(True)
+
+    monkeypatch.setattr(main_module.ami_client, "connect", connect)
+    monkeypatch.setattr(main_module.ami_client, "_listeners", {})
+    with TestClient(app):
+        assert main_module.ami_client._listeners.get("FaxResult") is main_module._handle_fax_result
+        assert connects
@@ -0,0 +1,104 @@
+import pytest
+
+from app import main as main_module
+from app.config import reload_settings
+from app.db import SessionLocal, FaxJob
+from app.retry import ProviderError
+from app.routing import BackendRouter
+
+
+def test_router_prefers_primary_until_it_is_unhealthy(monkeypatch):
+    monkeypatch.setenv("ROUTING_MIN_SAMPLES", "3")
+    reload_settings()
+    r = BackendRouter()
+    assert r.order(["phaxio", "sinch"]) == ["phaxio", "sinch"]
+
+    for _ in range(3):
+        r.record("phaxio", False, 0.2)
+    r.record("sinch", True, 0.4)
+    assert r.health("phaxio")["healthy"] is False
+    assert r.order(["phaxio", "sinch"]) == ["sinch", "phaxio"]
+
+
+def test_router_reports_p95_latency():
+    r = BackendRouter()
+    for ms in range(1, 101):
+        r.record("signalwire", True, ms / 1000.0)
+    h = r.health("signalwire")
+    assert h["samples"] == 100
+    assert h["success_rate"] == 1.0
+    assert 94 <= h["p95_ms"] <= 96
+
+
+@pytest.mark.asyncio
+async def test_failover_moves_job_to_next_backend(tmp_db, make_job, monkeypatch):
+    tmp_db.env(FAX_OUTBOUND_FALLBACKS="sinch")
+    make_job("job-f", to_number="+15551230001")
+
+    calls = []
+
+    async def phaxio_down(job_id, to, pdf_path):
+        calls.append("phaxio")
+        raise RuntimeError("Phaxio API error 503: unavailable")
+
+    async def sinch_ok(job_id, to, pdf_path):
+        calls.append("sinch")
+
+    monkeypatch.setitem(main_module._CLOUD_SENDERS, "phaxio", phaxio_down)
+    monkeypatch.setitem(main_module._CLOUD_SENDERS, "sinch", sinch_ok)
+    monkeypatch.setattr(main_module, "_backend_available", lambda b: True)
+    monkeypatch.setattr(main_module, "backend_router", BackendRouter())
+
+    await main_module._send_with_failover("job-f", "+15551230001", "/tmp/a.pdf", "phaxio")
+
+    assert calls == ["phaxio", "sinch"]
+    with SessionLocal() as db:
+        job = db.get(FaxJob, "job-f")
+        assert job.backend == "sinch"
+        assert job.status == "queued"
+    assert main_module.backend_router.health("phaxio")["success_rate"] == 0.0
+
+
+def test_manifest_failover_candidate_gets_its_own_settings(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("FEATURE_V3_PLUGINS", "true")
+    monkeypatch.setenv("FAXBOT_CONFIG_PATH", str(tmp_path / "faxbot.config.json"))
+    reload_settings()
+    manifest_dir = tmp_path / "config" / "providers" / "acme"
+    manifest_dir.mkdir(parents=True)
+    (manifest_dir / "manifest.json").write_text('{"id": "acme", "actions": {}}')
+
+    acme = {"api_base": "https://fax.acme.example", "account": "a-1"}
+    main_module.update_plugin_config("acme", main_module.UpdatePluginConfigIn(settings=acme))
+    # Another provider becomes the outbound plugin; acme stays configured as a candidate
+    main_module.update_plugin_config("phaxio", main_module.UpdatePluginConfigIn(settings={"region": "us"}))
+
+    assert main_module._manifest_runtime("acme").settings == acme
+    assert main_module._manifest_settings("unknown") == {}
+
+
+@pytest.mark.asyncio
+async def test_permanent_rejection_fails_without_failover(tmp_db, make_job, monkeypatch):
+    tmp_db.env(FAX_OUTBOUND_FALLBACKS="sinch")
+    make_job("job-bad", to_number="+1555")
+
+    calls = []
+
+    async def phaxio_rejects(job_id, to, pdf_path):
+        calls.append("phaxio")
+        raise ProviderError("Phaxio API error 422: invalid number", status_code=422)
+
+    async def sinch_ok(job_id, to, pdf_path):
+        calls.append("sinch")
+
+    monkeypatch.setitem(main_module._CLOUD_SENDERS, "phaxio", phaxio_rejects)
+    monkeypatch.setitem(main_module._CLOUD_SENDERS, "sinch", sinch_ok)
+    monkeypatch.setattr(main_module, "_backend_available", lambda b: True)
+    monkeypatch.setattr(main_module, "backend_router", BackendRouter())
+
+    await main_module._send_with_failover("job-bad", "+1555", "/tmp/a.pdf", "phaxio")
+
+    assert calls == ["phaxio"]
+    assert main_module.backend_router.health("phaxio")["samples"] == 0
+    with SessionLocal() as db:
+        assert db.get(FaxJob, "job-bad").status == "failed"
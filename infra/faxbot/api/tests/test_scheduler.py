@@ -0,0 +1,84 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient  # type: ignore
+
+from app.db import SessionLocal, FaxJob
+from app.main import app
+from app.scheduler import SendScheduler
+
+
+PDF = b"%PDF-1.4\n1 0 obj<<>>endobj\ntrailer<<>>\n%%EOF\n"
+
+
+# Phaxio is left unconfigured, so dispatched jobs fail fast
+_PHAXIO = {"PHAXIO_API_KEY": "", "PHAXIO_API_SECRET": ""}
+
+
+def test_send_at_is_parsed_stored_and_validated(tmp_db):
+    tmp_db.sending(**_PHAXIO)
+    due = datetime.now(timezone.utc) + timedelta(hours=2)
+    with TestClient(app) as client:
+        r = client.post(
+            "/fax",
+            data={"to": "+15551230001", "send_at": due.isoformat()},
+            files={"file": ("a.pdf", PDF, "application/pdf")},
+        )
+        assert r.status_code == 202, r.text
+        stored = datetime.fromisoformat(r.json()["send_at"])
+        assert abs(stored - due.replace(tzinfo=None)) < timedelta(seconds=1)
+
+        # A time already passed just sends now
+        r = client.post(
+            "/fax",
+            data={"to": "+15551230001", "send_at": "2000-01-01T00:00:00Z"},
+            files={"file": ("a.pdf", PDF, "application/pdf")},
+        )
+        assert r.status_code == 202 and r.json()["send_at"] is None
+
+        for bad in ("tomorrow", (datetime.utcnow() + timedelta(days=31)).isoformat()):
+            r = client.post(
+                "/fax",
+                data={"to": "+15551230001", "send_at": bad},
+                files={"file": ("a.pdf", PDF, "application/pdf")},
+            )
+            assert r.status_code == 400
+
+
+def test_timer_dispatches_when_due_without_polling(tmp_db):
+    # Idle workers poll once a minute; only the scheduler can wake them in time
+    tmp_db.sending(workers="1", DISPATCH_POLL_SECONDS="60", **_PHAXIO)
+    due = datetime.utcnow() + timedelta(seconds=0.5)
+    with TestClient(app) as client:
+        r = client.post(
+            "/fax",
+            data={"to": "+15551230001", "send_at": due.isoformat()},
+            files={"file": ("a.pdf", PDF, "application/pdf")},
+        )
+        assert r.status_code == 202, r.text
+        job_id = r.json()["id"]
+        dispatched = None
+        for _ in range(100):
+            with SessionLocal() as db:
+                dispatched = db.get(FaxJob, job_id).dispatched_at
+            if dispatched is not None:
+                break
+            time.sleep(0.05)
+    assert dispatched is not None and dispatched >= due
+
+
+def test_recover_loads_pending_timers_in_order(tmp_db, make_job):
+    tmp_db.sending(**_PHAXIO)
+    now = datetime.utcnow()
+    for job_id, offset, extra in (
+        ("late", 3600, {}),
+        ("soon", 60, {}),
+        ("past", -60, {}),
+        ("sent", 120, {"dispatched_at": now}),
+    ):
+        make_job(job_id, send_at=now + timedelta(seconds=offset), **extra)
+    s = SendScheduler()
+    assert s.recover() == 2
+    stats = s.stats()
+    assert stats["pending"] == 2
+    assert stats["next_due"] == (now + timedelta(seconds=60)).isoformat()
@@ -0,0 +1,115 @@
+import asyncio
+import os
+
+import pytest
+
+from app.db import SessionLocal, FaxJob
+from app.statussink import StatusSink
+
+
+@pytest.fixture
+def job(tmp_db, make_job):
+    """Sink jobs: ten pages, a stale error and provider sid ``p-<id>``."""
+    tmp_db.env(STATUS_SINK_WINDOW_MS="20")
+
+    def add(job_id, status="in_progress", **columns):
+        make_job(job_id, status, provider_sid=f"p-{job_id}", pages=10, error="old", **columns)
+
+    return add
+
+
+def _row(job_id):
+    with SessionLocal() as db:
+        j = db.get(FaxJob, job_id)
+        return j.status, j.pages, j.error
+
+
+def test_burst_is_coalesced_into_one_flush(job):
+    for i in range(50):
+        job(f"j{i}")
+    job("resumed", pages_sent=4)
+    sink = StatusSink()
+
+    async def burst():
+        futs = []
+        for i in range(50):
+            futs.append(sink.submit(f"j{i}", status="in_progress", pages=3))
+            futs.append(sink.submit(f"j{i}", status="SUCCESS" if i % 2 else "FAILED", error="busy"))
+            # Arrives last but reports an earlier state
+            futs.append(sink.submit(f"j{i}", status="in_progress", pages=5))
+        futs.append(sink.submit("resumed", status="SUCCESS", pages=6))
+        futs.append(sink.submit("missing", status="SUCCESS"))
+        return await asyncio.gather(*futs)
+
+    results = asyncio.run(burst())
+    assert results[0] == "j0" and results[-1] is None
+    stats = sink.stats()
+    assert stats["flushes"] == 1 and stats["submitted"] == 152 and stats["coalesced"] == 100
+    # The stale in_progress (and its page count) lost to the final status
+    assert _row("j1") == ("SUCCESS", 3, None)
+    assert _row("j2") == ("FAILED", 3, "busy")
+    # A resumed send keeps the document's page count
+    assert _row("resumed") == ("SUCCESS", 10, None)
+
+
+def test_late_update_never_regresses_a_finished_job(job):
+    job("done", "SUCCESS")
+    job("live")
+    sink = StatusSink()
+
+    async def late():
+        first = await asyncio.gather(sink.submit("done", status="in_progress", pages=2),
+                                     sink.submit(provider_sid="p-live", status="in_progress", pages=7))
+        second = await sink.submit("live", status="queued")
+        return first, second
+
+    first, second = asyncio.run(late())
+    assert first == ["done", "live"] and second == "live"
+    assert _row("done") == ("SUCCESS", 10, "old")
+    assert _row("live") == ("in_progress", 7, "old")
+    assert sink.stats()["flushes"] == 2
+
+
+def test_late_failure_never_overwrites_a_delivered_fax(job):
+    job("delivered", "SUCCESS")
+    job("racing")
+    job("corrected", "FAILED")
+    sink = StatusSink()
+
+    async def late():
+        return await asyncio.gather(sink.submit("delivered", status="FAILED", error="no answer"),
+                                    # Same batch: the FAILED that arrives after SUCCESS loses
+                                    sink.submit("racing", status="SUCCESS"),
+                                    sink.submit("racing", status="FAILED", error="no answer"),
+                                    sink.submit("corrected", status="SUCCESS"))
+
+    asyncio.run(late())
+    assert _row("delivered") == ("SUCCESS", 10, "old")
+    assert _row("racing") == ("SUCCESS", 10, None)
+    assert _row("corrected") == ("SUCCESS", 10, None)
+
+
+def test_ami_result_cleans_up_after_the_write(job, monkeypatch, capsys):
+    import app.main as main_mod
+    from app import resume
+
+    job("ami1", pages_sent=4)
+    leftover = resume.resume_path("ami1")
+    os.makedirs(os.path.dirname(leftover), exist_ok=True)
+    open(leftover, "wb").close()
+    audited = []
+    monkeypatch.setattr(main_mod, "audit_event", lambda name, **kw: audited.append((name, kw["job_id"])))
+
+    async def run():
+        main_mod._handle_fax_result({"JobID": "ami1", "Status": "SUCCESS", "Pages": "6"})
+        main_mod._handle_fax_result({"JobID": "nope", "Status": "SUCCESS"})
+        # Nothing happens before the status is stored
+        assert os.path.exists(leftover) and audited == []
+        await main_mod.status_sink.drain()
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert _row("ami1") == ("SUCCESS", 10, None)
+    assert not os.path.exists(leftover)
+    assert audited == [("job_updated", "ami1")]
+    assert "AMI result for unknown job nope" in capsys.readouterr().out
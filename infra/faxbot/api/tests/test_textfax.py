@@ -0,0 +1,63 @@
+import os
+import shutil
+import tempfile
+
+import pytest
+from PIL import Image
+
+from app import textfax
+from app.config import reload_settings
+from app.conversion_service import ConversionService
+
+pytestmark = pytest.mark.skipif(not textfax.available(), reason="needs Pillow with libtiff and a monospaced font")
+
+
+def test_text_renders_to_group4_fax_pages(tmp_path):
+    src = tmp_path / "note.txt"
+    # One more line than fits on a page, then a form feed forcing a third page
+    body = "".join(f"line {i}\twith a tab\n" for i in range(textfax.LINES_PER_PAGE + 1))
+    src.write_text(body + "\fafter form feed\n")
+    out = tmp_path / "note.tiff"
+
+    pages, _ = textfax.txt_to_tiff(str(src), str(out))
+
+    assert pages == 3
+    with Image.open(out) as im:
+        assert im.n_frames == 3
+        assert im.size == (textfax.PAGE_WIDTH, textfax.PAGE_HEIGHT)
+        assert im.info["compression"] == "group4"
+        assert tuple(round(v) for v in im.info["dpi"]) == (204, 196)
+        # Ink only inside the margins
+        assert im.crop((0, 0, textfax.PAGE_WIDTH, textfax.MARGIN_Y)).getextrema() == (255, 255)
+        assert im.crop((textfax.MARGIN_X, textfax.MARGIN_Y, 600, 300)).getextrema() == (0, 255)
+
+
+def test_empty_text_is_one_blank_page(tmp_path):
+    src = tmp_path / "empty.txt"
+    src.write_text("")
+    pages, out = textfax.txt_to_tiff(str(src), str(tmp_path / "empty.tiff"))
+    assert pages == 1
+    with Image.open(out) as im:
+        assert im.getextrema() == (255, 255)
+
+
+@pytest.mark.asyncio
+async def test_service_rasterizes_text_without_ghostscript(monkeypatch):
+    # Paths containing "test" are stubbed by conversion.py, so work outside pytest's tmp_path
+    d = tempfile.mkdtemp(prefix="faxtext")
+    monkeypatch.delenv("FAX_DISABLED", raising=False)
+    monkeypatch.setenv("PATH", d)
+    reload_settings()
+    svc = ConversionService()
+    try:
+        src = os.path.join(d, "memo.txt")
+        with open(src, "w") as f:
+            f.write("hello\n" * 10)
+        pages, out = await svc.txt_to_tiff(src, os.path.join(d, "memo.tiff"))
+        assert pages == 1
+        assert svc.stats()["completed"] == 1
+        with open(out, "rb") as f:
+            assert f.read(2) in (b"II", b"MM")
+    finally:
+        svc.shutdown()
+        shutil.rmtree(d, ignore_errors=True)
@@ -0,0 +1,104 @@
+import os
+import shutil
+import tempfile
+import time
+
+import pytest
+
+from app.config import reload_settings
+from app.tiff_cache import TiffRenderCache
+
+
+@pytest.fixture
+def workdir(monkeypatch):
+    # Paths containing "test" are stubbed by conversion.py, so work outside pytest's tmp_path
+    d = tempfile.mkdtemp(prefix="faxcache")
+    monkeypatch.delenv("FAX_DISABLED", raising=False)
+    monkeypatch.setenv("FAX_DATA_DIR", os.path.join(d, "data"))
+    yield d
+    shutil.rmtree(d, ignore_errors=True)
+
+
+def _fake_gs(monkeypatch, workdir, size=16):
+    # Writes `size` bytes to -sOutputFile and logs each invocation
+    bindir = os.path.join(workdir, "bin")
+    os.makedirs(bindir)
+    log = os.path.join(workdir, "gs.log")
+    path = os.path.join(bindir, "gs")
+    with open(path, "w") as f:
+        f.write(
+            "#!/bin/sh\n"
+            f"echo run >> {log}\n"
+            'for a in "$@"; do case "$a" in -sOutputFile=*) '
+            f'head -c {size} /dev/zero > "${{a#-sOutputFile=}}";; esac; done\n'
+        )
+    os.chmod(path, 0o755)
+    monkeypatch.setenv("PATH", bindir + os.pathsep + os.environ.get("PATH", ""))
+    return log
+
+
+def _runs(log):
+    if not os.path.exists(log):
+        return 0
+    with open(log) as f:
+        return len(f.read().split())
+
+
+def _pdf(workdir, name):
+    p = os.path.join(workdir, name)
+    with open(p, "wb") as f:
+        f.write(b"%PDF-1.4 " + name.encode())
+    return p
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_skips_ghostscript(monkeypatch, workdir):
+    log = _fake_gs(monkeypatch, workdir)
+    reload_settings()
+    cache = TiffRenderCache()
+    pdf = _pdf(workdir, "a.pdf")
+
+    await cache.render(pdf, os.path.join(workdir, "one.tiff"), sha256="a" * 64)
+    await cache.render(pdf, os.path.join(workdir, "two.tiff"), sha256="a" * 64)
+    assert _runs(log) == 1
+    assert os.path.exists(os.path.join(workdir, "two.tiff"))
+
+    # A different resolution is a different render
+    await cache.render(pdf, os.path.join(workdir, "std.tiff"), sha256="a" * 64, resolution="204x98")
+    assert _runs(log) == 2
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2 and stats["entries"] == 2
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_render_is_evicted_over_budget(monkeypatch, workdir):
+    log = _fake_gs(monkeypatch, workdir, size=600 * 1024)
+    monkeypatch.setenv("TIFF_CACHE_MAX_MB", "1")
+    reload_settings()
+    cache = TiffRenderCache()
+
+    await cache.render(_pdf(workdir, "a.pdf"), os.path.join(workdir, "a.tiff"), sha256="a" * 64)
+    await cache.render(_pdf(workdir, "b.pdf"), os.path.join(workdir, "b.tiff"), sha256="b" * 64)
+    assert cache.stats()["evictions"] == 1
+    assert cache.lookup("a" * 64, "tiffg4", "204x196") is None
+    assert cache.lookup("b" * 64, "tiffg4", "204x196") is not None
+    # The job's own copy survives eviction of the cache entry
+    assert os.path.getsize(os.path.join(workdir, "a.tiff")) == 600 * 1024
+    assert _runs(log) == 2
+
+
+@pytest.mark.asyncio
+async def test_entries_expire_with_artifact_ttl(monkeypatch, workdir):
+    _fake_gs(monkeypatch, workdir)
+    monkeypatch.setenv("ARTIFACT_TTL_DAYS", "7")
+    reload_settings()
+    cache = TiffRenderCache()
+    await cache.render(_pdf(workdir, "old.pdf"), os.path.join(workdir, "old.tiff"), sha256="c" * 64)
+    await cache.render(_pdf(workdir, "new.pdf"), os.path.join(workdir, "new.tiff"), sha256="d" * 64)
+    old = cache.entry_path("c" * 64, "tiffg4", "204x196")
+    stale = time.time() - 8 * 86400
+    os.utime(old, (stale, stale))
+
+    assert cache.evict_expired() == 1
+    assert not os.path.exists(old)
+    assert cache.stats()["entries"] == 1
@@ -0,0 +1,89 @@
+import asyncio
+import hashlib
+import os
+
+import pytest
+
+from fastapi.testclient import TestClient  # type: ignore
+
+from app import artifacts
+from app.db import SessionLocal, FaxJob, FaxUpload
+from app.main import app
+from app.uploads import UploadOffsetMismatch, UploadSessions
+
+
+DOC = b"%PDF-1.4\n" + b"1 0 obj<<>>endobj\n" * 2000 + b"trailer<<>>\n%%EOF\n"
+
+
+def test_resume_after_interrupted_chunk_then_complete(tmp_db, tmp_path):
+    tmp_db.sending()
+    half = len(DOC) // 2
+    with TestClient(app) as client:
+        r = client.post("/fax/uploads", json={"file_name": "scan.pdf", "size": len(DOC)})
+        assert r.status_code == 201, r.text
+        uid = r.json()["id"]
+
+        r = client.put(f"/fax/uploads/{uid}?offset=0", content=DOC[:half])
+        assert r.status_code == 200 and r.json()["offset"] == half
+
+        # A retried chunk at a stale offset is refused with the offset to resume from
+        r = client.put(f"/fax/uploads/{uid}?offset=0", content=DOC[:half])
+        assert r.status_code == 409
+        assert r.headers["Upload-Offset"] == str(half)
+
+        # Completing early is refused
+        assert client.post(f"/fax/uploads/{uid}/complete", json={"to": "+15551230001"}).status_code == 409
+
+        assert client.get(f"/fax/uploads/{uid}").json()["offset"] == half
+        r = client.put(f"/fax/uploads/{uid}?offset={half}", content=DOC[half:])
+        assert r.json()["offset"] == len(DOC)
+
+        r = client.post(f"/fax/uploads/{uid}/complete", json={"to": "+15551230001"})
+        assert r.status_code == 202, r.text
+        job_id = r.json()["id"]
+        assert client.get(f"/fax/uploads/{uid}").status_code == 404
+
+    sha = hashlib.sha256(DOC).hexdigest()
+    with SessionLocal() as db:
+        assert db.get(FaxJob, job_id).content_sha256 == sha
+        assert db.query(FaxUpload).count() == 0
+    with open(artifacts.cas_path(sha, "pdf"), "rb") as f:
+        assert f.read() == DOC
+    assert os.listdir(tmp_path / "faxdata" / "uploads") == []
+
+
+def test_chunk_beyond_declared_size_is_rejected_without_moving_offset(tmp_db, tmp_path):
+    tmp_db.sending()
+    with TestClient(app) as client:
+        uid = client.post("/fax/uploads", json={"size": 10}).json()["id"]
+        r = client.put(f"/fax/uploads/{uid}?offset=0", content=b"x" * 11)
+        assert r.status_code == 413
+        assert client.get(f"/fax/uploads/{uid}").json()["offset"] == 0
+        assert os.path.getsize(tmp_path / "faxdata" / "uploads" / f"{uid}.part") == 0
+        assert client.delete(f"/fax/uploads/{uid}").status_code == 200
+        assert client.get(f"/fax/uploads/{uid}").status_code == 404
+
+
+def test_chunks_split_across_worker_processes_hash_the_whole_file(tmp_db, tmp_path):
+    tmp_db.sending()
+    # Two UploadSessions stand in for two worker processes sharing the database and disk
+    first, second = UploadSessions(), UploadSessions()
+    half = len(DOC) // 2
+
+    async def body(data, during=None):
+        yield data
+        if during is not None:
+            await during
+
+    async def run():
+        uid = str(first.create("scan.pdf", len(DOC), None).id)
+        await first.append(uid, None, 0, body(DOC[:half]))
+        # A retried chunk: the other worker commits the same offset while this one is still reading
+        retry = second.append(uid, None, half, body(DOC[half:]))
+        with pytest.raises(UploadOffsetMismatch) as lost:
+            await first.append(uid, None, half, body(DOC[half:], during=retry))
+        assert lost.value.offset == len(DOC)
+        return await first.take(uid, None, str(tmp_path / "scan.pdf"))
+
+    size, sha, _, _ = asyncio.run(run())
+    assert size == len(DOC) and sha == hashlib.sha256(DOC).hexdigest()
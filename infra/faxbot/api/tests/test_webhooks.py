@@ -0,0 +1,157 @@
+import asyncio
+import json
+from datetime import datetime
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient  # type: ignore
+
+from app.db import SessionLocal, WebhookDelivery
+from app.jobevents import job_events
+from app.main import app
+from app import jobstate, webhooks
+
+
+def _dns(monkeypatch, answers):
+    """Answer lookups for the hostnames in ``answers``; IP literals resolve as usual."""
+    real = webhooks._resolve
+    monkeypatch.setattr(webhooks, "_resolve", lambda host, port: answers[host] if host in answers else real(host, port))
+
+
+def _deliveries():
+    with SessionLocal() as db:
+        return [(d.job_id, d.status, d.attempts) for d in db.query(WebhookDelivery).order_by(WebhookDelivery.id)]
+
+
+def test_subscriptions_are_scoped_to_the_caller(tmp_db, monkeypatch):
+    tmp_db.env(FAX_DISABLED="true")
+    _dns(monkeypatch, {"example.com": ["93.184.215.14"], "internal.example": ["93.184.215.14", "10.0.0.7"]})
+    client = TestClient(app)
+    r = client.post("/webhooks", json={"url": "https://example.com/hook", "events": ["SUCCESS"], "batch_size": 10})
+    assert r.status_code == 200, r.text
+    sub = r.json()
+    assert sub["secret"] and sub["events"] == ["SUCCESS"] and sub["batch_size"] == 10
+    listed = client.get("/webhooks").json()
+    assert [s["id"] for s in listed] == [sub["id"]] and listed[0]["secret"] is None
+    for url in ("ftp://example.com", "http://example.com/hook", "https://127.0.0.1/hook",
+                "https://169.254.169.254/latest", "https://[::1]/hook", "https://localhost:8080/hook",
+                "https://internal.example/hook"):
+        assert client.post("/webhooks", json={"url": url}).status_code == 400, url
+    assert client.post("/webhooks", json={"url": "https://example.com", "events": ["sent"]}).status_code == 400
+    # Another key's subscription is invisible
+    other = webhooks.create_subscription("someone-else", "https://example.org/hook", [])
+    assert client.delete(f"/webhooks/{other['id']}").status_code == 404
+    assert client.delete(f"/webhooks/{sub['id']}").status_code == 200
+    assert client.get("/webhooks").json() == []
+
+
+def test_status_changes_are_signed_batched_and_retried(tmp_db, make_job):
+    tmp_db.env(FAX_DISABLED="true", WEBHOOK_MAX_ATTEMPTS="2")
+    for i in range(3):
+        make_job(f"wh{i}", "in_progress", key_id="k1")
+    make_job("wh-other", "in_progress", key_id="k2")
+    batched = webhooks.create_subscription("k1", "https://a.example/hook", ["SUCCESS", "FAILED"], batch_size=5)
+    webhooks.create_subscription("k1", "https://b.example/hook", [])
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(500 if request.url.host == "b.example" else 204)
+
+    outbox = webhooks.WebhookOutbox(client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    outbox.reload()
+    job_events.subscribe(outbox.on_events)
+    try:
+        jobstate.transition("wh0", "SUCCESS")
+        jobstate.transition("wh1", "FAILED", error="busy")
+        jobstate.advance("wh2", "in_progress", provider_sid="p2")
+        jobstate.transition("wh-other", "SUCCESS")
+    finally:
+        job_events.unsubscribe(outbox.on_events)
+
+    assert asyncio.run(outbox.deliver_once(wait=True)) == 4
+    a = [r for r in requests if r.url.host == "a.example"]
+    assert len(a) == 1
+    body = json.loads(a[0].content)
+    assert [(e["job_id"], e["status"]) for e in body["events"]] == [("wh0", "SUCCESS"), ("wh1", "FAILED")]
+    assert a[0].headers["X-Faxbot-Signature"] == webhooks.sign(batched["secret"], a[0].headers["X-Faxbot-Timestamp"], a[0].content)
+    b = [json.loads(r.content) for r in requests if r.url.host == "b.example"]
+    assert sorted((e["job_id"], e["status"]) for e in b) == [("wh0", "SUCCESS"), ("wh1", "FAILED"), ("wh2", "in_progress")]
+    rows = _deliveries()
+    assert [r for r in rows if r[1] == "delivered"] == [("wh0", "delivered", 1), ("wh1", "delivered", 1)]
+    assert sorted(r for r in rows if r[1] != "delivered") == [("wh0", "pending", 1), ("wh1", "pending", 1), ("wh2", "pending", 1)]
+    assert outbox.stats()["retried"] == 3
+
+    # Due again: the second failure uses up WEBHOOK_MAX_ATTEMPTS
+    with SessionLocal() as db:
+        db.query(WebhookDelivery).filter(WebhookDelivery.status == "pending").update({"next_attempt_at": datetime.utcnow()})
+        db.commit()
+    assert asyncio.run(outbox.deliver_once(wait=True)) == 3
+    assert sorted(r for r in _deliveries() if r[1] != "delivered") == [("wh0", "failed", 2), ("wh1", "failed", 2), ("wh2", "failed", 2)]
+
+
+def test_busy_endpoint_keeps_only_rows_it_can_send(tmp_db, make_job):
+    tmp_db.env(FAX_DISABLED="true", WEBHOOK_ENDPOINT_CONCURRENCY="1")
+    for i in range(3):
+        make_job(f"busy{i}", "in_progress", key_id="k1")
+    webhooks.create_subscription("k1", "https://slow.example/hook", [])
+    posted = []
+    gate = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        posted.append(json.loads(request.content)["job_id"])
+        await gate.wait()
+        return httpx.Response(204)
+
+    outbox = webhooks.WebhookOutbox(client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    outbox.reload()
+    job_events.subscribe(outbox.on_events)
+    try:
+        for i in range(3):
+            jobstate.transition(f"busy{i}", "SUCCESS")
+    finally:
+        job_events.unsubscribe(outbox.on_events)
+
+    async def run():
+        # One slot: one POST starts, the other rows are handed back due at once
+        assert await outbox.deliver_once() == 1
+        with SessionLocal() as db:
+            claimed = db.query(WebhookDelivery).filter(WebhookDelivery.claim.is_not(None)).all()
+            assert len(claimed) == 1
+            stale = (claimed[0].id, claimed[0].subscription_id, claimed[0].payload, 0, "another-pass")
+        # An outcome from a pass that lost the claim is ignored
+        outbox.record([stale], "HTTP 500")
+        gate.set()
+        await asyncio.gather(*list(outbox._sending))
+        while await outbox.deliver_once(wait=True):
+            pass
+
+    asyncio.run(run())
+    assert posted == ["busy0", "busy1", "busy2"]
+    assert sorted(_deliveries()) == [(f"busy{i}", "delivered", 1) for i in range(3)]
+
+
+def test_delivery_refuses_hosts_rebound_to_private_addresses(monkeypatch):
+    answers = {"hooks.example": ["93.184.215.14"]}
+    _dns(monkeypatch, answers)
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append((request.url.host, request.headers["host"], request.extensions.get("sni_hostname")))
+        return httpx.Response(204)
+
+    transport = webhooks.PublicTransport()
+    transport._inner = httpx.MockTransport(handler)
+
+    async def post():
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await client.post("https://hooks.example/hook", content=b"{}")
+
+    # Connects to the address it checked, with the hostname kept for Host and TLS
+    assert asyncio.run(post()).status_code == 204
+    assert seen == [("93.184.215.14", "hooks.example", "hooks.example")]
+    # The name now points inside the network: the POST fails without connecting
+    answers["hooks.example"] = ["192.168.1.20"]
+    with pytest.raises(httpx.ConnectError, match="non-public"):
+        asyncio.run(post())
+    assert len(seen) == 1